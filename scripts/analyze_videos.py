@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+보관 영상 헤드리스 일괄 분석 스크립트
+
+여러 영상을 시간 구간으로 나누어 프로세스 풀에서 병렬로 처리하고(프로세스당 모델 1개),
+영상/시간대별 차종 카운트와 ESAL을 파일 또는 데이터베이스로 저장합니다.
+화면 표시나 주석 영상 저장을 하지 않으며, 영상 길이와 무관하게 메모리 사용량이 일정합니다.
+
+사용법:
+  python scripts/analyze_videos.py --model weights/best.pt --folder demo_videos --workers 4
+  python scripts/analyze_videos.py video1.mp4 video2.mp4 --chunk-seconds 300 --db
+
+출력 (--output-dir):
+  hourly_counts.csv : video, hour, vehicle_type, count, esal
+  summary.json      : 영상별 총 카운트, 총 ESAL, 보수 권고
+"""
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# src를 import 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from car_detect_esal.core.detection_batch import DetectionBatch
+from car_detect_esal.core.esal_calculator import ESALCalculator
+from car_detect_esal.core.inference_backends import EXPORT_FORMATS, export_model
+from car_detect_esal.core.video_analyzer import (
+    VideoAnalyzer, merge_counts, plan_chunks, probe_video, summarize_counts
+)
+
+# 워커 프로세스별 분석기 (초기화 시 한 번 생성)
+_analyzer = None
+_keep_detections = False
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Headless batch vehicle counting / ESAL analysis for archived videos")
+    p.add_argument("videos", nargs="*", help="분석할 영상 파일 (없으면 --folder의 영상)")
+    p.add_argument("--model", default="weights/best.pt", help="모델 파일 경로 (기본: weights/best.pt)")
+    p.add_argument("--folder", default="demo_videos", help="비디오가 들어있는 폴더 (기본: demo_videos)")
+    p.add_argument("--imgsz", type=int, default=640, help="입력 이미지 크기")
+    p.add_argument("--conf", type=float, default=0.5, help="confidence threshold")
+    p.add_argument("--backend", default="onnxruntime",
+                   choices=["pytorch", "torchscript", "onnxruntime", "openvino"],
+                   help="추론 엔진 (기본: onnxruntime, 최초 실행 시 한 번 내보내기)")
+    p.add_argument("--threads", type=int, default=1, help="워커 프로세스당 추론 스레드 수")
+    p.add_argument("--workers", type=int, default=max(1, multiprocessing.cpu_count() // 2),
+                   help="워커 프로세스 수 (프로세스당 모델 1개)")
+    p.add_argument("--chunk-seconds", type=float, default=600.0, help="구간 길이(초), 0이면 분할 안 함")
+    p.add_argument("--overlap-seconds", type=float, default=5.0,
+                   help="구간 간 워밍업 겹침(초) - --track-ttl 이상이어야 함")
+    p.add_argument("--frame-step", type=int, default=1, help="N 프레임마다 한 번 탐지")
+    p.add_argument("--track-ttl", type=float, default=3.0, help="추적 유지 시간(영상 시간 기준, 초)")
+    p.add_argument("--start-time", default=None,
+                   help="녹화 시작 시각 ISO 형식 (기본: 파일 수정 시각 - 영상 길이)")
+    p.add_argument("--output-dir", default="runs/analyze", help="결과 파일 저장 디렉터리")
+    p.add_argument("--db", action="store_true", help="탐지 결과를 데이터베이스에 일괄 기록")
+    p.add_argument("--camera-id", default=None, help="DB 기록용 카메라 ID (기본: 파일 경로 해시)")
+    return p.parse_args()
+
+
+def list_videos(folder: Path):
+    exts = ["*.mp4", "*.mov", "*.avi", "*.mkv"]
+    files = []
+    for e in exts:
+        files.extend(sorted(folder.glob(e)))
+    return files
+
+
+def camera_id_for(video_path: str, override: str = None) -> str:
+    """영상별 카메라 ID (GUI와 같은 규칙: cam_ + 경로 md5 앞 8자리)"""
+    return override or f"cam_{hashlib.md5(video_path.encode()).hexdigest()[:8]}"
+
+
+def _init_worker(model_path, imgsz, conf, backend, threads, frame_step, track_ttl, keep_detections):
+    """워커 프로세스 초기화 - 모델을 프로세스당 한 번만 로드"""
+    global _analyzer, _keep_detections
+    from car_detect_esal.core.detector import VehicleDetector
+
+    detector = VehicleDetector(model_path=model_path, imgsz=imgsz, conf=conf,
+                               backend=backend, threads=threads)
+    _analyzer = VideoAnalyzer(detector, frame_step=frame_step, track_ttl=track_ttl,
+                              min_confidence=conf)
+    _keep_detections = keep_detections
+
+
+def _analyze_chunk(chunk):
+    """워커 프로세스에서 구간 하나 처리"""
+    try:
+        result = _analyzer.analyze_chunk(chunk)
+    except Exception as e:
+        return {'video': chunk.video_path, 'index': chunk.index, 'frames': 0, 'failed_frames': 0,
+                'counts': {}, 'detections': DetectionBatch.empty(), 'error': str(e)}
+    if not _keep_detections:
+        result['detections'] = DetectionBatch.empty()
+    return result
+
+
+def write_outputs(output_dir: Path, rows, merged, esal_calculator: ESALCalculator):
+    """hourly_counts.csv / summary.json 저장"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(output_dir / "hourly_counts.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["video", "hour", "vehicle_type", "count", "esal"])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(dict(row, hour=row['hour'].isoformat()))
+
+    summary = {}
+    for video, hours in merged.items():
+        totals = {}
+        for hour_counts in hours.values():
+            for vehicle_type, count in hour_counts.items():
+                totals[vehicle_type] = totals.get(vehicle_type, 0) + count
+        total_esal, _ = esal_calculator.calculate_total_score(totals)
+        summary[video] = {
+            'counts': totals,
+            'total_vehicles': sum(totals.values()),
+            'total_esal': total_esal,
+            'recommendation': esal_calculator.get_maintenance_recommendation(total_esal),
+        }
+    with open(output_dir / "summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    args = parse_args()
+
+    videos = [Path(v) for v in args.videos] or list_videos(Path(args.folder))
+    if not videos:
+        print("처리할 영상이 없습니다. 종료합니다.")
+        return
+
+    start_time = datetime.fromisoformat(args.start_time) if args.start_time else None
+    if args.overlap_seconds < args.track_ttl:
+        print(f"경고: --overlap-seconds({args.overlap_seconds})가 --track-ttl({args.track_ttl})보다 작아 "
+              f"구간 경계에서 중복 카운트가 생길 수 있습니다.")
+
+    # 영상별 구간 계획 (긴 영상은 여러 워커가 나눠 처리)
+    chunks = []
+    for video in videos:
+        try:
+            frame_count, fps = probe_video(str(video))
+        except IOError as e:
+            print(e)
+            continue
+        video_chunks = plan_chunks(str(video), frame_count, fps, args.chunk_seconds,
+                                   args.overlap_seconds, start_time)
+        print(f"{video}: {frame_count} 프레임, {fps:.1f} FPS, {len(video_chunks)}개 구간")
+        chunks.extend(video_chunks)
+
+    db_manager = None
+    if args.db:
+        from car_detect_esal.database import TrafficDatabaseManager
+        db_manager = TrafficDatabaseManager()
+        for video in videos:
+            db_manager.add_camera_stream(camera_id_for(str(video), args.camera_id),
+                                         video.stem, "archive", str(video))
+
+    # 워커들이 동시에 내보내지 않도록 내보내기 캐시를 미리 준비
+    if args.backend in EXPORT_FORMATS:
+        try:
+            export_model(args.model, EXPORT_FORMATS[args.backend], args.imgsz)
+        except Exception as e:
+            print(f"{args.backend} 내보내기 실패, 워커에서 다른 백엔드로 대체합니다: {e}")
+
+    results = []
+    started = time.time()
+    ctx = multiprocessing.get_context("spawn")
+    initargs = (args.model, args.imgsz, args.conf, args.backend, args.threads,
+                args.frame_step, args.track_ttl, args.db)
+    with ctx.Pool(processes=max(1, min(args.workers, len(chunks))),
+                  initializer=_init_worker, initargs=initargs) as pool:
+        for done, result in enumerate(pool.imap_unordered(_analyze_chunk, chunks), 1):
+            if result.get('error'):
+                print(f"구간 처리 오류: {result['video']}#{result['index']} -> {result['error']}")
+
+            # 구간 단위로 DB에 일괄 기록하고 탐지 레코드는 보관하지 않음
+            if db_manager and len(result['detections']):
+                camera_id = camera_id_for(result['video'], args.camera_id)
+                db_manager.record_vehicle_detections_bulk([(camera_id, result['detections'])])
+            result['detections'] = DetectionBatch.empty()
+            results.append(result)
+            print(f"[{done}/{len(chunks)}] {Path(result['video']).name}#{result['index']} "
+                  f"{result['frames']} 프레임 처리"
+                  + (f" (추론 실패 {result['failed_frames']} 프레임)" if result.get('failed_frames') else ""))
+
+    if db_manager:
+        db_manager.close()
+
+    esal_calculator = ESALCalculator()
+    merged = merge_counts(results)
+    rows = summarize_counts(merged, esal_calculator)
+    write_outputs(Path(args.output_dir), rows, merged, esal_calculator)
+    print(f"분석 완료 ({time.time() - started:.1f}초) -> {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
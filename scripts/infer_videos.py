@@ -8,6 +8,8 @@
 
 옵션:
   --watch : 폴더를 계속 감시하여 새 비디오가 추가되면 자동으로 처리합니다.
+
+카운트/ESAL 집계가 필요한 대량 보관 영상 분석은 analyze_videos.py를 사용하세요.
 """
 import argparse
 import sys
@@ -62,8 +64,10 @@ def main():
         project = str(Path(args.save_dir).parent)
         # 결과 폴더 이름에 원본 비디오명을 붙임
         name = Path(args.save_dir).name + "_" + video_path.stem
-        y.predict(
+        # stream=True: 프레임별 Results를 생성기로 받아 바로 버림 (긴 영상에서도 메모리 일정)
+        results = y.predict(
             source=str(video_path),
+            stream=True,
             imgsz=args.imgsz,
             conf=args.conf,
             device=args.device,
@@ -73,6 +77,8 @@ def main():
             name=name,
             exist_ok=args.exist_ok,
         )
+        for _ in results:
+            pass
         print(f"처리 완료: {video_path} -> {Path(project)/name}")
 
     while True:
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+INT8 양자화 모델 생성/검증 스크립트
+
+우리 카메라 영상으로 보정(calibration)한 ONNX Runtime 정적 INT8 모델을 만들고,
+보정에 쓰지 않은 검증 영상에서 FP32 모델과 차종별 카운트/ESAL을 비교합니다.
+정확도 기준을 통과한 경우에만 weights/variants.json에 변형으로 등록되어
+GUI 프리셋(variant: int8)에서 선택됩니다.
+
+보정 프레임 수집:
+  performance_config의 calibration_dir을 설정하면 StreamWorker가 카메라별로
+  ROI 영역 프레임을 주기적으로 저장합니다. 영상 파일을 직접 지정해도 됩니다.
+
+사용법:
+  python scripts/quantize_model.py --calibration runs/calibration demo_videos/day.mp4 \\
+      --holdout demo_videos/night.mp4
+  python scripts/quantize_model.py --calibration runs/calibration --holdout test.mp4 --no-register
+
+출력:
+  weights/best_int8.onnx (+ .meta.json), --report 경로의 비교 보고서 JSON
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# src를 import 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from car_detect_esal.core.detector import VehicleDetector
+from car_detect_esal.core.esal_calculator import ESALCalculator
+from car_detect_esal.core.inference_backends import create_backend, export_model
+from car_detect_esal.core.quantization import (
+    ModelVariantRegistry, collect_calibration_frames, compare_counts, quantize_onnx
+)
+from car_detect_esal.core.video_analyzer import VideoAnalyzer, merge_counts, plan_chunks, probe_video
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Calibrate, quantize and validate an INT8 ONNX model")
+    p.add_argument("--model", default="weights/best.pt", help="원본 모델 파일 경로 (기본: weights/best.pt)")
+    p.add_argument("--calibration", nargs="+", required=True,
+                   help="보정용 이미지 디렉터리/이미지/영상 (검증 영상과 겹치지 않게)")
+    p.add_argument("--holdout", nargs="+", required=True, help="FP32/INT8 비교용 검증 영상")
+    p.add_argument("--imgsz", type=int, default=640, help="입력 이미지 크기")
+    p.add_argument("--conf", type=float, default=0.5, help="confidence threshold")
+    p.add_argument("--threads", type=int, default=0, help="추론 스레드 수 (0이면 기본값)")
+    p.add_argument("--max-frames", type=int, default=300, help="보정 프레임 최대 수")
+    p.add_argument("--frames-per-video", type=int, default=100, help="보정 영상 하나에서 추출할 프레임 수")
+    p.add_argument("--frame-step", type=int, default=1, help="검증 시 N 프레임마다 한 번 탐지")
+    p.add_argument("--per-tensor", action="store_true", help="가중치를 채널별이 아닌 텐서별로 양자화")
+    p.add_argument("--quantize-head", action="store_true", help="Detect 헤드까지 INT8로 양자화")
+    p.add_argument("--max-count-drift", type=float, default=0.05, help="전체 대수 허용 상대 오차")
+    p.add_argument("--max-esal-drift", type=float, default=0.03, help="전체 ESAL 허용 상대 오차")
+    p.add_argument("--max-heavy-drift", type=float, default=0.05, help="트럭/버스 대수 허용 상대 오차")
+    p.add_argument("--name", default="int8", help="등록할 변형 이름 (기본: int8)")
+    p.add_argument("--output", default=None, help="INT8 모델 경로 (기본: <모델>_int8.onnx)")
+    p.add_argument("--report", default="runs/quantize/report.json", help="비교 보고서 저장 경로")
+    p.add_argument("--no-register", action="store_true", help="기준을 통과해도 변형으로 등록하지 않음")
+    return p.parse_args()
+
+
+def count_videos(detector: VehicleDetector, videos, frame_step: int, conf: float):
+    """검증 영상 전체의 차종별 카운트 (영상마다 한 구간으로 처리)"""
+    analyzer = VideoAnalyzer(detector, frame_step=frame_step, min_confidence=conf)
+    results = []
+    for video in videos:
+        frame_count, fps = probe_video(video)
+        for chunk in plan_chunks(video, frame_count, fps, chunk_seconds=0, overlap_seconds=0):
+            results.append(analyzer.analyze_chunk(chunk))
+
+    totals = {}
+    for hours in merge_counts(results).values():
+        for hour_counts in hours.values():
+            for vehicle_type, count in hour_counts.items():
+                totals[vehicle_type] = totals.get(vehicle_type, 0) + count
+    return totals
+
+
+def print_report(report):
+    print(f"{'차종':<12}{'FP32':>8}{'INT8':>8}{'오차':>10}{'ESAL 오차':>12}")
+    for vehicle_type, row in report['per_class'].items():
+        print(f"{vehicle_type:<12}{row['fp32']:>8}{row['int8']:>8}"
+              f"{row['drift']:>+10.1%}{row['esal_drift']:>+12.1%}")
+    print(f"전체 대수: {report['total_count']['fp32']} -> {report['total_count']['int8']} "
+          f"({report['total_count']['drift']:+.1%})")
+    print(f"전체 ESAL: {report['total_esal']['fp32']:.4f} -> {report['total_esal']['int8']:.4f} "
+          f"({report['total_esal']['drift']:+.1%})")
+    for failure in report['failures']:
+        print(f"  기준 미통과: {failure}")
+
+
+def main():
+    args = parse_args()
+    model = Path(args.model)
+    output = Path(args.output) if args.output else model.with_name(f"{model.stem}_int8.onnx")
+
+    # 1. FP32 ONNX 내보내기 (캐시 재사용)
+    fp32_path, _ = export_model(str(model), 'onnx', args.imgsz)
+
+    # 2. 보정 프레임 수집 및 INT8 양자화
+    started = time.time()
+    calibration = collect_calibration_frames(args.calibration, args.imgsz, args.max_frames,
+                                             args.frames_per_video)
+    print(f"보정 프레임 {len(calibration)}장으로 양자화 중...")
+    quantize_onnx(str(fp32_path), str(output), calibration,
+                  per_channel=not args.per_tensor, keep_head_fp32=not args.quantize_head)
+    del calibration
+    print(f"INT8 모델 저장: {output} ({time.time() - started:.1f}초)")
+
+    # 3. 검증 영상에서 FP32/INT8 카운트 비교
+    detector = VehicleDetector(str(model), imgsz=args.imgsz, conf=args.conf,
+                               backend='onnxruntime', threads=args.threads)
+    fp32_counts = count_videos(detector, args.holdout, args.frame_step, args.conf)
+    detector.backend = create_backend('onnxruntime', str(model), args.imgsz, args.threads,
+                                      fallback=False, model_path=str(output))
+    int8_counts = count_videos(detector, args.holdout, args.frame_step, args.conf)
+
+    report = compare_counts(fp32_counts, int8_counts, ESALCalculator(),
+                            args.max_count_drift, args.max_esal_drift, args.max_heavy_drift)
+    print_report(report)
+
+    report_path = Path(args.report)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(dict(report, model=str(output), holdout=args.holdout), f, ensure_ascii=False, indent=2)
+    print(f"보고서 저장: {report_path}")
+
+    # 4. 기준을 통과한 모델만 변형으로 등록
+    if not report['passed']:
+        print("정확도 기준 미통과 - 변형으로 등록하지 않습니다.")
+        sys.exit(1)
+    if not args.no_register:
+        ModelVariantRegistry.for_weights(str(model)).register(
+            args.name, str(output), 'onnxruntime', str(model), report)
+        print(f"변형 '{args.name}' 등록 완료 -> {model.parent / ModelVariantRegistry.FILENAME}")
+
+
+if __name__ == "__main__":
+    main()
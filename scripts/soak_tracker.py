@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+추적기 장시간 운영(soak) 메모리 점검 스크립트
+
+모델이나 영상 없이 합성 차량 흐름을 영상 시간 기준으로 여러 날 동안 VehicleTracker에
+흘려보내고, 시뮬레이션 하루마다 추적기 메모리(살아 있는 추적 수, 배열 바이트, 선택적으로
+tracemalloc 기준 파이썬 힙)를 출력합니다. 첫날 대비 마지막 날 메모리가 허용치 이상
+늘어나면 종료 코드 1로 끝납니다.
+
+사용법:
+  python scripts/soak_tracker.py --days 14 --vehicles-per-hour 1500
+  python scripts/soak_tracker.py --days 3 --counting-line --tracemalloc
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# src를 import 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from car_detect_esal.core.counting_line import CountingLine
+from car_detect_esal.core.detector import VehicleTracker
+
+FRAME_SIZE = (1920, 1080)
+CLASSES = ['car', 'bus', 'truck']
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Multi-day synthetic soak test for VehicleTracker memory")
+    p.add_argument("--days", type=float, default=3.0, help="시뮬레이션 기간(일, 영상 시간)")
+    p.add_argument("--vehicles-per-hour", type=float, default=1200.0, help="시간당 진입 차량 수")
+    p.add_argument("--step", type=float, default=0.25, help="탐지 간격(초, 영상 시간)")
+    p.add_argument("--track-ttl", type=float, default=3.0, help="추적 유지 시간(초)")
+    p.add_argument("--counting-line", action="store_true", help="화면 중앙 세로 계수선 모드로 실행")
+    p.add_argument("--tracemalloc", action="store_true", help="tracemalloc으로 파이썬 힙 사용량도 측정 (느림)")
+    p.add_argument("--max-growth", type=float, default=0.10,
+                   help="첫날 대비 허용 메모리 증가율 (기본: 0.10 = 10%%)")
+    p.add_argument("--seed", type=int, default=0, help="난수 시드")
+    return p.parse_args()
+
+
+def _detection(x, y, class_name):
+    bbox = {
+        'vehicle_type': class_name, 'vehicle_class': CLASSES.index(class_name),
+        'bbox_x': x / FRAME_SIZE[0], 'bbox_y': y / FRAME_SIZE[1],
+        'bbox_width': 0.08, 'bbox_height': 0.08,
+    }
+    return (x, y, class_name, 0.9, bbox)
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    line = None
+    if args.counting_line:
+        line = CountingLine((FRAME_SIZE[0] / 2, 0), (FRAME_SIZE[0] / 2, FRAME_SIZE[1]))
+    tracker = VehicleTracker(track_ttl=args.track_ttl, counting_line=line)
+
+    # 차량: [x, y, 속도(px/s), 클래스 인덱스] - 왼쪽에서 진입해 오른쪽으로 빠져나감
+    # (탐지 간격당 이동 거리가 추적 매칭 거리보다 작아야 하므로 --step은 0.5초 이하 권장)
+    vehicles = np.empty((0, 4), dtype=np.float64)
+    lanes = np.linspace(200, 880, 6)
+    arrivals_per_step = args.vehicles_per_hour / 3600.0 * args.step
+    steps_per_day = int(round(86400 / args.step))
+    total_steps = int(round(args.days * steps_per_day))
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    print(f"[Soak] {args.days:g}일, 시간당 {args.vehicles_per_hour:g}대, 탐지 간격 {args.step:g}초 "
+          f"({'계수선' if line else '추적 생성'} 카운트)")
+    print(f"{'day':>4} {'count':>10} {'tracks':>7} {'array_KB':>9} {'heap_KB':>9} {'next_id':>10} {'sec':>6}")
+
+    baseline = None
+    last = None
+    started = time.perf_counter()
+    now = 0.0
+    for step in range(1, total_steps + 1):
+        now += args.step
+
+        arrivals = rng.poisson(arrivals_per_step)
+        if arrivals:
+            new = np.column_stack([
+                np.zeros(arrivals),
+                rng.choice(lanes, arrivals) + rng.normal(0, 10, arrivals),
+                rng.uniform(60, 180, arrivals),
+                rng.choice(len(CLASSES), arrivals, p=[0.8, 0.05, 0.15]),
+            ])
+            vehicles = np.vstack([vehicles, new])
+        vehicles[:, 0] += vehicles[:, 2] * args.step
+        vehicles = vehicles[vehicles[:, 0] < FRAME_SIZE[0]]
+
+        detections = [_detection(x, y, CLASSES[int(c)]) for x, y, _, c in vehicles]
+        tracker.update(detections, now=now)
+
+        if step % steps_per_day == 0 or step == total_steps:
+            stats = tracker.memory_stats()
+            heap = tracemalloc.get_traced_memory()[0] if args.tracemalloc else 0
+            # 추적 수는 시점의 교통량에 따라 달라지므로 추적당 메모리가 아닌 합계를 비교
+            usage = stats['array_bytes'] + heap
+            day = step / steps_per_day
+            print(f"{day:>4.0f} {tracker.count:>10} {stats['tracks']:>7} "
+                  f"{stats['array_bytes'] / 1024:>9.1f} {heap / 1024:>9.1f} "
+                  f"{stats['next_track_id']:>10} {time.perf_counter() - started:>6.0f}")
+            if baseline is None:
+                baseline = usage
+            last = usage
+
+    if args.tracemalloc:
+        tracemalloc.stop()
+
+    # 살아 있는 추적 수 변동(수 KB)은 허용하도록 최소 기준을 둠
+    limit = max(baseline, 64 * 1024) * (1.0 + args.max_growth)
+    if last > limit:
+        print(f"[Soak] 실패: 메모리 {baseline / 1024:.1f}KB -> {last / 1024:.1f}KB "
+              f"(허용 {limit / 1024:.1f}KB)")
+        sys.exit(1)
+    print(f"[Soak] 통과: 메모리 {baseline / 1024:.1f}KB -> {last / 1024:.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,18 @@ Core module initialization
 """
 
 from .config import Config
-from .detector import VehicleDetector, VehicleTracker
+from .detector import VehicleDetector, VehicleTracker, DetectionResult, OverlayRenderer
+from .detection_batch import DetectionBatch
 from .esal_calculator import ESALCalculator
+from .inference_server import BatchInferenceServer
 
 __all__ = [
     "Config",
     "VehicleDetector",
     "VehicleTracker", 
+    "DetectionResult",
+    "DetectionBatch",
+    "OverlayRenderer",
     "ESALCalculator",
+    "BatchInferenceServer",
 ]
\ No newline at end of file
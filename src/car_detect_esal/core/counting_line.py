@@ -0,0 +1,120 @@
+"""
+가상 계수선(counting line)
+
+차량은 추적이 새로 생길 때가 아니라 추적 중심점이 선분을 지정한 방향으로 넘을 때
+한 번만 카운트된다. 추적이 끊겨 새 추적이 생겨도 이미 선을 넘은 뒤라면 다시 넘지
+않으므로 중복 카운트가 생기지 않는다. 탐지는 선 주변의 띠(band) 영역만 크롭해서
+수행한다 (band_roi).
+
+방향: p1 -> p2를 바라볼 때 왼쪽에서 오른쪽으로 넘는 것이 'forward'
+(화면 좌표계, 예: 왼쪽에서 오른쪽으로 그은 가로선은 위에서 아래로 내려가는 차량).
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+Point = Tuple[float, float]
+
+
+class CountingLine:
+    """방향이 있는 계수 선분 (원본 프레임 좌표)"""
+
+    FORWARD = 'forward'
+    BACKWARD = 'backward'
+    BOTH = 'both'
+    DIRECTIONS = (BOTH, FORWARD, BACKWARD)
+
+    def __init__(self, p1: Point, p2: Point, direction: str = BOTH, band: int = 80):
+        """
+        Args:
+            p1, p2: 선분 양 끝점 (원본 프레임 픽셀 좌표)
+            direction: 'both', 'forward', 'backward'
+            band: 탐지 영역으로 쓸 선 주변 여유(픽셀, 한쪽 기준)
+
+        Raises:
+            ValueError: 알 수 없는 방향 또는 길이가 0인 선분
+        """
+        if direction not in self.DIRECTIONS:
+            raise ValueError(f"지원하지 않는 계수 방향: {direction}")
+        self.p1 = np.asarray(p1, dtype=np.float64)
+        self.p2 = np.asarray(p2, dtype=np.float64)
+        self.direction = direction
+        self.band = band
+        self._d = self.p2 - self.p1
+        self._length_sq = float(self._d @ self._d)
+        if self._length_sq == 0.0:
+            raise ValueError("계수선의 두 점이 같습니다")
+
+    def side(self, points: np.ndarray) -> np.ndarray:
+        """점들이 선의 어느 쪽인지 (양수: 오른쪽, 음수: 왼쪽, p1 -> p2 기준)"""
+        rel = np.asarray(points, dtype=np.float64).reshape(-1, 2) - self.p1
+        return self._d[0] * rel[:, 1] - self._d[1] * rel[:, 0]
+
+    def crossings(self, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        """
+        이동 구간(start -> end)별 선분 통과 여부
+
+        Args:
+            start, end: (N, 2) 이전/현재 중심점
+
+        Returns:
+            (N,) int8 - 1: forward 통과, -1: backward 통과, 0: 통과하지 않음
+        """
+        start = np.asarray(start, dtype=np.float64).reshape(-1, 2)
+        end = np.asarray(end, dtype=np.float64).reshape(-1, 2)
+        sa, sb = self.side(start), self.side(end)
+
+        # 선 위에 정확히 멈춘 경우 한 번만 세도록 시작점은 엄격하게 비교
+        forward = (sa < 0) & (sb >= 0)
+        backward = (sa > 0) & (sb <= 0)
+        crossed = forward | backward
+
+        # 무한 직선과의 교점이 선분 범위 안에 있어야 통과
+        denom = np.where(crossed, sa - sb, 1.0)
+        s = np.where(crossed, sa / denom, 0.0)
+        point = start + s[:, None] * (end - start)
+        t = ((point - self.p1) @ self._d) / self._length_sq
+        crossed &= (t >= 0.0) & (t <= 1.0)
+
+        result = np.zeros(len(start), dtype=np.int8)
+        result[crossed & forward] = 1
+        result[crossed & backward] = -1
+        return result
+
+    def counts(self, crossing: np.ndarray) -> np.ndarray:
+        """crossings() 결과 중 카운트할 방향만 True"""
+        if self.direction == self.FORWARD:
+            return crossing > 0
+        if self.direction == self.BACKWARD:
+            return crossing < 0
+        return crossing != 0
+
+    def band_roi(self, frame_size: Tuple[int, int], grid: int = 32) -> Tuple[int, int, int, int]:
+        """
+        선 주변 띠를 감싸는 (x, y, w, h) 탐지 영역 (grid 단위로 정렬)
+
+        Args:
+            frame_size: 원본 프레임 (width, height)
+        """
+        w_frame, h_frame = frame_size
+        x1 = min(self.p1[0], self.p2[0]) - self.band
+        y1 = min(self.p1[1], self.p2[1]) - self.band
+        x2 = max(self.p1[0], self.p2[0]) + self.band
+        y2 = max(self.p1[1], self.p2[1]) + self.band
+        x1 = max(0, int(x1 // grid * grid))
+        y1 = max(0, int(y1 // grid * grid))
+        x2 = min(w_frame, int(-(-x2 // grid) * grid))
+        y2 = min(h_frame, int(-(-y2 // grid) * grid))
+        return x1, y1, max(1, x2 - x1), max(1, y2 - y1)
+
+    def to_tuple(self) -> Tuple[Point, Point, str]:
+        return (tuple(self.p1.tolist()), tuple(self.p2.tolist()), self.direction)
+
+    @classmethod
+    def from_tuple(cls, value: Optional[Tuple[Point, Point, str]], band: int = 80) -> Optional['CountingLine']:
+        """((x1, y1), (x2, y2), direction) -> CountingLine (None이면 None)"""
+        if not value:
+            return None
+        p1, p2, direction = value
+        return cls(p1, p2, direction, band)
@@ -0,0 +1,276 @@
+"""
+탐지 배치 (struct-of-arrays)
+
+탐지 결과를 객체마다 튜플/딕셔너리로 만들지 않고 열(column)별 NumPy 배열로 담아
+추출 -> 추적기 -> DB 기록 큐 -> INSERT, 그리고 보관 영상 집계까지 그대로 전달한다.
+할당은 객체 단위가 아니라 배치 단위로 일어난다. 차종은 VEHICLE_TYPES의 인덱스(type_code)로
+저장하며, 딕셔너리 레코드는 저널(JSONL)처럼 행 단위 표현이 필요한 곳에서만 records()로 만든다.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 저장/집계용 표준 차종 (type_code 순서)
+VEHICLE_TYPES = ('car', 'motorbike', 'bus', 'truck', 'van')
+
+_TYPE_CODES = {name: code for code, name in enumerate(VEHICLE_TYPES)}
+
+# 모델 클래스명 -> 표준 차종 (없는 클래스는 car)
+VEHICLE_TYPE_MAP = {
+    'car': 'car',
+    'motorcycle': 'motorbike',
+    'bus': 'bus',
+    'truck': 'truck',
+    'bicycle': 'motorbike',
+    'van': 'van'
+}
+
+# direction 열 값 -> 계수선 통과 방향 (CountingLine.FORWARD/BACKWARD)
+_DIRECTIONS = {1: 'forward', -1: 'backward'}
+_DIRECTION_CODES = {name: code for code, name in _DIRECTIONS.items()}
+
+# id(names) -> (names, LUT) - 모델 클래스명 딕셔너리당 한 번만 생성
+_type_luts: Dict[int, Tuple[Dict[int, str], np.ndarray]] = {}
+
+
+def vehicle_type_lut(names: Dict[int, str]) -> np.ndarray:
+    """
+    모델 클래스 ID -> 표준 차종 코드 조회 테이블
+
+    Args:
+        names: 모델 클래스 ID -> 클래스명 (같은 딕셔너리 객체면 캐시된 테이블 반환)
+
+    Returns:
+        (max_id + 1,) int8 배열 (names에 없는 ID는 car)
+    """
+    cached = _type_luts.get(id(names))
+    if cached is not None and cached[0] is names:
+        return cached[1]
+
+    lut = np.full(max(names, default=-1) + 1, _TYPE_CODES['car'], dtype=np.int8)
+    for class_id, class_name in names.items():
+        lut[class_id] = _TYPE_CODES[VEHICLE_TYPE_MAP.get(str(class_name).lower(), 'car')]
+
+    # 모델이 바뀔 때마다 늘어나지 않도록 소수만 유지
+    if len(_type_luts) >= 16:
+        _type_luts.clear()
+    _type_luts[id(names)] = (names, lut)
+    return lut
+
+
+class DetectionBatch:
+    """
+    탐지 N개 (열별 배열)
+
+    centers는 원본 프레임 픽셀 좌표 (N, 2), boxes는 프레임 크기로 정규화한
+    (중심x, 중심y, 너비, 높이) (N, 4)이다. 추적기가 카운트한 행에는 track_id와
+    direction(1: forward, -1: backward, 0: 계수선 없음)이, 기록 시점에는 timestamp
+    (datetime64[us], 없으면 NaT)와 frame_number(없으면 -1)가 채워진다.
+    """
+
+    __slots__ = ('centers', 'boxes', 'conf', 'model_cls', 'type_code',
+                 'track_id', 'direction', 'timestamp', 'frame_number')
+
+    def __init__(self, centers: np.ndarray, boxes: np.ndarray, conf: np.ndarray,
+                 model_cls: np.ndarray, type_code: np.ndarray,
+                 track_id: Optional[np.ndarray] = None, direction: Optional[np.ndarray] = None,
+                 timestamp: Optional[np.ndarray] = None, frame_number: Optional[np.ndarray] = None):
+        n = len(conf)
+        self.centers = centers
+        self.boxes = boxes
+        self.conf = conf
+        self.model_cls = model_cls
+        self.type_code = type_code
+        self.track_id = np.full(n, -1, dtype=np.int32) if track_id is None else track_id
+        self.direction = np.zeros(n, dtype=np.int8) if direction is None else direction
+        self.timestamp = (np.full(n, np.datetime64('NaT'), dtype='datetime64[us]')
+                          if timestamp is None else timestamp)
+        self.frame_number = np.full(n, -1, dtype=np.int64) if frame_number is None else frame_number
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __getitem__(self, i: int) -> Dict:
+        """i번째 행의 레코드 딕셔너리 (조회용)"""
+        return self.record(i)
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def empty(cls) -> 'DetectionBatch':
+        return cls(np.empty((0, 2)), np.empty((0, 4)), np.empty(0),
+                   np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int8))
+
+    @classmethod
+    def from_result(cls, result, frame_size: Tuple[int, int],
+                    min_confidence: float = 0.5) -> 'DetectionBatch':
+        """
+        DetectionResult(원본 프레임 좌표) -> DetectionBatch
+
+        Args:
+            result: xyxy/conf/cls/names를 가진 한 프레임의 탐지 결과
+            frame_size: 원본 프레임 (width, height) - bbox 정규화용
+            min_confidence: 이 값 미만의 탐지는 제외
+        """
+        conf = np.asarray(result.conf, dtype=np.float64).reshape(-1)
+        keep = conf >= min_confidence
+        if not keep.any():
+            return cls.empty()
+
+        xyxy = np.asarray(result.xyxy, dtype=np.float64).reshape(-1, 4)[keep]
+        model_cls = np.asarray(result.cls).reshape(-1)[keep].astype(np.int32)
+
+        centers = (xyxy[:, :2] + xyxy[:, 2:]) * 0.5
+        scale = np.array(frame_size, dtype=np.float64)
+        boxes = np.empty((len(xyxy), 4), dtype=np.float64)
+        boxes[:, :2] = centers / scale
+        boxes[:, 2:] = (xyxy[:, 2:] - xyxy[:, :2]) / scale
+
+        lut = vehicle_type_lut(result.names)
+        in_range = (model_cls >= 0) & (model_cls < len(lut))
+        type_code = np.full(len(model_cls), _TYPE_CODES['car'], dtype=np.int8)
+        type_code[in_range] = lut[model_cls[in_range]]
+
+        return cls(centers, boxes, conf[keep], model_cls, type_code)
+
+    @classmethod
+    def from_tuples(cls, detections: List[Tuple[float, float, str, float, Dict]]) -> 'DetectionBatch':
+        """[(x, y, 표준 차종, 신뢰도, bbox데이터), ...] 형태의 이전 입력 변환 (모르는 차종은 car)"""
+        if not detections:
+            return cls.empty()
+        return cls(
+            np.array([(d[0], d[1]) for d in detections], dtype=np.float64),
+            np.array([(d[4]['bbox_x'], d[4]['bbox_y'], d[4]['bbox_width'], d[4]['bbox_height'])
+                      for d in detections], dtype=np.float64),
+            np.array([d[3] for d in detections], dtype=np.float64),
+            np.array([d[4]['vehicle_class'] for d in detections], dtype=np.int32),
+            np.array([_TYPE_CODES.get(d[2], _TYPE_CODES['car']) for d in detections], dtype=np.int8),
+        )
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict]) -> 'DetectionBatch':
+        """
+        탐지 레코드 딕셔너리 리스트 -> DetectionBatch (저널 재생, 이전 API 호환용)
+
+        레코드에는 픽셀 중심점이 없으므로 centers는 NaN으로 채운다.
+        """
+        if not records:
+            return cls.empty()
+        n = len(records)
+        return cls(
+            np.full((n, 2), np.nan),
+            np.array([(r['bbox_x'], r['bbox_y'], r['bbox_width'], r['bbox_height'])
+                      for r in records], dtype=np.float64),
+            np.array([r['confidence'] for r in records], dtype=np.float64),
+            np.array([_or_default(r.get('vehicle_class'), -1) for r in records], dtype=np.int32),
+            np.array([_TYPE_CODES.get(r['vehicle_type'], _TYPE_CODES['car']) for r in records],
+                     dtype=np.int8),
+            np.array([_or_default(r.get('track_id'), -1) for r in records], dtype=np.int32),
+            np.array([_DIRECTION_CODES.get(r.get('direction'), 0) for r in records], dtype=np.int8),
+            np.array([_or_default(r.get('timestamp'), 'NaT') for r in records], dtype='datetime64[us]'),
+            np.array([_or_default(r.get('frame_number'), -1) for r in records], dtype=np.int64),
+        )
+
+    @classmethod
+    def concat(cls, batches: Iterable['DetectionBatch']) -> 'DetectionBatch':
+        """여러 배치를 하나로 합침"""
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        return cls(*(np.concatenate([getattr(b, name) for b in batches]) for name in cls.__slots__))
+
+    def take(self, index) -> 'DetectionBatch':
+        """행 선택 (정수 배열, 불리언 마스크 또는 slice)"""
+        return DetectionBatch(*(getattr(self, name)[index] for name in self.__slots__))
+
+    def stamp(self, timestamp: datetime, frame_number: Optional[int] = None):
+        """
+        기록 시각(과 프레임 번호) 채우기 (제자리 변경)
+
+        Args:
+            timestamp: 탐지 시각 - 이미 시각이 있는 행은 유지
+            frame_number: 프레임 번호 (None이면 변경 안 함)
+        """
+        missing = np.isnat(self.timestamp)
+        if missing.any():
+            self.timestamp[missing] = np.datetime64(timestamp, 'us')
+        if frame_number is not None:
+            self.frame_number[:] = frame_number
+
+    def vehicle_type(self, i: int) -> str:
+        return VEHICLE_TYPES[self.type_code[i]]
+
+    def vehicle_types(self) -> List[str]:
+        return [VEHICLE_TYPES[code] for code in self.type_code.tolist()]
+
+    def type_counts(self) -> Dict[str, int]:
+        """차종별 행 수"""
+        counts = np.bincount(self.type_code, minlength=len(VEHICLE_TYPES))
+        return {VEHICLE_TYPES[code]: n for code, n in enumerate(counts.tolist()) if n}
+
+    def timestamps(self) -> List[Optional[datetime]]:
+        """timestamp 열을 datetime 리스트로 (NaT는 None)"""
+        return self.timestamp.tolist()
+
+    def frame_numbers(self) -> List[Optional[int]]:
+        """frame_number 열을 리스트로 (-1은 None)"""
+        return _nullable(self.frame_number)
+
+    def vehicle_classes(self) -> List[Optional[int]]:
+        """model_cls 열을 리스트로 (-1은 None)"""
+        return _nullable(self.model_cls)
+
+    def track_ids(self) -> List[Optional[int]]:
+        """track_id 열을 리스트로 (-1은 None)"""
+        return _nullable(self.track_id)
+
+    def directions(self) -> List[Optional[str]]:
+        """direction 열을 방향 이름 리스트로 (0은 None)"""
+        return [_DIRECTIONS.get(code) for code in self.direction.tolist()]
+
+    def record(self, i: int) -> Dict:
+        """i번째 행을 탐지 레코드 딕셔너리로"""
+        bbox_x, bbox_y, bbox_width, bbox_height = self.boxes[i].tolist()
+        record = {
+            'vehicle_type': VEHICLE_TYPES[self.type_code[i]],
+            'vehicle_class': int(self.model_cls[i]) if self.model_cls[i] >= 0 else None,
+            'confidence': float(self.conf[i]),
+            'bbox_x': bbox_x,
+            'bbox_y': bbox_y,
+            'bbox_width': bbox_width,
+            'bbox_height': bbox_height,
+        }
+        if self.track_id[i] >= 0:
+            record['track_id'] = int(self.track_id[i])
+        if self.direction[i]:
+            record['direction'] = _DIRECTIONS[int(self.direction[i])]
+        if not np.isnat(self.timestamp[i]):
+            record['timestamp'] = self.timestamp[i].tolist()
+        if self.frame_number[i] >= 0:
+            record['frame_number'] = int(self.frame_number[i])
+        return record
+
+    def records(self) -> List[Dict]:
+        """모든 행을 탐지 레코드 딕셔너리 리스트로"""
+        return [self.record(i) for i in range(len(self))]
+
+
+def _or_default(value, default):
+    return default if value is None else value
+
+
+def _nullable(column: np.ndarray) -> List[Optional[int]]:
+    """음수(-1)를 None으로 바꾼 정수 리스트"""
+    values = column.tolist()
+    if column.size and column.min() < 0:
+        return [None if v < 0 else v for v in values]
+    return values
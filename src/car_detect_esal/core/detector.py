@@ -4,206 +4,632 @@ Vehicle detection module using YOLOv8
 
 import cv2
 import time
-import math
+import numpy as np
 from typing import Optional, Dict, List, Tuple, Any
 from PyQt5 import QtCore
 
-try:
-    from ultralytics import YOLO
-except ImportError:
-    YOLO = None
+from .preprocess import Letterboxer, LetterboxTransform
+from .inference_backends import InferenceBackend, create_backend
+from .quantization import ModelVariantRegistry
+from .counting_line import CountingLine
+from .detection_batch import VEHICLE_TYPES, DetectionBatch
+
+class DetectionResult:
+    """
+    원본 프레임 좌표로 변환된 한 프레임의 탐지 결과
+    
+    xyxy는 (N, 4) 원본 프레임 픽셀 좌표, conf/cls는 (N,) 배열이다.
+    """
+    
+    __slots__ = ('xyxy', 'conf', 'cls', 'names', 'transform')
+    
+    def __init__(self, xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray,
+                 names: Dict[int, str], transform: Optional[LetterboxTransform] = None):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+        self.names = names
+        self.transform = transform
+    
+    def __len__(self):
+        return len(self.xyxy)
+
+
+def extract_tracker_detections(result: 'DetectionResult', frame_size: Tuple[int, int],
+                               min_confidence: float = 0.5) -> DetectionBatch:
+    """
+    탐지 결과(원본 프레임 좌표)를 VehicleTracker.update() 입력 배치로 변환
+    
+    신뢰도 필터, 중심점/정규화 박스 계산, 모델 클래스 -> 표준 차종 변환을 모두 배열
+    연산으로 수행한다 (차종 조회 테이블은 모델 클래스명 딕셔너리당 한 번 생성).
+    
+    Args:
+        result: 한 프레임의 DetectionResult
+        frame_size: 원본 프레임 (width, height) - bbox 정규화용
+        min_confidence: 이 값 미만의 탐지는 제외
+        
+    Returns:
+        DetectionBatch
+    """
+    return DetectionBatch.from_result(result, frame_size, min_confidence)
+
+
+class OverlayRenderer:
+    """
+    탐지 박스/라벨을 프레임에 직접(in-place) 그리는 경량 렌더러
+    
+    클래스별 색상과 라벨 이미지(배경 + 텍스트)를 캐시해 두고, 라벨은 매 프레임
+    putText 대신 미리 렌더링된 패치를 복사해서 그린다.
+    """
+    
+    # BGR 팔레트 (클래스 ID 순환)
+    PALETTE = [
+        (56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255), (49, 210, 207),
+        (10, 249, 72), (23, 204, 146), (134, 219, 61), (52, 147, 26), (187, 212, 0),
+        (168, 153, 44), (255, 194, 0), (147, 69, 52), (255, 115, 100), (236, 24, 0),
+        (255, 56, 132), (133, 0, 82), (255, 56, 203), (200, 149, 255), (199, 55, 255),
+    ]
+    FONT = cv2.FONT_HERSHEY_SIMPLEX
+    
+    def __init__(self, thickness: int = 2, font_scale: float = 0.5, max_labels: int = 512):
+        """
+        Args:
+            thickness: 박스 선 두께
+            font_scale: 라벨 글자 크기
+            max_labels: 캐시할 최대 라벨 패치 수
+        """
+        self.thickness = thickness
+        self.font_scale = font_scale
+        self.max_labels = max_labels
+        self._labels: Dict[Tuple[int, int], np.ndarray] = {}
+    
+    def color(self, class_id: int) -> Tuple[int, int, int]:
+        """클래스별 고정 색상"""
+        return self.PALETTE[int(class_id) % len(self.PALETTE)]
+    
+    def _label_patch(self, class_id: int, conf: float, names: Dict[int, str]) -> np.ndarray:
+        """"클래스명 신뢰도" 라벨 패치 (신뢰도는 0.01 단위로 캐시)"""
+        conf_pct = int(conf * 100)
+        key = (class_id, conf_pct)
+        patch = self._labels.get(key)
+        if patch is None:
+            if len(self._labels) >= self.max_labels:
+                self._labels.clear()
+            text = f"{names.get(class_id, class_id)} {conf_pct / 100:.2f}"
+            (tw, th), baseline = cv2.getTextSize(text, self.FONT, self.font_scale, 1)
+            patch = np.empty((th + baseline + 4, tw + 4, 3), dtype=np.uint8)
+            patch[:] = self.color(class_id)
+            cv2.putText(patch, text, (2, th + 2), self.FONT, self.font_scale,
+                        (255, 255, 255), 1, cv2.LINE_AA)
+            self._labels[key] = patch
+        return patch
+    
+    def render(self, frame: Any, result: 'DetectionResult') -> Any:
+        """
+        원본 프레임 좌표의 탐지 결과를 프레임에 직접 그림
+        
+        Returns:
+            같은 프레임 객체 (복사하지 않음)
+        """
+        if result is None or not len(result):
+            return frame
+        
+        h_frame, w_frame = frame.shape[:2]
+        boxes = result.xyxy.astype(np.int32)
+        for (x1, y1, x2, y2), conf, class_id in zip(boxes, result.conf, result.cls):
+            class_id = int(class_id)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), self.color(class_id), self.thickness)
+            
+            patch = self._label_patch(class_id, float(conf), result.names)
+            ph, pw = patch.shape[:2]
+            top = y1 - ph if y1 >= ph else y1
+            bottom = min(h_frame, top + ph)
+            right = min(w_frame, x1 + pw)
+            if bottom > top and right > x1:
+                frame[top:bottom, x1:right] = patch[:bottom - top, :right - x1]
+        return frame
+
 
 class VehicleDetector:
     """YOLOv8 기반 차량 탐지 클래스"""
     
-    def __init__(self, model_path: str, imgsz: int = 640, conf: float = 0.5):
+    def __init__(self, model_path: str, imgsz: int = 640, conf: float = 0.5,
+                 backend: str = 'pytorch', threads: int = 0, model_variant: Optional[str] = None):
+        """
+        Args:
+            model_path: .pt 가중치 경로
+            imgsz: 최대 모델 입력 크기
+            conf: 최소 신뢰도
+            backend: 추론 엔진 ('pytorch', 'torchscript', 'onnxruntime', 'openvino')
+            threads: CPU 추론 스레드 수 (0이면 런타임 기본값)
+            model_variant: 등록된 모델 변형 이름 (예: 'int8') - 없으면 원본 모델 사용
+        """
         self.model_path = model_path
         self.imgsz = imgsz
         self.conf = conf  # 더 높은 confidence로 불필요한 탐지 줄임
-        self.model = None
+        self.iou = 0.7
+        self.max_det = 100  # 최대 탐지 수 제한
+        self.agnostic_nms = True  # 클래스 무관 NMS (더 빠름)
+        self.backend_name = backend
+        self.threads = threads
+        self.model_variant = model_variant
+        self.backend: Optional[InferenceBackend] = None
+        # ROI 크롭 + 레터박스 변환 캐시 (프레임 크기/ROI/imgsz별)
+        self.letterboxer = Letterboxer()
+        # 탐지 결과 오버레이 (표시하지 않는 스트림은 생략 가능)
+        self.renderer = OverlayRenderer()
         self._load_model()
     
     def _load_model(self):
-        """모델 로드"""
-        if YOLO is None:
-            raise ImportError("ultralytics 패키지가 설치되어 있지 않습니다.")
+        """추론 백엔드 로드 (필요하면 최초 1회 내보내기, 사용 불가 시 다른 백엔드로 대체)"""
+        backend_name, variant_path = self.backend_name, None
+        if self.model_variant:
+            # 정확도 기준을 통과해 이 백엔드용으로 등록된 변형만 사용 (백엔드는 바꾸지 않음)
+            registry = ModelVariantRegistry.for_weights(self.model_path)
+            variant = registry.get(self.model_variant, backend_name)
+            if variant:
+                variant_path = variant['path']
+            else:
+                others = registry.backends(self.model_variant)
+                print(f"[VehicleDetector] 모델 변형 '{self.model_variant}'이(가) {backend_name}용으로 "
+                      f"미등록{f' (등록된 백엔드: {others})' if others else ''} - 원본 모델 사용")
         
         try:
-            self.model = YOLO(self.model_path)
-            # 모델 로드 완료
+            self.backend = create_backend(backend_name, self.model_path, self.imgsz, self.threads,
+                                          model_path=variant_path)
+        except ImportError:
+            raise
         except Exception as e:
             raise RuntimeError(f"모델 로드 실패: {e}")
+        print(f"[VehicleDetector] 추론 백엔드: {self.backend.name}")
+    
+    @property
+    def names(self) -> Dict[int, str]:
+        """클래스 ID -> 클래스명"""
+        return self.backend.names if self.backend else {}
     
-    def detect(self, frame: Any, roi: Optional[Tuple[int, int, int, int]] = None) -> Tuple[Any, Any]:
+    def _predict(self, sources: List[Any]) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """레터박스 이미지 배치 추론 + 공통 NMS (입력 이미지 좌표)"""
+        return self.backend.predict(
+            sources,
+            conf=self.conf,
+            iou=self.iou,
+            max_det=self.max_det,
+            agnostic=self.agnostic_nms
+        )
+
+    def detect(self, frame: Any, roi: Optional[Tuple[int, int, int, int]] = None,
+               imgsz: Optional[int] = None, annotate: bool = True) -> Tuple[Any, Any]:
         """
         프레임에서 차량 탐지 수행
         
         Args:
             frame: 입력 프레임
             roi: (x, y, w, h) 관심 영역
+            imgsz: 이번 호출에만 적용할 모델 입력 크기 (None이면 self.imgsz)
+            annotate: False면 오버레이를 그리지 않음 (화면에 표시하지 않는 스트림)
             
         Returns:
-            (annotated_frame, results)
+            (annotated_frame, [DetectionResult]) - 박스는 원본 프레임 좌표,
+            오버레이는 입력 프레임에 직접 그려짐
+        """
+        return self.detect_batch([frame], [roi], imgsz, [annotate])[0]
+
+    def detect_batch(self, frames: List[Any],
+                     rois: Optional[List[Optional[Tuple[int, int, int, int]]]] = None,
+                     imgsz: Optional[int] = None,
+                     annotate: Optional[List[bool]] = None) -> List[Tuple[Any, Any]]:
         """
-        if self.model is None:
-            return frame, None
+        여러 프레임을 한 번의 모델 호출로 탐지 (배치 추론)
+        
+        각 프레임은 원본 해상도에서 ROI를 크롭한 뒤 종횡비를 유지하는 레터박스로
+        한 번만 리사이즈되며, 결과 박스는 캐시된 변환으로 원본 프레임 좌표에 매핑된다.
+        
+        Args:
+            frames: 입력 프레임 리스트
+            rois: 프레임별 (x, y, w, h) 관심 영역 리스트 (None이면 전체 프레임)
+            imgsz: 이번 호출에만 적용할 모델 입력 크기 (None이면 self.imgsz)
+            annotate: 프레임별 오버레이 여부 리스트 (None이면 모두 그림)
             
+        Returns:
+            프레임별 (annotated_frame, [DetectionResult]) 리스트
+        """
+        if rois is None:
+            rois = [None] * len(frames)
+        if annotate is None:
+            annotate = [True] * len(frames)
+
+        if self.backend is None or not frames:
+            return [(frame, None) for frame in frames]
+
         try:
-            if roi:
-                x, y, w, h = roi
-                h_frame, w_frame = frame.shape[:2]
-                x = max(0, min(int(x), w_frame - 1))
-                y = max(0, min(int(y), h_frame - 1))
-                w = max(1, min(int(w), w_frame - x))
-                h = max(1, min(int(h), h_frame - y))
-                
-                crop = frame[y:y+h, x:x+w]
-                results = self.model(
-                    crop, 
-                    imgsz=self.imgsz, 
-                    conf=self.conf,
-                    verbose=False,
-                    device='cpu',
-                    half=False,
-                    max_det=100,
-                    agnostic_nms=True,
-                    augment=False
-                )
-                
-                try:
-                    annotated_crop = results[0].plot()
-                except Exception:
-                    annotated_crop = crop
-                    
-                annotated = frame.copy()
-                try:
-                    annotated[y:y+h, x:x+w] = annotated_crop
-                except Exception:
-                    annotated = frame
-            else:
-                # 나노모델 최적화: 더 공격적인 최적화 옵션
-                results = self.model(
-                    frame, 
-                    imgsz=self.imgsz, 
-                    conf=self.conf,
-                    verbose=False,
-                    device='cpu',
-                    half=False,
-                    max_det=100,    # 최대 탐지 수 제한
-                    agnostic_nms=True,  # 클래스 무관 NMS (더 빠름)
-                    augment=False   # 증강 비활성화 (속도 향상)
-                )
-                annotated = results[0].plot()
-                
-            return annotated, results
-            
+            size = imgsz or self.imgsz
+            transforms = [self.letterboxer.get(frame, roi, size) for frame, roi in zip(frames, rois)]
+            sources = [t.apply(frame) for frame, t in zip(frames, transforms)]
+
+            # 입력이 이미 긴 변 = imgsz로 레터박스되어 있으므로 백엔드는 패딩만 맞춤
+            batch_results = self._predict(sources)
+
+            outputs = []
+            names = self.names
+            for frame, transform, (xyxy, conf, cls), draw in zip(frames, transforms, batch_results, annotate):
+                # 프레임별로 results 리스트 형태 유지 (results[0] 접근 호환)
+                result = DetectionResult(transform.to_original(xyxy), conf, cls, names, transform)
+                if draw:
+                    frame = self.renderer.render(frame, result)
+                outputs.append((frame, [result]))
+            return outputs
+
         except Exception as e:
             print(f"[VehicleDetector] 탐지 오류: {e}")
-            return frame, None
+            return [(frame, None) for frame in frames]
+
+    def warmup(self, imgsz: Optional[int] = None, runs: int = 1):
+        """
+        더미 프레임으로 추론을 미리 수행 (첫 탐지의 지연 초기화 비용 제거)
+        
+        Args:
+            imgsz: 워밍업할 입력 크기 (None이면 self.imgsz)
+            runs: 반복 횟수
+        """
+        size = imgsz or self.imgsz
+        # 카메라 영상과 같은 16:9 프레임 (레터박스 후 입력 형태가 실제와 같도록)
+        frame = np.full((size * 9 // 16, size, 3), 114, dtype=np.uint8)
+        for _ in range(max(1, runs)):
+            self.detect_batch([frame], imgsz=size, annotate=[False])
 
 
 class VehicleTracker:
-    """차량 추적 클래스 - 중복 저장 방지"""
+    """
+    차량 추적 클래스 - 중복 저장 방지
+    
+    추적 상태(위치, 속도, 공분산, 클래스, 마지막 관측 시각, ID)를 NumPy 배열로 보관하고,
+    추적마다 등속 칼만 필터로 현재 위치를 예측한 뒤 모든 추적-탐지 쌍의 거리 행렬을
+    한 번에 계산해 거리 순 그리디 방식으로 전역 할당한다. 탐지기를 N 프레임마다
+    실행하는 키프레임 모드에서는 사이 프레임에 predict()/predicted_result()로
+    예측 박스를 그린다.
+    
+    counting_line이 설정되면 새 추적이 아니라 추적이 계수선을 지정 방향으로 넘을 때
+    카운트한다 (추적당 한 번).
+    
+    24시간 운영을 위해 메모리는 살아 있는 추적 수에만 비례한다. DB 저장 여부는 추적별
+    플래그(_counted)로 보관되어 추적이 만료될 때 함께 제거되고, 추적 ID는 MAX_TRACK_ID에서
+    0으로 돌아간다 (동시에 살아 있는 추적 수보다 훨씬 크므로 ID가 겹치지 않음).
+    """
+    
+    # 추적 ID 상한 (DB INT 컬럼 범위)
+    MAX_TRACK_ID = 2 ** 31 - 1
+    
+    # 추적별 배열 속성 (만료 시 함께 필터링)
+    _ARRAYS = ('_ids', '_pos', '_vel', '_cov', '_stamp', '_size', '_model_cls',
+               '_anchor', '_counted', '_cls', '_conf', '_last_seen', '_first_seen')
     
-    def __init__(self, track_ttl: float = 3.0, match_threshold: float = 100.0):
+    def __init__(self, track_ttl: float = 3.0, match_threshold: float = 100.0,
+                 process_noise: float = 200.0, measurement_noise: float = 10.0,
+                 initial_velocity_std: float = 300.0, counting_line: Optional[CountingLine] = None):
         """
         Args:
             track_ttl: 추적 유지 시간(초) - 객체가 이 시간동안 사라지면 추적 종료
-            match_threshold: 같은 객체로 판단하는 거리 임계값(픽셀)
+            match_threshold: 같은 객체로 판단하는 거리 임계값(픽셀, 예측 위치 기준)
+            process_noise: 가속도 표준편차(픽셀/초²) - 클수록 속도 변화를 빨리 따라감
+            measurement_noise: 탐지 중심점 표준편차(픽셀)
+            initial_velocity_std: 새 추적의 속도 표준편차(픽셀/초)
+            counting_line: 계수선 (None이면 새 추적 생성 시 카운트)
         """
         self.track_ttl = track_ttl
         self.match_threshold = match_threshold
-        self.tracks = []  # 현재 추적 중인 객체들
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.initial_velocity_std = initial_velocity_std
+        self.counting_line = counting_line
         self.count = 0  # 총 발견한 객체 수
         self.counts = {}  # 클래스별 카운트
-        self.next_track_id = 0  # 다음 추적 ID
-        self.saved_track_ids = set()  # DB에 이미 저장된 추적 ID들
+        self.next_track_id = 0  # 다음 추적 ID (MAX_TRACK_ID 이후 0부터 다시 사용)
+        self.tracks_created = 0  # 누적 생성 추적 수 (통계)
+        self._clock = None  # 마지막 update()/hold() 시각
+        self._reset_arrays()
     
-    def update(self, detections: List[Tuple[float, float, str, float, Dict]]) -> Tuple[Dict[str, int], List[Dict]]:
+    def _reset_arrays(self):
+        """추적 상태 배열 초기화"""
+        self._ids = np.empty(0, dtype=np.int32)
+        self._pos = np.empty((0, 2), dtype=np.float64)
+        self._vel = np.empty((0, 2), dtype=np.float64)  # 픽셀/초
+        self._cov = np.empty((0, 4, 4), dtype=np.float64)  # (x, y, vx, vy) 공분산
+        self._stamp = np.empty(0, dtype=np.float64)  # 상태가 예측된 시각
+        self._size = np.empty((0, 2), dtype=np.float64)  # 정규화 박스 크기 (w, h)
+        self._model_cls = np.empty(0, dtype=np.int32)  # 모델 클래스 ID (예측 박스 표시용)
+        self._anchor = np.empty((0, 2), dtype=np.float64)  # 마지막 관측 위치 (계수선 통과 판정)
+        self._counted = np.empty(0, dtype=bool)  # 이미 카운트(DB 저장)한 추적
+        self._cls = np.empty(0, dtype=np.int8)  # 표준 차종 코드 (VEHICLE_TYPES 인덱스)
+        self._conf = np.empty(0, dtype=np.float64)
+        self._last_seen = np.empty(0, dtype=np.float64)
+        self._first_seen = np.empty(0, dtype=np.float64)
+    
+    @property
+    def tracks(self) -> List[Dict]:
+        """현재 추적 중인 객체들 (조회용 딕셔너리 리스트)"""
+        return [
+            {
+                'track_id': int(self._ids[i]),
+                'pos': (float(self._pos[i, 0]), float(self._pos[i, 1])),
+                'velocity': (float(self._vel[i, 0]), float(self._vel[i, 1])),
+                'class_name': VEHICLE_TYPES[self._cls[i]],
+                'confidence': float(self._conf[i]),
+                'last_seen': float(self._last_seen[i]),
+                'first_seen': float(self._first_seen[i]),
+            }
+            for i in range(len(self._ids))
+        ]
+    
+    @property
+    def saved_track_ids(self) -> set:
+        """DB에 저장된 추적 ID (살아 있는 추적만)"""
+        return set(self._ids[self._counted].tolist())
+    
+    def memory_stats(self) -> Dict[str, int]:
+        """
+        추적기 메모리 사용량 (장시간 운영 모니터링용)
+        
+        Returns:
+            {'tracks', 'array_bytes', 'next_track_id', 'tracks_created'}
+        """
+        return {
+            'tracks': int(len(self._ids)),
+            'array_bytes': int(sum(getattr(self, name).nbytes for name in self._ARRAYS)),
+            'next_track_id': self.next_track_id,
+            'tracks_created': self.tracks_created,
+        }
+    
+    def _expire(self, now: float):
+        """만료된 추적 제거 (track_ttl 이상 안 보인 객체)"""
+        alive = (now - self._last_seen) < self.track_ttl
+        if alive.all():
+            return
+        for name in self._ARRAYS:
+            setattr(self, name, getattr(self, name)[alive])
+    
+    def predict(self, now: Optional[float] = None):
+        """
+        모든 추적을 등속 모델로 now 시각까지 전파 (칼만 예측 단계)
+        
+        Args:
+            now: 현재 시각(초) - None이면 현재 시각
+        """
+        now = time.time() if now is None else now
+        if len(self._ids) == 0:
+            return
+        dt = np.maximum(now - self._stamp, 0.0)
+        if not dt.any():
+            return
+        
+        self._pos += self._vel * dt[:, None]
+        
+        # P = F P F^T + Q (추적마다 dt가 다름)
+        F = np.tile(np.eye(4), (len(dt), 1, 1))
+        F[:, 0, 2] = dt
+        F[:, 1, 3] = dt
+        q = self.process_noise ** 2
+        dt2, dt3, dt4 = dt ** 2, dt ** 3, dt ** 4
+        Q = np.zeros_like(self._cov)
+        Q[:, [0, 1], [0, 1]] = (q * dt4 / 4)[:, None]
+        Q[:, [0, 1], [2, 3]] = (q * dt3 / 2)[:, None]
+        Q[:, [2, 3], [0, 1]] = (q * dt3 / 2)[:, None]
+        Q[:, [2, 3], [2, 3]] = (q * dt2)[:, None]
+        self._cov = F @ self._cov @ F.transpose(0, 2, 1) + Q
+        self._stamp = np.maximum(self._stamp, now)
+    
+    def _correct(self, trk: np.ndarray, measured: np.ndarray):
+        """매칭된 추적의 칼만 보정 단계 (관측: 중심점 위치)"""
+        P = self._cov[trk]
+        S = P[:, :2, :2] + np.eye(2) * self.measurement_noise ** 2
+        K = P[:, :, :2] @ np.linalg.inv(S)  # (M, 4, 2)
+        innovation = measured - self._pos[trk]
+        correction = np.einsum('mij,mj->mi', K, innovation)
+        self._pos[trk] += correction[:, :2]
+        self._vel[trk] += correction[:, 2:]
+        self._cov[trk] = P - K @ P[:, :2, :]
+    
+    def predicted_result(self, frame_size: Tuple[int, int], names: Dict[int, str],
+                         max_age: Optional[float] = None) -> 'DetectionResult':
+        """
+        현재 예측 위치의 박스 (키프레임 사이 프레임 표시용, 원본 프레임 좌표)
+        
+        Args:
+            frame_size: 원본 프레임 (width, height)
+            names: 모델 클래스 ID -> 클래스명
+            max_age: 마지막 관측 후 이 시간(초)이 지난 추적은 제외 (None이면 모두)
+        """
+        keep = slice(None)
+        if max_age is not None:
+            keep = (self._stamp - self._last_seen) <= max_age
+        pos, size = self._pos[keep], self._size[keep]
+        
+        w_frame, h_frame = frame_size
+        half = size * np.array([w_frame, h_frame], dtype=np.float64) / 2.0
+        xyxy = np.concatenate([pos - half, pos + half], axis=1).astype(np.float32)
+        xyxy[:, [0, 2]] = np.clip(xyxy[:, [0, 2]], 0, w_frame)
+        xyxy[:, [1, 3]] = np.clip(xyxy[:, [1, 3]], 0, h_frame)
+        return DetectionResult(xyxy, self._conf[keep].astype(np.float32), self._model_cls[keep], names)
+    
+    def hold(self, now: Optional[float] = None,
+             outside: Optional[Tuple[int, int, int, int]] = None,
+             within: Optional[Tuple[int, int, int, int]] = None):
+        """
+        추론을 생략한 시간만큼 추적 시계를 멈춤 (모션 게이트로 건너뛴 프레임)
+        
+        움직임이 없는 동안에는 객체가 제자리에 멈춰 있다고 보고 마지막 관측 시각을 경과
+        시간만큼 미루고 속도를 0으로 둔다. 따라서 track_ttl은 실제로 관측한 시간
+        기준으로 적용된다.
+        
+        Args:
+            now: 현재 시각(초) - None이면 현재 시각
+            outside: (x, y, w, h) - 지정하면 이 영역 밖의 추적만 유지 (영역만 탐지하는 경우)
+            within: (x, y, w, h) - 지정하면 이 영역(게이트가 감시한 ROI) 안의 추적만 유지
+        """
+        now = time.time() if now is None else now
+        elapsed = 0.0 if self._clock is None else max(0.0, now - self._clock)
+        self._clock = now
+        if elapsed == 0.0 or len(self._ids) == 0:
+            return
+        
+        px, py = self._pos[:, 0], self._pos[:, 1]
+        held = np.ones(len(self._ids), dtype=bool)
+        if outside is not None:
+            x, y, w, h = outside
+            held &= (px < x) | (px > x + w) | (py < y) | (py > y + h)
+        if within is not None:
+            x, y, w, h = within
+            held &= (px >= x) & (px <= x + w) & (py >= y) & (py <= y + h)
+        self._last_seen[held] += elapsed
+        self._stamp[held] = now
+        self._vel[held] = 0.0
+    
+    def _match(self, det_pos: np.ndarray, det_cls: np.ndarray) -> np.ndarray:
+        """
+        탐지-추적 전역 할당 (거리 순 그리디)
+        
+        Returns:
+            탐지별 매칭된 추적 인덱스 배열 (매칭 실패 시 -1)
+        """
+        matches = np.full(len(det_pos), -1, dtype=np.int64)
+        if len(self._ids) == 0:
+            return matches
+        
+        # (탐지 수 x 추적 수) 거리 행렬을 한 번에 계산
+        diff = det_pos[:, None, :] - self._pos[None, :, :]
+        dist = np.hypot(diff[..., 0], diff[..., 1])
+        
+        # 같은 클래스이고 임계값 이내인 쌍만 후보
+        valid = (det_cls[:, None] == self._cls[None, :]) & (dist < self.match_threshold)
+        det_idx, trk_idx = np.nonzero(valid)
+        if det_idx.size == 0:
+            return matches
+        
+        order = np.argsort(dist[det_idx, trk_idx], kind='stable')
+        track_used = np.zeros(len(self._ids), dtype=bool)
+        for k in order:
+            d = det_idx[k]
+            t = trk_idx[k]
+            if matches[d] >= 0 or track_used[t]:
+                continue
+            matches[d] = t
+            track_used[t] = True
+        
+        return matches
+    
+    def _emit(self, batch: DetectionBatch, index: np.ndarray, track_ids: np.ndarray,
+              direction: Optional[np.ndarray] = None) -> DetectionBatch:
+        """
+        카운트 증가 및 DB 저장용 배치 생성 (호출 측이 _counted로 추적당 한 번만 호출)
+        
+        Args:
+            batch: 이번 프레임의 탐지 배치
+            index: 카운트할 탐지의 배치 내 인덱스
+            track_ids: 각 탐지의 추적 ID
+            direction: 계수선 통과 방향 (1/-1, 계수선 모드)
+        
+        Returns:
+            카운트된 행만 담은 DetectionBatch (track_id/direction 채움)
+        """
+        counted = batch.take(index)
+        counted.track_id = track_ids.astype(np.int32)
+        if direction is not None:
+            counted.direction = direction.astype(np.int8)
+        
+        # 카운트 업데이트
+        for class_name, n in counted.type_counts().items():
+            self.counts[class_name] = self.counts.get(class_name, 0) + n
+        self.count += len(counted)
+        return counted
+    
+    def update(self, detections, now: Optional[float] = None) -> Tuple[Dict[str, int], DetectionBatch]:
         """
         탐지 결과로 추적 업데이트 및 새로운 객체만 반환
         
         Args:
-            detections: [(x, y, class_name, confidence, bbox_data), ...] 형태의 탐지 결과
+            detections: DetectionBatch (extract_tracker_detections 결과) 또는
+                [(x, y, 표준 차종, confidence, bbox_data), ...] 형태의 탐지 결과
+            now: 관측 시각(초) - 보관 영상 분석 시 영상 내 시각, None이면 현재 시각
             
         Returns:
-            (클래스별 카운트 딕셔너리, 새로 발견된 객체 리스트)
+            (클래스별 카운트 딕셔너리, 새로 카운트된 객체 배치)
         """
-        now = time.time()
-        new_detections = []  # DB에 저장할 새로운 객체들
+        now = time.time() if now is None else now
+        self._clock = now
+        new_detections = []  # DB에 저장할 새로운 객체 배치들
         
-        # 만료된 추적 제거 (3초 이상 안 보인 객체)
-        self.tracks = [t for t in self.tracks if now - t['last_seen'] < self.track_ttl]
+        self._expire(now)
+        # 예측 위치로 매칭 (관측 간격이 길어도 이동한 차량을 놓치지 않음)
+        self.predict(now)
         
-        # 각 탐지 결과에 대해 처리
-        for detection_data in detections:
-            cx, cy, class_name, confidence, bbox_data = detection_data
-            matched = False
-            matched_track = None
-            
-            # 기존 추적과 매칭 시도 (가장 가까운 객체 찾기)
-            min_dist = float('inf')
-            for track in self.tracks:
-                # 같은 클래스만 매칭
-                if track['class_name'] != class_name:
-                    continue
-                    
-                dx = track['pos'][0] - cx
-                dy = track['pos'][1] - cy
-                dist = math.hypot(dx, dy)
-                
-                if dist < self.match_threshold and dist < min_dist:
-                    min_dist = dist
-                    matched_track = track
-                    matched = True
-            
-            # 기존 추적과 매칭된 경우 - 위치만 업데이트
-            if matched and matched_track:
-                matched_track['pos'] = (cx, cy)
-                matched_track['last_seen'] = now
-                matched_track['confidence'] = max(matched_track.get('confidence', 0), confidence)
+        if not isinstance(detections, DetectionBatch):
+            detections = DetectionBatch.from_tuples(detections)
+        if not len(detections):
+            return dict(self.counts), DetectionBatch.empty()
+        
+        det_pos = detections.centers
+        det_cls = detections.type_code
+        det_conf = detections.conf
+        det_size = detections.boxes[:, 2:]
+        det_model_cls = detections.model_cls
+        
+        matches = self._match(det_pos, det_cls)
+        line = self.counting_line
+        
+        # 기존 추적과 매칭된 경우 - 칼만 보정
+        matched = matches >= 0
+        if matched.any():
+            trk = matches[matched]
+            self._correct(trk, det_pos[matched])
+            self._size[trk] = det_size[matched]
+            self._last_seen[trk] = now
+            self._conf[trk] = np.maximum(self._conf[trk], det_conf[matched])
             
-            # 새로운 추적 생성 - 처음 보는 객체
-            else:
-                track_id = self.next_track_id
-                self.next_track_id += 1
-                
-                new_track = {
-                    'track_id': track_id,
-                    'pos': (cx, cy),
-                    'class_name': class_name,
-                    'confidence': confidence,
-                    'last_seen': now,
-                    'first_seen': now,
-                    'bbox_data': bbox_data
-                }
-                self.tracks.append(new_track)
-                
-                # 카운트 업데이트
-                self.counts[class_name] = self.counts.get(class_name, 0) + 1
-                self.count += 1
-                
-                # DB에 저장할 새로운 객체로 추가 (한 번만 저장)
-                if track_id not in self.saved_track_ids:
-                    detection_record = {
-                        'vehicle_type': bbox_data['vehicle_type'],
-                        'vehicle_class': bbox_data['vehicle_class'],
-                        'confidence': confidence,
-                        'bbox_x': bbox_data['bbox_x'],
-                        'bbox_y': bbox_data['bbox_y'],
-                        'bbox_width': bbox_data['bbox_width'],
-                        'bbox_height': bbox_data['bbox_height'],
-                        'track_id': track_id  # 추적 ID 추가
-                    }
-                    new_detections.append(detection_record)
-                    self.saved_track_ids.add(track_id)
-        
-        return dict(self.counts), new_detections
+            # 계수선 모드: 마지막 관측 위치 -> 현재 위치가 선을 지정 방향으로 넘으면 카운트
+            if line is not None:
+                crossing = line.crossings(self._anchor[trk], self._pos[trk])
+                hit = line.counts(crossing) & ~self._counted[trk]
+                if hit.any():
+                    new_detections.append(self._emit(
+                        detections, np.flatnonzero(matched)[hit], self._ids[trk[hit]], crossing[hit]))
+                    self._counted[trk[hit]] = True
+            self._anchor[trk] = self._pos[trk]
+        
+        # 새로운 추적 생성 - 처음 보는 객체
+        new_idx = np.flatnonzero(~matched)
+        if new_idx.size == 0:
+            return dict(self.counts), DetectionBatch.concat(new_detections)
+        
+        new_ids = ((self.next_track_id + np.arange(new_idx.size, dtype=np.int64))
+                   % (self.MAX_TRACK_ID + 1)).astype(np.int32)
+        self.next_track_id = (self.next_track_id + int(new_idx.size)) % (self.MAX_TRACK_ID + 1)
+        self.tracks_created += int(new_idx.size)
+        
+        self._ids = np.concatenate([self._ids, new_ids])
+        self._pos = np.concatenate([self._pos, det_pos[new_idx]])
+        self._vel = np.concatenate([self._vel, np.zeros((new_idx.size, 2))])
+        cov = np.diag([self.measurement_noise ** 2] * 2 + [self.initial_velocity_std ** 2] * 2)
+        self._cov = np.concatenate([self._cov, np.tile(cov, (new_idx.size, 1, 1))])
+        self._stamp = np.concatenate([self._stamp, np.full(new_idx.size, now)])
+        self._size = np.concatenate([self._size, det_size[new_idx]])
+        self._model_cls = np.concatenate([self._model_cls, det_model_cls[new_idx]])
+        self._anchor = np.concatenate([self._anchor, det_pos[new_idx]])
+        # 계수선 모드에서는 선을 넘을 때까지 카운트하지 않음
+        self._counted = np.concatenate([self._counted, np.full(new_idx.size, line is None)])
+        self._cls = np.concatenate([self._cls, det_cls[new_idx]])
+        self._conf = np.concatenate([self._conf, det_conf[new_idx]])
+        self._last_seen = np.concatenate([self._last_seen, np.full(new_idx.size, now)])
+        self._first_seen = np.concatenate([self._first_seen, np.full(new_idx.size, now)])
+        
+        if line is None:
+            new_detections.append(self._emit(detections, new_idx, new_ids))
+        
+        return dict(self.counts), DetectionBatch.concat(new_detections)
     
     def reset(self):
         """추적 상태 리셋"""
-        self.tracks.clear()
+        self._reset_arrays()
         self.count = 0
         self.counts.clear()
         self.next_track_id = 0
-        self.saved_track_ids.clear()
\ No newline at end of file
+        self.tracks_created = 0
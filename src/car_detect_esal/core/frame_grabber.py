@@ -0,0 +1,213 @@
+"""
+비디오 소스 캡처 스레드와 최신 프레임 링 버퍼
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+
+class FrameRingBuffer:
+    """
+    고정 크기 프레임 링 버퍼
+
+    가득 찬 상태에서 새 프레임이 들어오면 가장 오래된 프레임을 버린다.
+    실시간 소스의 소비자는 get_latest로 가장 최신 프레임만 가져가고(오래된 프레임 폐기),
+    파일 소스의 소비자는 get으로 모든 프레임을 순서대로 가져간다.
+    """
+
+    def __init__(self, capacity: int = 2):
+        self.capacity = max(1, capacity)
+        self._frames = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # 통계
+        self.frames_in = 0
+        self.frames_out = 0
+        self.dropped = 0  # 버퍼가 가득 차서 버려진 프레임
+        self.skipped = 0  # 더 최신 프레임이 있어서 건너뛴 프레임
+        self.last_staleness = 0.0  # 마지막으로 꺼낸 프레임의 지연(초)
+        self.max_staleness = 0.0
+
+    def put(self, frame: Any, block: bool = False, timeout: Optional[float] = None) -> bool:
+        """
+        프레임 추가
+
+        Args:
+            frame: 캡처된 프레임
+            block: True면 공간이 날 때까지 대기 (파일 소스용), False면 가장 오래된 프레임 폐기
+            timeout: block 모드의 최대 대기 시간(초)
+
+        Returns:
+            프레임이 버퍼에 들어갔으면 True
+        """
+        with self._cond:
+            if block:
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while not self._closed and len(self._frames) >= self.capacity:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+            if self._closed:
+                return False
+
+            while len(self._frames) >= self.capacity:
+                self._frames.popleft()
+                self.dropped += 1
+
+            self._frames.append((frame, time.monotonic()))
+            self.frames_in += 1
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        """
+        가장 오래된 프레임을 꺼냄 (FIFO - 프레임을 건너뛰지 않음)
+
+        Returns:
+            (frame, captured_at) 또는 시간 초과/종료 시 None
+        """
+        with self._cond:
+            if not self._frames and not self._closed:
+                self._cond.wait(timeout)
+            if not self._frames:
+                return None
+
+            frame, captured_at = self._frames.popleft()
+            self.frames_out += 1
+            self._cond.notify_all()
+
+        self._record_staleness(captured_at)
+        return frame, captured_at
+
+    def get_latest(self, timeout: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        """
+        가장 최신 프레임을 꺼냄 (더 오래된 프레임은 폐기)
+
+        Returns:
+            (frame, captured_at) 또는 시간 초과/종료 시 None
+        """
+        with self._cond:
+            if not self._frames and not self._closed:
+                self._cond.wait(timeout)
+            if not self._frames:
+                return None
+
+            frame, captured_at = self._frames.pop()
+            self.skipped += len(self._frames)
+            self._frames.clear()
+            self.frames_out += 1
+            self._cond.notify_all()
+
+        self._record_staleness(captured_at)
+        return frame, captured_at
+
+    def _record_staleness(self, captured_at: float):
+        staleness = time.monotonic() - captured_at
+        self.last_staleness = staleness
+        self.max_staleness = max(self.max_staleness, staleness)
+
+    def close(self):
+        """버퍼 종료 - 대기 중인 생산자/소비자를 깨움"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """버퍼 통계 반환"""
+        return {
+            'frames_in': self.frames_in,
+            'frames_out': self.frames_out,
+            'dropped': self.dropped,
+            'skipped': self.skipped,
+            'last_staleness': self.last_staleness,
+            'max_staleness': self.max_staleness,
+        }
+
+
+class FrameGrabber(threading.Thread):
+    """
+    소스별 캡처 스레드
+
+    디코딩을 추론 루프와 분리하여 RTSP/HLS 같은 실시간 소스에서 OpenCV 내부
+    버퍼에 오래된 프레임이 쌓이지 않도록 계속 읽어 링 버퍼에 넣는다.
+    파일 소스는 프레임을 버리지 않고 소비 속도에 맞춰 읽는다 (끝나면 처음부터 반복).
+    """
+
+    def __init__(self, source: str, buffer_size: int = 2, reconnect_delay: float = 1.0):
+        super().__init__(name=f"FrameGrabber-{source}", daemon=True)
+        self.source = source
+        self.buffer = FrameRingBuffer(buffer_size)
+        self.reconnect_delay = reconnect_delay
+        self.is_file = os.path.isfile(str(source))
+        self.frame_size = None  # (width, height)
+        self._running = True
+        self._opened = threading.Event()
+        self._open_failed = False
+
+    def wait_opened(self, timeout: float = 10.0) -> bool:
+        """소스 열기 완료까지 대기 - 성공하면 True"""
+        self._opened.wait(timeout)
+        return self._opened.is_set() and not self._open_failed
+
+    def read(self, timeout: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        """
+        소비자용 프레임 읽기
+
+        파일 소스는 모든 프레임을 순서대로(FIFO), 실시간 소스는 최신 프레임만 반환한다.
+        """
+        if self.is_file:
+            return self.buffer.get(timeout)
+        return self.buffer.get_latest(timeout)
+
+    def stop(self):
+        """캡처 중지"""
+        self._running = False
+        self.buffer.close()
+
+    def run(self):
+        """캡처 루프"""
+        import cv2
+
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            self._open_failed = True
+            self._opened.set()
+            self.buffer.close()
+            return
+
+        if not self.is_file:
+            # 드라이버 버퍼 최소화 (지원되는 백엔드에서만 적용됨)
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self._opened.set()
+
+        try:
+            while self._running:
+                ret, frame = cap.read()
+                if not ret:
+                    if self.is_file:
+                        # 비디오 파일의 끝에 도달했을 때 처음부터 다시 시작
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        continue
+                    # 실시간 소스 끊김 - 재연결 시도
+                    cap.release()
+                    time.sleep(self.reconnect_delay)
+                    cap = cv2.VideoCapture(self.source)
+                    continue
+
+                if self.frame_size is None:
+                    self.frame_size = (frame.shape[1], frame.shape[0])
+
+                if self.is_file:
+                    # 파일은 프레임을 버리지 않고 소비자를 기다림
+                    while self._running and not self.buffer.put(frame, block=True, timeout=0.5):
+                        pass
+                else:
+                    self.buffer.put(frame)
+        finally:
+            cap.release()
+            self.buffer.close()
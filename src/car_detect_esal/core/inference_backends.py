@@ -0,0 +1,373 @@
+"""
+교체 가능한 추론 백엔드 (PyTorch / TorchScript / ONNX Runtime / OpenVINO)
+
+모든 백엔드는 레터박스된 BGR 이미지 리스트를 받아 같은 전처리(배치 패딩, RGB,
+NCHW float32)와 같은 후처리(NMS)를 거쳐 입력 이미지 좌표의 (xyxy, conf, cls)를
+반환한다. PyTorch 이외의 형식은 weights/best.pt를 처음 사용할 때 한 번만 내보내고
+(export) 원본 가중치가 바뀌기 전까지 캐시된 파일을 재사용한다.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 백엔드 이름 -> ultralytics export 형식
+EXPORT_FORMATS = {
+    'torchscript': 'torchscript',
+    'onnxruntime': 'onnx',
+    'openvino': 'openvino',
+}
+
+# 요청한 백엔드를 쓸 수 없을 때 시도할 순서 (CPU 추론 속도 순)
+BACKEND_FALLBACK_ORDER = ['openvino', 'onnxruntime', 'torchscript', 'pytorch']
+
+
+def non_max_suppression(pred: np.ndarray, conf_thres: float = 0.25, iou_thres: float = 0.7,
+                        max_det: int = 100, agnostic: bool = False,
+                        max_candidates: int = 30000) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    단일 이미지 YOLOv8 출력 후처리
+
+    Args:
+        pred: (4 + 클래스 수, 앵커 수) 배열 - (cx, cy, w, h, 클래스별 점수)
+        conf_thres: 최소 신뢰도
+        iou_thres: 같은 객체로 보고 제거할 IoU 임계값
+        max_det: 최대 탐지 수
+        agnostic: True면 클래스와 무관하게 NMS 수행
+        max_candidates: NMS에 넣을 최대 후보 수
+
+    Returns:
+        (xyxy (N, 4) float32, conf (N,) float32, cls (N,) int32) - 신뢰도 내림차순
+    """
+    pred = np.asarray(pred, dtype=np.float32)
+    scores = pred[4:]
+    cls = scores.argmax(axis=0)
+    conf = scores[cls, np.arange(scores.shape[1])]
+
+    keep = conf > conf_thres
+    if not keep.any():
+        return np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int32)
+
+    cx, cy, w, h = pred[:4, keep]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    conf = conf[keep]
+    cls = cls[keep].astype(np.int32)
+
+    order = np.argsort(-conf, kind='stable')[:max_candidates]
+
+    # 클래스별 NMS는 클래스마다 좌표를 멀리 떨어뜨려 한 번에 처리
+    nms_boxes = boxes if agnostic else boxes + (cls[:, None] * 4096.0)
+    x1, y1, x2, y2 = nms_boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+
+    selected = []
+    while order.size and len(selected) < max_det:
+        i = order[0]
+        selected.append(i)
+        rest = order[1:]
+        inter_w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        inter_h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = inter_w * inter_h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-7)
+        order = rest[iou <= iou_thres]
+
+    selected = np.asarray(selected, dtype=np.int64)
+    return boxes[selected], conf[selected], cls[selected]
+
+
+def _exported_path(weights: Path, fmt: str) -> Path:
+    """ultralytics export 결과 경로"""
+    if fmt == 'openvino':
+        return weights.parent / f"{weights.stem}_openvino_model"
+    return weights.with_suffix('.onnx' if fmt == 'onnx' else f'.{fmt}')
+
+
+def export_model(weights_path: str, fmt: str, imgsz: int) -> Tuple[Path, Dict]:
+    """
+    가중치를 지정 형식으로 내보내고 캐시 (이미 내보낸 파일이 최신이면 재사용)
+
+    내보낸 파일 옆에 <파일>.meta.json (클래스명, 입력 크기, 원본 가중치 mtime/size)을
+    저장하므로, 내보낸 모델만 배포된 장비에서는 ultralytics 없이 로드할 수 있다.
+
+    Args:
+        weights_path: 원본 .pt 가중치 경로
+        fmt: 'torchscript', 'onnx', 'openvino'
+        imgsz: 내보낼 입력 크기 (고정 형식에서 최대 입력 크기)
+
+    Returns:
+        (내보낸 모델 경로, 메타데이터)
+    """
+    weights = Path(weights_path)
+    target = _exported_path(weights, fmt)
+    meta_path = Path(f"{target}.meta.json")
+    dynamic = fmt != 'torchscript'
+
+    source = None
+    if weights.exists():
+        stat = weights.stat()
+        source = {'source_mtime': stat.st_mtime, 'source_size': stat.st_size}
+
+    if target.exists() and meta_path.exists():
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            fresh = source is None or all(meta.get(k) == v for k, v in source.items())
+            if fresh and (dynamic or meta.get('imgsz') == imgsz):
+                return target, meta
+        except (OSError, ValueError):
+            pass
+
+    try:
+        from ultralytics import YOLO
+    except ImportError:
+        raise ImportError("ultralytics 패키지가 설치되어 있지 않습니다.")
+
+    print(f"[InferenceBackend] {weights.name} -> {fmt} 내보내기 (최초 1회)")
+    model = YOLO(str(weights))
+    exported = Path(model.export(format=fmt, imgsz=imgsz, dynamic=dynamic, half=False))
+
+    meta = {
+        'format': fmt,
+        'imgsz': imgsz,
+        'dynamic': dynamic,
+        'names': {str(k): v for k, v in model.names.items()},
+    }
+    meta.update(source or {})
+    with open(Path(f"{exported}.meta.json"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return exported, meta
+
+
+class InferenceBackend:
+    """
+    추론 백엔드 공통 인터페이스
+
+    하위 클래스는 load()와 forward()만 구현한다. forward()는 (B, 3, H, W) float32
+    RGB 배치를 받아 (B, 4 + 클래스 수, 앵커 수) YOLOv8 원시 출력을 반환한다.
+    """
+
+    name = ''
+    # True면 내보낸 입력 크기(정사각형)로만 추론 가능 (traced TorchScript)
+    fixed_shape = False
+
+    def __init__(self, weights_path: str, imgsz: int = 640, threads: int = 0):
+        """
+        Args:
+            weights_path: 원본 .pt 가중치 경로
+            imgsz: 최대 입력 크기 (내보내기 기준)
+            threads: CPU 추론 스레드 수 (0이면 런타임 기본값)
+        """
+        self.weights_path = weights_path
+        self.imgsz = imgsz
+        self.threads = threads
+        self.names: Dict[int, str] = {}
+
+    def load(self):
+        raise NotImplementedError
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def _set_names(self, names):
+        self.names = {int(k): v for k, v in dict(names).items()}
+
+    def prepare(self, sources: List[np.ndarray]) -> np.ndarray:
+        """
+        레터박스 이미지들을 (B, 3, H, W) float32 RGB 배치로 변환
+
+        크기가 다른 이미지는 오른쪽/아래쪽만 패딩하므로 박스 좌표가 변하지 않는다.
+        """
+        if self.fixed_shape:
+            height = width = self.imgsz
+        else:
+            height = max(s.shape[0] for s in sources)
+            width = max(s.shape[1] for s in sources)
+
+        batch = np.full((len(sources), height, width, 3), 114, dtype=np.uint8)
+        for i, source in enumerate(sources):
+            h, w = source.shape[:2]
+            batch[i, :h, :w] = source
+
+        # BGR -> RGB, NHWC -> NCHW, 0~1 정규화
+        batch = batch[..., ::-1].transpose(0, 3, 1, 2)
+        return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+    def predict(self, sources: List[np.ndarray], conf: float = 0.25, iou: float = 0.7,
+                max_det: int = 100, agnostic: bool = False) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        레터박스 이미지 배치 추론
+
+        Returns:
+            이미지별 (xyxy, conf, cls) - 입력 이미지 좌표
+        """
+        pred = self.forward(self.prepare(sources))
+        return [non_max_suppression(p, conf, iou, max_det, agnostic) for p in pred[:len(sources)]]
+
+
+class TorchBackend(InferenceBackend):
+    """PyTorch eager (ultralytics 모델의 nn.Module 직접 호출)"""
+
+    name = 'pytorch'
+
+    def load(self):
+        try:
+            import torch
+            from ultralytics import YOLO
+        except ImportError:
+            raise ImportError("ultralytics 패키지가 설치되어 있지 않습니다.")
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        yolo = YOLO(self.weights_path)
+        model = yolo.model.float().eval()
+        try:
+            model = model.fuse(verbose=False)
+        except Exception:
+            pass
+        self.model = model
+        self._torch = torch
+        self._set_names(yolo.names)
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        with self._torch.inference_mode():
+            out = self.model(self._torch.from_numpy(batch))
+        if isinstance(out, (list, tuple)):
+            out = out[0]
+        return out.cpu().numpy()
+
+
+class TorchScriptBackend(InferenceBackend):
+    """TorchScript (내보낸 입력 크기로 고정)"""
+
+    name = 'torchscript'
+    fixed_shape = True
+
+    def load(self):
+        import torch
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        path, meta = export_model(self.weights_path, EXPORT_FORMATS[self.name], self.imgsz)
+        self.model = torch.jit.load(str(path), map_location='cpu').eval()
+        self.imgsz = meta.get('imgsz', self.imgsz)
+        self._torch = torch
+        self._set_names(meta['names'])
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        with self._torch.inference_mode():
+            out = self.model(self._torch.from_numpy(batch))
+        if isinstance(out, (list, tuple)):
+            out = out[0]
+        return out.cpu().numpy()
+
+
+class ONNXRuntimeBackend(InferenceBackend):
+    """ONNX Runtime CPUExecutionProvider (동적 배치/입력 크기)"""
+
+    name = 'onnxruntime'
+
+    def __init__(self, weights_path: str, imgsz: int = 640, threads: int = 0,
+                 model_path: Optional[str] = None):
+        """
+        Args:
+            model_path: 이미 준비된 .onnx 경로 (None이면 weights_path를 내보내서 사용)
+        """
+        super().__init__(weights_path, imgsz, threads)
+        self.model_path = model_path
+
+    def load(self):
+        import onnxruntime as ort
+
+        if self.model_path:
+            path = Path(self.model_path)
+            with open(f"{path}.meta.json", 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        else:
+            path, meta = export_model(self.weights_path, EXPORT_FORMATS[self.name], self.imgsz)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        self.session = ort.InferenceSession(str(path), options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self._set_names(meta['names'])
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVINOBackend(InferenceBackend):
+    """OpenVINO CPU 플러그인 (지연 시간 우선 설정)"""
+
+    name = 'openvino'
+
+    def load(self):
+        import openvino as ov
+
+        path, meta = export_model(self.weights_path, EXPORT_FORMATS[self.name], self.imgsz)
+        xml = next(Path(path).glob('*.xml'))
+        config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if self.threads:
+            config['INFERENCE_NUM_THREADS'] = self.threads
+        core = ov.Core()
+        self.compiled = core.compile_model(core.read_model(str(xml)), 'CPU', config)
+        self.output = self.compiled.output(0)
+        self._set_names(meta['names'])
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        return self.compiled([batch])[self.output]
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    TorchScriptBackend.name: TorchScriptBackend,
+    ONNXRuntimeBackend.name: ONNXRuntimeBackend,
+    OpenVINOBackend.name: OpenVINOBackend,
+}
+
+
+def create_backend(name: str, weights_path: str, imgsz: int = 640, threads: int = 0,
+                   fallback: bool = True, model_path: Optional[str] = None) -> InferenceBackend:
+    """
+    백엔드 생성 및 로드
+
+    Args:
+        name: 'pytorch', 'torchscript', 'onnxruntime', 'openvino'
+        weights_path: 원본 .pt 가중치 경로
+        imgsz: 최대 입력 크기
+        threads: CPU 추론 스레드 수 (0이면 런타임 기본값)
+        fallback: 요청한 백엔드를 쓸 수 없으면 BACKEND_FALLBACK_ORDER의 다음 백엔드 시도
+        model_path: 미리 준비된 모델 파일 (예: INT8 .onnx) - onnxruntime 전용,
+            대체 백엔드는 원본 가중치를 사용
+
+    Raises:
+        ValueError: 알 수 없는 백엔드 이름 또는 model_path를 지원하지 않는 백엔드
+        ImportError/RuntimeError: 사용 가능한 백엔드가 없는 경우 마지막 오류
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"지원하지 않는 추론 백엔드: {name}")
+    if model_path and name != ONNXRuntimeBackend.name:
+        raise ValueError(f"{name} 백엔드는 model_path를 지원하지 않습니다")
+
+    candidates = [name]
+    if fallback:
+        start = BACKEND_FALLBACK_ORDER.index(name)
+        candidates += BACKEND_FALLBACK_ORDER[start + 1:]
+
+    last_error = None
+    for candidate in candidates:
+        if model_path and candidate == name:
+            backend = ONNXRuntimeBackend(weights_path, imgsz, threads, model_path=model_path)
+        else:
+            backend = BACKENDS[candidate](weights_path, imgsz, threads)
+        try:
+            backend.load()
+            if candidate != name:
+                print(f"[InferenceBackend] {name} 사용 불가 ({last_error}) -> {candidate} 사용")
+            return backend
+        except Exception as e:
+            last_error = e
+    raise last_error
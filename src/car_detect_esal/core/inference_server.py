@@ -0,0 +1,219 @@
+"""
+여러 스트림의 프레임을 모아 한 번에 추론하는 배치 추론 서버
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .detector import VehicleDetector
+
+
+class _InferenceRequest:
+    """제출자 하나의 대기 중인 추론 요청"""
+
+    __slots__ = ('client_id', 'camera_id', 'frame', 'roi', 'imgsz', 'annotate', 'submitted_at', 'event', 'result')
+
+    def __init__(self, client_id: str, camera_id: str, frame: Any,
+                 roi: Optional[Tuple[int, int, int, int]],
+                 imgsz: Optional[int] = None, annotate: bool = True):
+        self.client_id = client_id
+        self.camera_id = camera_id
+        self.frame = frame
+        self.roi = roi
+        self.imgsz = imgsz
+        self.annotate = annotate
+        self.submitted_at = time.monotonic()
+        self.event = threading.Event()
+        self.result = None
+
+
+class BatchInferenceServer:
+    """
+    모든 StreamWorker가 공유하는 중앙 추론 스케줄러
+
+    워커들이 제출한 프레임을 모아 max_wait 마감 시간 안에 하나의 배치로
+    VehicleDetector.detect_batch()를 호출하고, 결과를 카메라별로 돌려준다.
+
+    공정성 정책:
+        - 제출자(client_id)당 대기 슬롯은 하나뿐이며, 새 프레임이 오면 이전 프레임을 대체한다.
+          같은 camera_id를 쓰는 제출자가 여럿이어도 서로의 요청을 대체하지 않는다.
+        - 배치 크기를 넘는 요청이 있으면 가장 오래전에 처리된 카메라부터 선택한다.
+          따라서 빠른 스트림이 느린 스트림을 굶길 수 없다.
+    """
+
+    def __init__(self, detector: VehicleDetector, max_batch_size: int = 8, max_wait: float = 0.02):
+        """
+        Args:
+            detector: 공유 VehicleDetector
+            max_batch_size: 한 번의 모델 호출에 포함할 최대 프레임 수
+            max_wait: 첫 요청 도착 후 배치를 채우기 위해 기다리는 최대 시간(초)
+        """
+        self.detector = detector
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+
+        self._cond = threading.Condition()
+        self._pending: Dict[str, _InferenceRequest] = {}  # client_id -> 요청
+        self._last_served: Dict[str, float] = {}  # camera_id -> 마지막 처리 시각
+        self._thread = None
+        self._running = False
+
+        # 통계
+        self.batches_run = 0
+        self.frames_run = 0
+        self.frames_superseded = 0
+        self.last_batch_size = 0
+        self.last_batch_time = 0.0
+
+    def start(self):
+        """스케줄러 스레드 시작"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="BatchInferenceServer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """스케줄러 스레드 중지 (대기 중인 요청은 추론 없이 반환)"""
+        with self._cond:
+            self._running = False
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._cond.notify_all()
+
+        for request in pending:
+            request.result = (request.frame, None)
+            request.event.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def infer(self, camera_id: str, frame: Any, roi: Optional[Tuple[int, int, int, int]] = None,
+              imgsz: Optional[int] = None, timeout: float = 5.0,
+              annotate: bool = True, client_id: Optional[str] = None) -> Tuple[Any, Any]:
+        """
+        프레임을 제출하고 해당 제출자의 결과를 기다림
+
+        Args:
+            camera_id: 요청을 보낸 카메라 ID (공정성 정책 기준)
+            frame: 입력 프레임
+            roi: (x, y, w, h) 관심 영역
+            imgsz: 모델 입력 크기 (None이면 detector 기본값)
+            timeout: 결과 대기 최대 시간(초)
+            annotate: False면 오버레이를 그리지 않음
+            client_id: 대기 슬롯을 구분하는 제출자 토큰 (None이면 camera_id)
+
+        Returns:
+            (annotated_frame, results) - VehicleDetector.detect()와 동일
+        """
+        if not self._running:
+            return self.detector.detect(frame, roi, imgsz, annotate)
+
+        client_id = client_id or camera_id
+        request = _InferenceRequest(client_id, camera_id, frame, roi, imgsz, annotate)
+        with self._cond:
+            previous = self._pending.get(client_id)
+            self._pending[client_id] = request
+            self._cond.notify_all()
+
+        if previous is not None:
+            # 같은 제출자의 오래된 프레임은 추론하지 않고 돌려보냄
+            self.frames_superseded += 1
+            previous.result = (previous.frame, None)
+            previous.event.set()
+
+        if not request.event.wait(timeout):
+            with self._cond:
+                if self._pending.get(client_id) is request:
+                    del self._pending[client_id]
+            return frame, None
+
+        return request.result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """배치 추론 통계 반환"""
+        avg_batch = self.frames_run / self.batches_run if self.batches_run else 0.0
+        return {
+            'batches_run': self.batches_run,
+            'frames_run': self.frames_run,
+            'frames_superseded': self.frames_superseded,
+            'avg_batch_size': avg_batch,
+            'last_batch_size': self.last_batch_size,
+            'last_batch_time': self.last_batch_time,
+            'pending': len(self._pending),
+        }
+
+    def _collect_batch(self) -> List[_InferenceRequest]:
+        """마감 시간까지 요청을 모은 뒤 공정성 정책에 따라 배치 선택"""
+        with self._cond:
+            while self._running and not self._pending:
+                self._cond.wait(0.5)
+            if not self._running:
+                return []
+
+            # 가장 오래 기다린 요청 기준으로 마감 시간 계산
+            oldest = min(r.submitted_at for r in self._pending.values())
+            deadline = oldest + self.max_wait
+            while self._running and len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if not self._running:
+                return []
+
+            # 가장 오래전에 처리된 카메라 우선 (처음 보는 카메라가 최우선)
+            order = sorted(
+                self._pending.values(),
+                key=lambda r: (self._last_served.get(r.camera_id, 0.0), r.submitted_at)
+            )
+            batch = order[:self.max_batch_size]
+            for request in batch:
+                del self._pending[request.client_id]
+            return batch
+
+    def _run(self):
+        """스케줄러 메인 루프"""
+        while self._running:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            start = time.monotonic()
+
+            # 입력 크기가 다른 요청은 별도의 모델 호출로 나눔
+            groups: Dict[Optional[int], List[_InferenceRequest]] = {}
+            for request in batch:
+                groups.setdefault(request.imgsz, []).append(request)
+
+            for imgsz, requests in groups.items():
+                try:
+                    outputs = self.detector.detect_batch(
+                        [r.frame for r in requests],
+                        [r.roi for r in requests],
+                        imgsz,
+                        [r.annotate for r in requests]
+                    )
+                except Exception as e:
+                    print(f"[BatchInferenceServer] 배치 추론 오류: {e}")
+                    outputs = [(r.frame, None) for r in requests]
+
+                served_at = time.monotonic()
+                for request, output in zip(requests, outputs):
+                    self._last_served[request.camera_id] = served_at
+                    request.result = output
+                    request.event.set()
+
+            elapsed = time.monotonic() - start
+
+            self.batches_run += 1
+            self.frames_run += len(batch)
+            self.last_batch_size = len(batch)
+            self.last_batch_time = elapsed
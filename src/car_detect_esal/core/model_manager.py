@@ -0,0 +1,138 @@
+"""
+프로세스 전역 모델 캐시
+
+로드된 VehicleDetector를 (가중치 해시, 백엔드, 모델 변형, 입력 크기)로 캐시하여
+패널 추가나 프리셋 전환 시 가중치를 다시 읽지 않는다. 로드 직후 지정한 입력 크기들로
+워밍업 추론을 수행해 첫 detect() 호출의 지연(지연 초기화, 커널 선택 등)을 미리 치른다.
+로드는 호출한 스레드에서 수행되므로 GUI에서는 ModelLoader(QThread)를 통해 호출한다.
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from .detector import VehicleDetector
+
+# progress(퍼센트 0~100, 메시지)
+ProgressCallback = Callable[[int, str], None]
+
+
+def weights_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """가중치 파일 내용의 SHA-1 (파일이 없으면 경로 문자열의 해시)"""
+    digest = hashlib.sha1()
+    weights = Path(path)
+    if not weights.exists():
+        digest.update(str(weights.resolve()).encode())
+        return digest.hexdigest()
+    with open(weights, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelManager:
+    """
+    로드된 탐지 모델 캐시 (스레드 안전)
+
+    conf는 탐지기 인스턴스 속성이므로 캐시된 탐지기를 받을 때마다 요청한 값으로 갱신된다.
+    """
+
+    def __init__(self):
+        self._models: Dict[Tuple, VehicleDetector] = {}
+        # 파일 경로 -> (mtime, size, 해시) - 같은 파일을 매번 다시 해시하지 않음
+        self._hashes: Dict[str, Tuple[float, int, str]] = {}
+        self._lock = threading.Lock()
+        # 같은 모델을 동시에 두 번 로드하지 않도록 로드 전체를 직렬화
+        self._load_lock = threading.Lock()
+
+    def _hash(self, model_path: str) -> str:
+        path = Path(model_path)
+        stat = path.stat() if path.exists() else None
+        signature = (stat.st_mtime, stat.st_size) if stat else (0.0, 0)
+        with self._lock:
+            cached = self._hashes.get(str(path))
+        if cached and cached[:2] == signature:
+            return cached[2]
+        digest = weights_hash(model_path)
+        with self._lock:
+            self._hashes[str(path)] = signature + (digest,)
+        return digest
+
+    def key(self, model_path: str, backend: str = 'pytorch', imgsz: int = 640,
+            model_variant: Optional[str] = None) -> Tuple:
+        """캐시 키 (가중치 해시, 백엔드, 모델 변형, 입력 크기)"""
+        return (self._hash(model_path), backend, model_variant, imgsz)
+
+    def get(self, model_path: str, imgsz: int = 640, conf: float = 0.5, backend: str = 'pytorch',
+            threads: int = 0, model_variant: Optional[str] = None,
+            warmup_sizes: Iterable[int] = (), warmup_runs: int = 1,
+            progress: Optional[ProgressCallback] = None,
+            cancelled: Optional[Callable[[], bool]] = None) -> VehicleDetector:
+        """
+        캐시된 탐지기 반환 (없으면 로드 + 워밍업)
+
+        Args:
+            model_path: .pt 가중치 경로
+            imgsz: 최대 입력 크기 (내보내기 기준)
+            conf: 최소 신뢰도
+            backend: 추론 엔진
+            threads: CPU 추론 스레드 수
+            model_variant: 등록된 모델 변형 이름
+            warmup_sizes: 워밍업할 입력 크기들 (imgsz 이하만 수행)
+            warmup_runs: 크기별 워밍업 횟수
+            progress: 진행 상황 콜백 (로드한 스레드에서 호출됨)
+            cancelled: True를 반환하면 남은 워밍업을 생략 (종료 시 빠르게 반환)
+
+        Raises:
+            ImportError/RuntimeError: VehicleDetector 로드 실패
+        """
+        report = progress or (lambda percent, message: None)
+        report(0, "가중치 확인 중")
+        key = self.key(model_path, backend, imgsz, model_variant)
+
+        with self._load_lock:
+            detector = self._models.get(key)
+            if detector is None:
+                report(10, f"{Path(model_path).name} 로드 중 ({backend})")
+                detector = VehicleDetector(model_path, imgsz=imgsz, conf=conf, backend=backend,
+                                           threads=threads, model_variant=model_variant)
+
+                sizes = sorted({s for s in warmup_sizes if s <= imgsz})
+                for i, size in enumerate(sizes):
+                    if cancelled is not None and cancelled():
+                        print("[ModelManager] 워밍업 취소")
+                        break
+                    report(60 + 40 * i // len(sizes), f"워밍업 {size}px")
+                    detector.warmup(size, warmup_runs)
+
+                with self._lock:
+                    self._models[key] = detector
+            else:
+                print(f"[ModelManager] 캐시된 모델 사용: {Path(model_path).name} ({backend}, {imgsz})")
+
+        detector.conf = conf
+        report(100, "모델 준비 완료")
+        return detector
+
+    def cached_keys(self):
+        with self._lock:
+            return list(self._models)
+
+    def clear(self):
+        """캐시 비우기 (다른 곳에서 참조 중인 탐지기는 계속 사용 가능)"""
+        with self._lock:
+            self._models.clear()
+
+
+_default_manager: Optional[ModelManager] = None
+_default_lock = threading.Lock()
+
+
+def get_model_manager() -> ModelManager:
+    """프로세스 전역 ModelManager"""
+    global _default_manager
+    with _default_lock:
+        if _default_manager is None:
+            _default_manager = ModelManager()
+        return _default_manager
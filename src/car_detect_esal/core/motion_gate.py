@@ -0,0 +1,174 @@
+"""
+모션 게이트 - 움직임이 없거나 멈춘(frozen) 프레임의 추론 생략
+
+ROI를 작은 흑백 이미지로 축소해 이전 프레임과의 차이를 계산하고, 움직임이 있을 때만
+그 영역(bounding box)에 대해 탐지를 수행하도록 결정한다. NTIS 피드가 같은 이미지에서
+멈춘 경우는 축소 이미지의 해시로 감지한다. 움직임이 없어도 refresh_interval마다 한 번은
+전체 ROI를 탐지한다. 추론을 생략한 동안 추적기 시계는 VehicleTracker.hold()로 멈춘다.
+"""
+
+import time
+import zlib
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .preprocess import Letterboxer
+
+
+class GateDecision:
+    """게이트 판정 결과"""
+
+    __slots__ = ('run', 'reason', 'region', 'latency')
+
+    # reason 값
+    MOTION = 'motion'
+    REFRESH = 'refresh'
+    STATIC = 'static'
+    FROZEN = 'frozen'
+
+    def __init__(self, run: bool, reason: str, region: Optional[Tuple[int, int, int, int]] = None,
+                 latency: float = 0.0):
+        self.run = run
+        self.reason = reason
+        # 탐지할 (x, y, w, h) 영역 (원본 프레임 좌표), None이면 전체 ROI
+        self.region = region
+        self.latency = latency
+
+
+class MotionGate:
+    """
+    프레임 차분 기반 추론 게이트 (스트림당 하나)
+
+    차분은 이전 프레임과 비교하므로 한 번 멈췄다가 다시 움직이는 차량도 다음 프레임에서
+    바로 감지된다. 감지 영역은 grid 단위로 맞춰 LetterboxTransform 캐시가 재사용되게 한다.
+    """
+
+    def __init__(self, width: int = 160, diff_threshold: int = 25, min_motion_ratio: float = 0.002,
+                 refresh_interval: float = 2.0, margin: float = 0.15, full_frame_ratio: float = 0.5,
+                 grid: int = 32):
+        """
+        Args:
+            width: 차분 계산용 축소 폭(픽셀)
+            diff_threshold: 움직임으로 볼 밝기 차이 (0~255)
+            min_motion_ratio: 움직임 픽셀이 ROI에서 차지해야 하는 최소 비율
+            refresh_interval: 움직임이 없어도 전체 탐지를 수행하는 간격(초), 0이면 사용 안 함
+            margin: 움직임 영역 주변 여유 (영역 크기 대비 비율)
+            full_frame_ratio: 움직임 영역이 ROI 면적의 이 비율 이상이면 전체 ROI 탐지
+            grid: 영역 좌표 정렬 단위(원본 픽셀)
+        """
+        self.width = width
+        self.diff_threshold = diff_threshold
+        self.min_motion_ratio = min_motion_ratio
+        self.refresh_interval = refresh_interval
+        self.margin = margin
+        self.full_frame_ratio = full_frame_ratio
+        self.grid = grid
+
+        self._prev = None
+        self._prev_key = None
+        self._prev_hash = None
+        self._last_run = None
+        self._kernel = np.ones((3, 3), dtype=np.uint8)
+
+        # 통계
+        self.frames = 0
+        self.skipped = 0
+        self.frozen = 0
+        self.total_latency = 0.0
+
+    @property
+    def skip_ratio(self) -> float:
+        """추론을 생략한 프레임 비율"""
+        return self.skipped / self.frames if self.frames else 0.0
+
+    @property
+    def avg_latency_ms(self) -> float:
+        """프레임당 평균 게이트 처리 시간(ms)"""
+        return self.total_latency / self.frames * 1000.0 if self.frames else 0.0
+
+    def reset(self):
+        """기준 프레임 초기화 (ROI 변경 등) - 다음 프레임은 무조건 탐지"""
+        self._prev = None
+        self._prev_key = None
+        self._prev_hash = None
+        self._last_run = None
+
+    def check(self, frame, roi: Optional[Tuple[int, int, int, int]] = None,
+              now: Optional[float] = None) -> GateDecision:
+        """
+        이번 프레임의 추론 여부 판정
+
+        Args:
+            frame: BGR 프레임
+            roi: (x, y, w, h) 관심 영역 (원본 프레임 좌표)
+            now: 현재 시각(초) - None이면 time.monotonic()
+
+        Returns:
+            GateDecision
+        """
+        started = time.perf_counter()
+        now = time.monotonic() if now is None else now
+        decision = self._decide(frame, roi, now)
+
+        if decision.run:
+            self._last_run = now
+        else:
+            self.skipped += 1
+            if decision.reason == GateDecision.FROZEN:
+                self.frozen += 1
+        self.frames += 1
+        decision.latency = time.perf_counter() - started
+        self.total_latency += decision.latency
+        return decision
+
+    def _decide(self, frame, roi, now: float) -> GateDecision:
+        h_frame, w_frame = frame.shape[:2]
+        x, y, w, h = Letterboxer.clip_roi((w_frame, h_frame), roi)
+
+        # ROI를 축소한 흑백 이미지 (INTER_AREA가 센서 노이즈도 평균화)
+        scale = min(1.0, self.width / float(w))
+        small_size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+        small = cv2.resize(frame[y:y+h, x:x+w], small_size, interpolation=cv2.INTER_AREA)
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        key = (w_frame, h_frame, x, y, w, h)
+        frame_hash = zlib.crc32(small.tobytes())
+        prev, prev_hash = self._prev, self._prev_hash
+        same_view = self._prev_key == key
+        self._prev, self._prev_key, self._prev_hash = small, key, frame_hash
+
+        if not same_view or prev is None or self._last_run is None:
+            return GateDecision(True, GateDecision.REFRESH)
+
+        # 완전히 같은 이미지 = 멈춘 피드 (다시 탐지해도 결과가 같으므로 주기 탐지도 생략)
+        if frame_hash == prev_hash and np.array_equal(small, prev):
+            return GateDecision(False, GateDecision.FROZEN)
+
+        mask = cv2.absdiff(small, prev) > self.diff_threshold
+        motion_pixels = int(np.count_nonzero(mask))
+        if motion_pixels < self.min_motion_ratio * mask.size:
+            if self.refresh_interval and now - self._last_run >= self.refresh_interval:
+                return GateDecision(True, GateDecision.REFRESH)
+            return GateDecision(False, GateDecision.STATIC)
+
+        # 움직임 영역 (작은 이미지 좌표) -> 원본 프레임 좌표 + 여유
+        mask = cv2.dilate(mask.view(np.uint8), self._kernel)
+        mx, my, mw, mh = cv2.boundingRect(mask)
+        if mw * mh >= self.full_frame_ratio * mask.size:
+            return GateDecision(True, GateDecision.MOTION)
+
+        pad_x = mw * self.margin + 1
+        pad_y = mh * self.margin + 1
+        x1 = x + (mx - pad_x) / scale
+        y1 = y + (my - pad_y) / scale
+        x2 = x + (mx + mw + pad_x) / scale
+        y2 = y + (my + mh + pad_y) / scale
+
+        grid = self.grid
+        x1 = max(x, int(x1 // grid * grid))
+        y1 = max(y, int(y1 // grid * grid))
+        x2 = min(x + w, int(-(-x2 // grid) * grid))
+        y2 = min(y + h, int(-(-y2 // grid) * grid))
+        return GateDecision(True, GateDecision.MOTION, (x1, y1, x2 - x1, y2 - y1))
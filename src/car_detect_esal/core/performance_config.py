@@ -2,8 +2,26 @@
 성능 최적화 설정 관리
 """
 
+import time
+from collections import deque
+from typing import Optional
+
 class PerformanceConfig:
-    """성능 최적화를 위한 설정 클래스"""
+    """
+    성능 최적화를 위한 설정 클래스
+    
+    프리셋의 backend는 VehicleDetector의 추론 엔진이다 (inference_backends.py 참고).
+    설치되지 않은 엔진은 BACKEND_FALLBACK_ORDER에 따라 다른 엔진으로 대체된다.
+    onnxruntime/openvino는 선택 설치이므로 기본 프리셋(balanced)은 pytorch를 사용하고,
+    두 엔진은 설치한 경우에만 ultra_fast/fast 프리셋에서 쓰인다.
+    variant는 정확도 기준을 통과해 등록된 양자화 모델 이름으로, 프리셋의 backend용으로
+    등록된 변형만 사용하고 없으면 backend의 원본 모델을 사용한다 (변형이 backend를 바꾸지
+    않음). 양자화 모델은 onnxruntime용으로만 만들어지므로 variant는 fast 프리셋에만 있다.
+    keyframe_interval은 N 프레임마다 탐지하고 사이 프레임은 추적기의 칼만 예측으로
+    표시하는 간격이다 (없으면 매 프레임 탐지).
+    """
+    
+    DEFAULT_PRESET = "balanced"
     
     # 성능 프리셋 설정
     PRESETS = {
@@ -12,7 +30,8 @@ class PerformanceConfig:
             "imgsz": 320,
             "conf": 0.8,
             "fps_target": 20,
-            "sleep_time": 0.02,  # 매우 짧은 딜레이
+            "backend": "openvino",
+            "keyframe_interval": 3,
             "description": "최고 속도, 낮은 해상도로 빠른 탐지"
         },
         "fast": {
@@ -20,7 +39,9 @@ class PerformanceConfig:
             "imgsz": 416,
             "conf": 0.7,
             "fps_target": 12,
-            "sleep_time": 0.05,
+            "backend": "onnxruntime",
+            "variant": "int8",
+            "keyframe_interval": 2,
             "description": "빠른 속도와 적당한 정확도"
         },
         "balanced": {
@@ -28,7 +49,7 @@ class PerformanceConfig:
             "imgsz": 640,
             "conf": 0.5,
             "fps_target": 6,
-            "sleep_time": 0.1,
+            "backend": "pytorch",
             "description": "속도와 정확도의 균형"
         },
         "quality": {
@@ -36,11 +57,14 @@ class PerformanceConfig:
             "imgsz": 640,
             "conf": 0.3,
             "fps_target": 3,
-            "sleep_time": 0.2,
+            "backend": "pytorch",
             "description": "최고 정확도, 높은 해상도"
         }
     }
     
+    # 가벼운 순서 (해상도/속도 기준)
+    PRESET_ORDER = ["ultra_fast", "fast", "balanced", "quality"]
+    
     @classmethod
     def get_preset(cls, preset_name: str) -> dict:
         """프리셋 설정 가져오기"""
@@ -52,13 +76,202 @@ class PerformanceConfig:
         return list(cls.PRESETS.keys())
     
     @classmethod
-    def recommend_preset_for_fps(cls, target_fps: float) -> str:
-        """목표 FPS에 따른 프리셋 추천"""
-        if target_fps < 3:
-            return "ultra_fast"
-        elif target_fps < 8:
-            return "fast" 
-        elif target_fps < 15:
-            return "balanced"
+    def get_imgsz_values(cls) -> list:
+        """프리셋들이 사용하는 입력 크기 (오름차순, 모델 워밍업 대상)"""
+        return sorted({preset["imgsz"] for preset in cls.PRESETS.values()})
+    
+    @classmethod
+    def recommend_preset_for_measurement(cls, frame_time: float, imgsz: int) -> str:
+        """
+        실측 프레임 처리 시간에 따른 프리셋 추천
+        
+        추론 비용이 입력 면적(imgsz²)에 비례한다고 보고, 각 프리셋 해상도에서의
+        처리 시간을 추정하여 목표 FPS를 달성할 수 있는 가장 높은 품질의 프리셋을 고른다.
+        
+        Args:
+            frame_time: 측정된 프레임당 처리 시간(초)
+            imgsz: 측정 당시 입력 해상도
+            
+        Returns:
+            추천 프리셋 이름
+        """
+        # 품질이 높은 순서로 검사
+        for name in reversed(cls.PRESET_ORDER):
+            preset = cls.PRESETS[name]
+            estimated = frame_time * (preset["imgsz"] / float(imgsz)) ** 2
+            if estimated <= 1.0 / preset["fps_target"]:
+                return name
+        return cls.PRESET_ORDER[0]
+
+
+class AdaptiveFrameController:
+    """
+    폐루프 프레임 페이싱 컨트롤러
+    
+    프레임마다 실제 처리 시간을 측정해 프레임 예산(1 / fps_target)의 남은 시간만큼만
+    대기한다. 측정 FPS가 목표에서 계속 벗어나면 히스테리시스를 두고 imgsz를 한 단계씩
+    내리거나 (프리셋의 imgsz를 넘지 않는 범위에서) 다시 올린다.
+    """
+    
+    # 자동 조정에 사용하는 해상도 단계
+    IMGSZ_LADDER = [320, 416, 512, 640]
+    # 부분 영역(모션 영역, 계수선 띠) 탐지용 해상도 단계 - 배치 추론 서버가 같은 크기끼리
+    # 묶을 수 있도록 영역 크기를 이 단계 중 하나로 맞춘다
+    REGION_IMGSZ_LADDER = [160] + IMGSZ_LADDER
+    
+    def __init__(self, performance_config: dict, window: int = 30, patience: int = 3,
+                 lower_ratio: float = 0.8, upper_ratio: float = 1.25, auto_adjust: bool = True):
+        """
+        Args:
+            performance_config: 프리셋 설정 (fps_target, imgsz)
+            window: 한 번의 평가에 사용하는 프레임 수
+            patience: 조정 전에 목표를 벗어나야 하는 연속 평가 횟수
+            lower_ratio: 측정 FPS가 목표의 이 비율 미만이면 해상도 하향 후보
+            upper_ratio: 한 단계 높은 해상도에서도 목표의 이 비율 이상이면 상향 후보
+            auto_adjust: False면 페이싱만 수행
+        """
+        self.fps_target = float(performance_config.get("fps_target", 10))
+        self.max_imgsz = int(performance_config.get("imgsz", 640))
+        self.imgsz = self.max_imgsz
+        self.window = window
+        self.patience = patience
+        self.lower_ratio = lower_ratio
+        self.upper_ratio = upper_ratio
+        self.auto_adjust = auto_adjust
+        
+        self._frame_start = None
+        self._detected = False
+        self._samples = deque(maxlen=window)
+        self._below = 0
+        self._above = 0
+        
+        self.measured_frame_time = 0.0  # 최근 평균 처리 시간(초)
+        self.adjustments = 0
+    
+    def reconfigure(self, performance_config: dict):
+        """
+        프리셋 변경 반영 - 목표 FPS와 최대 해상도를 바꾸고 측정 상태를 초기화
+        
+        Args:
+            performance_config: 새 프리셋 설정 (fps_target, imgsz)
+        """
+        self.fps_target = float(performance_config.get("fps_target", 10))
+        self.max_imgsz = int(performance_config.get("imgsz", 640))
+        self.imgsz = self.max_imgsz
+        self._samples.clear()
+        self._below = 0
+        self._above = 0
+    
+    @property
+    def frame_budget(self) -> float:
+        """프레임당 시간 예산(초)"""
+        return 1.0 / self.fps_target if self.fps_target > 0 else 0.0
+    
+    @property
+    def achievable_fps(self) -> float:
+        """현재 처리 시간 기준 달성 가능한 FPS"""
+        return 1.0 / self.measured_frame_time if self.measured_frame_time > 0 else 0.0
+    
+    def begin_frame(self):
+        """프레임 처리 시작 시각 기록"""
+        self._frame_start = time.monotonic()
+        self._detected = False
+    
+    def mark_detected(self):
+        """이번 프레임에서 탐지(모델 추론)를 수행했음을 표시"""
+        self._detected = True
+    
+    def end_frame(self) -> float:
+        """
+        프레임 처리 종료 - 처리 시간을 기록하고 대기해야 할 시간을 반환
+        
+        해상도 조정과 처리 시간 측정에는 탐지를 수행한 프레임만 사용한다. 모션 게이트로
+        생략되거나 키프레임 사이 예측으로 그린 프레임은 거의 시간이 들지 않으므로, 포함하면
+        한산한 장면에서 imgsz가 최대로 올라갔다가 교통량이 늘 때 뒤늦게 내려간다.
+        
+        Returns:
+            프레임 예산 중 남은 시간(초), 예산을 넘겼으면 0
+        """
+        if self._frame_start is None:
+            return 0.0
+        
+        elapsed = time.monotonic() - self._frame_start
+        self._frame_start = None
+        if self._detected:
+            self._samples.append(elapsed)
+            if len(self._samples) >= self.window:
+                self._evaluate()
+        
+        return max(0.0, self.frame_budget - elapsed)
+    
+    def pace(self):
+        """프레임 종료 처리 후 남은 예산만큼 대기"""
+        remaining = self.end_frame()
+        if remaining > 0:
+            time.sleep(remaining)
+    
+    def recommend_preset(self) -> Optional[str]:
+        """실측 처리 시간 기준 추천 프리셋 (측정 전이면 None)"""
+        if self.measured_frame_time <= 0:
+            return None
+        return PerformanceConfig.recommend_preset_for_measurement(self.measured_frame_time, self.imgsz)
+    
+    def _evaluate(self):
+        """한 윈도우의 측정 결과로 해상도 조정 여부 판단"""
+        self.measured_frame_time = sum(self._samples) / len(self._samples)
+        self._samples.clear()
+        
+        if not self.auto_adjust or self.fps_target <= 0:
+            return
+        
+        fps = self.achievable_fps
+        larger = self._next_imgsz(+1)
+        
+        if fps < self.fps_target * self.lower_ratio:
+            self._below += 1
+            self._above = 0
+        elif larger is not None and fps * (self.imgsz / float(larger)) ** 2 >= self.fps_target * self.upper_ratio:
+            self._above += 1
+            self._below = 0
         else:
-            return "quality"
\ No newline at end of file
+            self._below = 0
+            self._above = 0
+        
+        if self._below >= self.patience:
+            smaller = self._next_imgsz(-1)
+            if smaller is not None:
+                self._set_imgsz(smaller)
+            self._below = 0
+        elif self._above >= self.patience:
+            self._set_imgsz(larger)
+            self._above = 0
+    
+    def region_imgsz(self, extent: int) -> int:
+        """
+        부분 영역 탐지용 입력 크기 - 영역의 긴 변을 담는 가장 작은 단계 (현재 imgsz 이하)
+        
+        Args:
+            extent: 영역의 긴 변 길이(px)
+        """
+        for size in self.REGION_IMGSZ_LADDER:
+            if size >= self.imgsz:
+                break
+            if size >= extent:
+                return size
+        return self.imgsz
+    
+    def _next_imgsz(self, step: int) -> Optional[int]:
+        """현재 해상도에서 한 단계 위/아래 해상도 (범위를 벗어나면 None)"""
+        ladder = [s for s in self.IMGSZ_LADDER if s < self.max_imgsz] + [self.max_imgsz]
+        smaller = [s for s in ladder if s < self.imgsz]
+        larger = [s for s in ladder if s > self.imgsz]
+        if step < 0:
+            return smaller[-1] if smaller else None
+        return larger[0] if larger else None
+    
+    def _set_imgsz(self, imgsz: int):
+        """해상도 변경"""
+        print(f"[AdaptiveFrameController] imgsz {self.imgsz} -> {imgsz} "
+              f"(측정 {self.achievable_fps:.1f} FPS / 목표 {self.fps_target:.1f} FPS)")
+        self.imgsz = imgsz
+        self.adjustments += 1
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""
+ROI 크롭 + 레터박스 전처리 모듈
+"""
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class LetterboxTransform:
+    """
+    원본 프레임 -> 모델 입력 변환 정보
+
+    ROI를 원본 해상도에서 크롭한 뒤, 종횡비를 유지한 채 긴 변을 imgsz로 맞추고
+    stride 배수가 되도록 패딩한다. 모델 출력 좌표는 to_original()로 원본 프레임
+    좌표로 정확히 되돌린다.
+    """
+
+    __slots__ = ('frame_size', 'roi', 'scale', 'resized_size', 'pad', 'input_size')
+
+    def __init__(self, frame_size: Tuple[int, int], roi: Tuple[int, int, int, int],
+                 imgsz: int, stride: int = 32):
+        """
+        Args:
+            frame_size: 원본 프레임 (width, height)
+            roi: 프레임 경계 안으로 보정된 (x, y, w, h)
+            imgsz: 모델 입력의 긴 변 크기
+            stride: 모델 stride (입력 크기를 이 값의 배수로 패딩)
+        """
+        self.frame_size = frame_size
+        self.roi = roi
+        _, _, w, h = roi
+
+        self.scale = imgsz / max(w, h)
+        new_w = max(1, int(round(w * self.scale)))
+        new_h = max(1, int(round(h * self.scale)))
+        self.resized_size = (new_w, new_h)
+
+        # stride 배수로 최소 패딩 (양쪽에 균등 분배)
+        in_w = int(np.ceil(new_w / stride) * stride)
+        in_h = int(np.ceil(new_h / stride) * stride)
+        self.input_size = (in_w, in_h)
+        self.pad = ((in_w - new_w) // 2, (in_h - new_h) // 2)
+
+    def apply(self, frame: Any) -> Any:
+        """프레임에서 ROI를 크롭하고 레터박스 입력 이미지 생성 (리사이즈 1회)"""
+        x, y, w, h = self.roi
+        crop = frame[y:y+h, x:x+w]
+
+        if self.resized_size != (w, h):
+            interpolation = cv2.INTER_AREA if self.scale < 1.0 else cv2.INTER_LINEAR
+            crop = cv2.resize(crop, self.resized_size, interpolation=interpolation)
+
+        new_w, new_h = self.resized_size
+        in_w, in_h = self.input_size
+        if (new_w, new_h) == (in_w, in_h):
+            return np.ascontiguousarray(crop)
+
+        left, top = self.pad
+        return cv2.copyMakeBorder(
+            crop, top, in_h - new_h - top, left, in_w - new_w - left,
+            cv2.BORDER_CONSTANT, value=(114, 114, 114)
+        )
+
+    def to_original(self, xyxy: np.ndarray) -> np.ndarray:
+        """
+        모델 입력 좌표의 (N, 4) xyxy 박스를 원본 프레임 좌표로 변환
+
+        Returns:
+            원본 프레임 경계로 잘린 (N, 4) float32 배열
+        """
+        boxes = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4).copy()
+        if not len(boxes):
+            return boxes
+
+        pad_x, pad_y = self.pad
+        boxes[:, [0, 2]] -= pad_x
+        boxes[:, [1, 3]] -= pad_y
+        boxes /= self.scale
+
+        x, y, _, _ = self.roi
+        boxes[:, [0, 2]] += x
+        boxes[:, [1, 3]] += y
+
+        frame_w, frame_h = self.frame_size
+        boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, frame_w)
+        boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, frame_h)
+        return boxes
+
+
+class Letterboxer:
+    """
+    (프레임 크기, ROI, imgsz)별 LetterboxTransform 캐시
+
+    스트림의 프레임 크기와 ROI는 거의 바뀌지 않으므로 변환 정보를 매 프레임
+    다시 계산하지 않는다.
+    """
+
+    def __init__(self, stride: int = 32, max_entries: int = 64):
+        self.stride = stride
+        self.max_entries = max_entries
+        self._cache: Dict[tuple, LetterboxTransform] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def clip_roi(frame_size: Tuple[int, int],
+                 roi: Optional[Tuple[int, int, int, int]]) -> Tuple[int, int, int, int]:
+        """ROI를 프레임 경계 안으로 보정 (None이면 전체 프레임)"""
+        w_frame, h_frame = frame_size
+        if not roi:
+            return 0, 0, w_frame, h_frame
+        x, y, w, h = roi
+        x = max(0, min(int(x), w_frame - 1))
+        y = max(0, min(int(y), h_frame - 1))
+        w = max(1, min(int(w), w_frame - x))
+        h = max(1, min(int(h), h_frame - y))
+        return x, y, w, h
+
+    def get(self, frame: Any, roi: Optional[Tuple[int, int, int, int]], imgsz: int) -> LetterboxTransform:
+        """프레임에 적용할 변환 정보 (캐시)"""
+        h_frame, w_frame = frame.shape[:2]
+        key = (w_frame, h_frame, tuple(roi) if roi else None, imgsz)
+        with self._lock:
+            transform = self._cache.get(key)
+            if transform is None:
+                if len(self._cache) >= self.max_entries:
+                    self._cache.clear()
+                transform = LetterboxTransform(
+                    (w_frame, h_frame), self.clip_roi((w_frame, h_frame), roi), imgsz, self.stride
+                )
+                self._cache[key] = transform
+        return transform
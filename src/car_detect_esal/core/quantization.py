@@ -0,0 +1,389 @@
+"""
+INT8 정적 양자화 파이프라인
+
+1. 보정(calibration) 프레임 수집: StreamWorker 세션에서 기록한 이미지 디렉터리나
+   영상 파일에서 프레임을 고르게 추출하고, 추론과 같은 ROI 크롭 + 레터박스를 적용
+2. ONNX Runtime QDQ 정적 양자화 (Detect 헤드는 FP32 유지)
+3. 검증: 보정에 쓰지 않은 영상에서 FP32/INT8 차종별 카운트와 ESAL을 비교
+4. 정확도 기준을 통과한 모델만 모델 변형(variant) 레지스트리에 등록
+"""
+
+import json
+import re
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .esal_calculator import ESALCalculator
+from .preprocess import Letterboxer
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv'}
+
+# ESAL 대부분을 차지하므로 개별 드리프트를 항상 보고하는 차종
+HEAVY_CLASSES = ('truck', 'bus')
+
+
+class CalibrationRecorder:
+    """
+    실시간 스트림에서 보정용 프레임을 주기적으로 저장
+
+    StreamWorker가 프레임마다 maybe_record()를 호출하면 interval초마다 한 장씩
+    ROI 영역만 JPEG으로 저장한다 (max_frames장 이후 중지).
+    """
+
+    def __init__(self, directory: str, interval: float = 5.0, max_frames: int = 500,
+                 prefix: str = 'frame'):
+        """
+        Args:
+            directory: 저장 디렉터리 (카메라별로 분리 권장)
+            interval: 저장 간격(초)
+            max_frames: 최대 저장 장수
+            prefix: 파일 이름 접두사
+        """
+        self.directory = Path(directory)
+        self.interval = interval
+        self.max_frames = max_frames
+        self.prefix = prefix
+        self.saved = 0
+        self._last_saved = 0.0
+
+    def maybe_record(self, frame, roi: Optional[Tuple[int, int, int, int]] = None) -> bool:
+        """간격이 지났으면 프레임(ROI 영역) 저장 - 저장했으면 True"""
+        now = time.monotonic()
+        if self.saved >= self.max_frames or now - self._last_saved < self.interval:
+            return False
+        self._last_saved = now
+
+        h, w = frame.shape[:2]
+        x, y, rw, rh = Letterboxer.clip_roi((w, h), roi)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{self.prefix}_{datetime.now():%Y%m%d_%H%M%S}_{self.saved:05d}.jpg"
+        if cv2.imwrite(str(path), frame[y:y+rh, x:x+rw]):
+            self.saved += 1
+            return True
+        return False
+
+
+def _iter_source_frames(source: Path, frames_per_video: int) -> Iterable[np.ndarray]:
+    """이미지 디렉터리/이미지/영상에서 BGR 프레임 추출 (영상은 고르게 샘플링)"""
+    if source.is_dir():
+        for path in sorted(source.iterdir()):
+            if path.suffix.lower() in IMAGE_EXTENSIONS | VIDEO_EXTENSIONS:
+                yield from _iter_source_frames(path, frames_per_video)
+        return
+
+    suffix = source.suffix.lower()
+    if suffix in IMAGE_EXTENSIONS:
+        image = cv2.imread(str(source))
+        if image is not None:
+            yield image
+        return
+
+    if suffix in VIDEO_EXTENSIONS:
+        cap = cv2.VideoCapture(str(source))
+        try:
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            if total <= 0:
+                return
+            for index in np.linspace(0, total - 1, min(total, frames_per_video)).astype(int):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+                ret, frame = cap.read()
+                if ret:
+                    yield frame
+        finally:
+            cap.release()
+
+
+def collect_calibration_frames(sources: List[str], imgsz: int = 640, max_frames: int = 300,
+                               frames_per_video: int = 100,
+                               roi: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+    """
+    보정용 입력 배치 생성
+
+    Args:
+        sources: CalibrationRecorder 디렉터리, 이미지, 영상 파일 경로 리스트
+        imgsz: 모델 입력 크기 (정사각형으로 패딩)
+        max_frames: 최대 프레임 수
+        frames_per_video: 영상 하나에서 추출할 프레임 수
+        roi: 영상 프레임에 적용할 (x, y, w, h) (기록된 이미지는 이미 ROI 영역)
+
+    Returns:
+        (N, 3, imgsz, imgsz) float32 RGB 배열 (추론 전처리와 동일)
+    """
+    letterboxer = Letterboxer()
+    batch = []
+    for source in sources:
+        for frame in _iter_source_frames(Path(source), frames_per_video):
+            image = letterboxer.get(frame, roi, imgsz).apply(frame)
+            padded = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+            padded[:image.shape[0], :image.shape[1]] = image
+            batch.append(padded)
+            if len(batch) >= max_frames:
+                break
+        if len(batch) >= max_frames:
+            break
+
+    if not batch:
+        raise ValueError("보정용 프레임을 찾지 못했습니다")
+    array = np.stack(batch)[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(array, dtype=np.float32) / 255.0
+
+
+def _detect_head_nodes(model) -> List[str]:
+    """YOLOv8 ONNX 그래프에서 마지막 모듈(Detect 헤드)의 노드 이름"""
+    pattern = re.compile(r'^/model\.(\d+)/')
+    indices = {}
+    for node in model.graph.node:
+        match = pattern.match(node.name)
+        if match:
+            indices.setdefault(int(match.group(1)), []).append(node.name)
+    return indices[max(indices)] if indices else []
+
+
+def quantize_onnx(fp32_path: str, output_path: str, calibration: np.ndarray,
+                  per_channel: bool = True, keep_head_fp32: bool = True,
+                  batch_size: int = 8) -> Path:
+    """
+    ONNX Runtime QDQ 정적 INT8 양자화
+
+    Args:
+        fp32_path: FP32 .onnx 경로 (export_model로 생성)
+        output_path: 저장할 INT8 .onnx 경로
+        calibration: collect_calibration_frames() 결과
+        per_channel: 가중치 채널별 양자화
+        keep_head_fp32: Detect 헤드(박스 디코딩/점수)는 양자화하지 않음
+        batch_size: 보정 시 한 번에 넣을 프레임 수
+
+    Returns:
+        INT8 모델 경로 (FP32 메타데이터를 복사한 .meta.json 포함)
+    """
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType, quantize_static
+    )
+
+    model = onnx.load(fp32_path)
+    input_name = model.graph.input[0].name
+    exclude = _detect_head_nodes(model) if keep_head_fp32 else []
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self):
+            self._batches = iter(range(0, len(calibration), batch_size))
+
+        def get_next(self):
+            start = next(self._batches, None)
+            if start is None:
+                return None
+            return {input_name: calibration[start:start + batch_size]}
+
+    output = Path(output_path)
+    quantize_static(
+        fp32_path, str(output), _Reader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=per_channel,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=exclude,
+    )
+
+    meta_path = Path(f"{fp32_path}.meta.json")
+    meta = json.loads(meta_path.read_text(encoding='utf-8')) if meta_path.exists() else {}
+    meta.update({
+        'quantization': 'int8_qdq',
+        'calibration_frames': int(len(calibration)),
+        'fp32_model': Path(fp32_path).name,
+    })
+    Path(f"{output}.meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding='utf-8')
+    return output
+
+
+def compare_counts(fp32_counts: Dict[str, int], int8_counts: Dict[str, int],
+                   esal_calculator: ESALCalculator = None, max_count_drift: float = 0.05,
+                   max_esal_drift: float = 0.03, max_heavy_drift: float = 0.05,
+                   heavy_classes: Tuple[str, ...] = HEAVY_CLASSES) -> Dict:
+    """
+    FP32/INT8 차종별 카운트와 ESAL 비교 (정확도 기준 판정)
+
+    상대 오차는 FP32 값 기준이며, FP32 카운트가 0인 차종은 INT8 카운트가 있으면
+    오차 100%로 본다. 대형 차종(heavy_classes)은 FP32에서 0대여도 항상 보고한다.
+
+    Args:
+        fp32_counts / int8_counts: {차종: 대수}
+        max_count_drift: 전체 대수 허용 상대 오차
+        max_esal_drift: 전체 ESAL 허용 상대 오차
+        max_heavy_drift: 대형 차종별 대수 허용 상대 오차
+
+    Returns:
+        {'passed', 'failures', 'per_class', 'heavy', 'total_count', 'total_esal'}
+    """
+    esal_calculator = esal_calculator or ESALCalculator()
+
+    def drift(reference: float, value: float) -> float:
+        if reference:
+            return (value - reference) / reference
+        return 0.0 if not value else 1.0
+
+    per_class = {}
+    for vehicle_type in sorted(set(fp32_counts) | set(int8_counts) | set(heavy_classes)):
+        fp32 = fp32_counts.get(vehicle_type, 0)
+        int8 = int8_counts.get(vehicle_type, 0)
+        fp32_esal = esal_calculator.calculate_class_score(vehicle_type, fp32)
+        int8_esal = esal_calculator.calculate_class_score(vehicle_type, int8)
+        per_class[vehicle_type] = {
+            'fp32': fp32,
+            'int8': int8,
+            'delta': int8 - fp32,
+            'drift': drift(fp32, int8),
+            'fp32_esal': fp32_esal,
+            'int8_esal': int8_esal,
+            'esal_drift': drift(fp32_esal, int8_esal),
+        }
+
+    fp32_total = sum(fp32_counts.values())
+    int8_total = sum(int8_counts.values())
+    fp32_esal, _ = esal_calculator.calculate_total_score(fp32_counts)
+    int8_esal, _ = esal_calculator.calculate_total_score(int8_counts)
+
+    report = {
+        'per_class': per_class,
+        'heavy': {c: per_class[c] for c in heavy_classes},
+        'total_count': {'fp32': fp32_total, 'int8': int8_total, 'drift': drift(fp32_total, int8_total)},
+        'total_esal': {'fp32': fp32_esal, 'int8': int8_esal, 'drift': drift(fp32_esal, int8_esal)},
+        'thresholds': {'count': max_count_drift, 'esal': max_esal_drift, 'heavy': max_heavy_drift},
+    }
+
+    failures = []
+    if abs(report['total_count']['drift']) > max_count_drift:
+        failures.append(f"전체 대수 오차 {report['total_count']['drift']:+.1%} > {max_count_drift:.1%}")
+    if abs(report['total_esal']['drift']) > max_esal_drift:
+        failures.append(f"전체 ESAL 오차 {report['total_esal']['drift']:+.1%} > {max_esal_drift:.1%}")
+    for vehicle_type, row in report['heavy'].items():
+        if abs(row['drift']) > max_heavy_drift:
+            failures.append(f"{vehicle_type} 대수 오차 {row['drift']:+.1%} "
+                            f"({row['fp32']} -> {row['int8']}) > {max_heavy_drift:.1%}")
+
+    report['failures'] = failures
+    report['passed'] = not failures
+    return report
+
+
+class ModelVariantRegistry:
+    """
+    선택 가능한 모델 변형 목록 (weights/variants.json)
+
+    정확도 기준을 통과한 양자화 모델만 등록되며, VehicleDetector(model_variant=...)와
+    PerformanceConfig 프리셋의 variant로 선택한다. 변형은 (이름, 백엔드) 단위로 등록되므로
+    onnxruntime용 int8 모델이 openvino 프리셋의 백엔드를 바꾸지 않는다.
+    """
+
+    FILENAME = 'variants.json'
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: 가중치 디렉터리 (variants.json 위치, 모델 경로의 기준)
+        """
+        self.directory = Path(directory)
+        self.path = self.directory / self.FILENAME
+
+    @classmethod
+    def for_weights(cls, weights_path: str) -> 'ModelVariantRegistry':
+        return cls(Path(weights_path).parent)
+
+    def _load(self) -> Dict[str, Dict[str, Dict]]:
+        """{이름: {백엔드: 항목}} - 이름당 항목 하나였던 이전 형식도 변환"""
+        if not self.path.exists():
+            return {}
+        try:
+            variants = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            print(f"[ModelVariantRegistry] {self.path} 읽기 실패: {e}")
+            return {}
+        return {
+            name: {entries['backend']: entries} if 'backend' in entries else entries
+            for name, entries in variants.items()
+        }
+
+    def list_variants(self) -> Dict[str, Dict[str, Dict]]:
+        return self._load()
+
+    def backends(self, name: str) -> List[str]:
+        """변형이 등록된 백엔드 목록"""
+        return sorted(self._load().get(name, {}))
+
+    def get(self, name: str, backend: Optional[str] = None) -> Optional[Dict]:
+        """
+        등록된 변형 (모델 파일이 없으면 None)
+
+        Args:
+            name: 변형 이름 (예: 'int8')
+            backend: 백엔드 이름 - None이면 등록된 아무 백엔드의 변형
+
+        Returns:
+            {'backend', 'path'(절대 경로), 'base_weights', 'created_at', 'report'}
+        """
+        entries = self._load().get(name, {})
+        candidates = [entries.get(backend)] if backend else list(entries.values())
+        for entry in candidates:
+            if not entry:
+                continue
+            path = self.directory / entry['path']
+            if path.exists():
+                return dict(entry, path=str(path))
+        return None
+
+    def register(self, name: str, model_path: str, backend: str, base_weights: str, report: Dict):
+        """
+        변형 등록 (정확도 기준을 통과한 경우만, 같은 이름의 다른 백엔드 변형은 유지)
+
+        Raises:
+            ValueError: report['passed']가 False인 경우
+        """
+        if not report.get('passed'):
+            raise ValueError(f"정확도 기준 미통과 모델은 등록할 수 없습니다: {report.get('failures')}")
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        model_path = Path(model_path)
+        if model_path.parent.resolve() != self.directory.resolve():
+            target = self.directory / model_path.name
+            shutil.copy2(model_path, target)
+            meta = Path(f"{model_path}.meta.json")
+            if meta.exists():
+                shutil.copy2(meta, Path(f"{target}.meta.json"))
+            model_path = target
+
+        variants = self._load()
+        variants.setdefault(name, {})[backend] = {
+            'backend': backend,
+            'path': model_path.name,
+            'base_weights': Path(base_weights).name,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'report': {
+                'total_count': report['total_count'],
+                'total_esal': report['total_esal'],
+                'heavy': report['heavy'],
+            },
+        }
+        self.path.write_text(json.dumps(variants, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    def unregister(self, name: str, backend: Optional[str] = None) -> bool:
+        """변형 등록 해제 (backend가 None이면 모든 백엔드)"""
+        variants = self._load()
+        if backend is None:
+            if variants.pop(name, None) is None:
+                return False
+        else:
+            entries = variants.get(name, {})
+            if entries.pop(backend, None) is None:
+                return False
+            if not entries:
+                del variants[name]
+        self.path.write_text(json.dumps(variants, ensure_ascii=False, indent=2), encoding='utf-8')
+        return True
@@ -0,0 +1,218 @@
+"""
+보관 영상 헤드리스 분석 모듈
+
+긴 영상을 시간 구간(chunk)으로 나누어 독립적으로 처리하고, 구간별 결과를 합쳐
+영상/시간대별 차종 카운트와 ESAL을 계산한다. 각 구간은 앞 구간과 겹치는
+워밍업 구간부터 추적을 시작하되, 워밍업 구간에서 처음 발견된 객체는 앞 구간이
+이미 센 객체이므로 카운트하지 않는다. 프레임은 하나씩 읽고 버리므로 영상 길이와
+무관하게 메모리 사용량이 일정하다.
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+
+from .detector import VehicleDetector, VehicleTracker, extract_tracker_detections
+from .detection_batch import DetectionBatch
+from .esal_calculator import ESALCalculator
+
+
+class VideoChunk:
+    """영상의 한 처리 구간 (프레임 번호 기준, end_frame 미포함)"""
+
+    __slots__ = ('video_path', 'index', 'warmup_frame', 'start_frame', 'end_frame',
+                 'fps', 'start_time')
+
+    def __init__(self, video_path: str, index: int, warmup_frame: int, start_frame: int,
+                 end_frame: int, fps: float, start_time: datetime):
+        self.video_path = video_path
+        self.index = index
+        self.warmup_frame = warmup_frame
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.fps = fps
+        self.start_time = start_time
+
+    def frame_time(self, frame_number: int) -> datetime:
+        """프레임 번호 -> 녹화 시각"""
+        return self.start_time + timedelta(seconds=frame_number / self.fps)
+
+
+def probe_video(video_path: str) -> Tuple[int, float]:
+    """
+    영상의 프레임 수와 FPS 조회
+
+    Raises:
+        IOError: 영상을 열 수 없는 경우
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        if not cap.isOpened():
+            raise IOError(f"영상을 열 수 없습니다: {video_path}")
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        return frame_count, fps
+    finally:
+        cap.release()
+
+
+def plan_chunks(video_path: str, frame_count: int, fps: float, chunk_seconds: float = 600.0,
+                overlap_seconds: float = 5.0, start_time: datetime = None) -> List[VideoChunk]:
+    """
+    영상을 시간 구간으로 분할
+
+    Args:
+        video_path: 영상 경로
+        frame_count: 전체 프레임 수
+        fps: 영상 FPS
+        chunk_seconds: 구간 길이(초), 0 이하면 분할하지 않음
+        overlap_seconds: 앞 구간과 겹치는 워밍업 길이(초) - 추적 유지 시간 이상이어야 함
+        start_time: 녹화 시작 시각 (None이면 영상 파일 수정 시각 - 영상 길이)
+
+    Returns:
+        VideoChunk 리스트
+    """
+    if start_time is None:
+        duration = frame_count / fps if fps else 0.0
+        start_time = datetime.fromtimestamp(Path(video_path).stat().st_mtime) - timedelta(seconds=duration)
+
+    chunk_frames = int(round(chunk_seconds * fps)) if chunk_seconds > 0 else frame_count
+    chunk_frames = max(1, chunk_frames)
+    overlap_frames = max(0, int(round(overlap_seconds * fps)))
+
+    chunks = []
+    for index, start in enumerate(range(0, max(frame_count, 1), chunk_frames)):
+        end = min(frame_count, start + chunk_frames)
+        chunks.append(VideoChunk(str(video_path), index, max(0, start - overlap_frames),
+                                 start, end, fps, start_time))
+    return chunks
+
+
+class VideoAnalyzer:
+    """
+    한 프로세스에서 영상 구간을 처리하는 분석기 (모델은 프로세스당 한 번 로드)
+
+    실시간 스트림과 같은 VehicleDetector/VehicleTracker를 사용하며, 추적 시각은
+    영상 내 시각을 사용한다.
+    """
+
+    def __init__(self, detector: VehicleDetector, frame_step: int = 1,
+                 roi: Optional[Tuple[int, int, int, int]] = None,
+                 track_ttl: float = 3.0, min_confidence: float = 0.5):
+        """
+        Args:
+            detector: 차량 탐지기
+            frame_step: N 프레임마다 한 번 탐지 (1이면 모든 프레임)
+            roi: (x, y, w, h) 관심 영역 (원본 프레임 좌표)
+            track_ttl: 추적 유지 시간(영상 시간 기준, 초)
+            min_confidence: 카운트에 포함할 최소 신뢰도
+        """
+        self.detector = detector
+        self.frame_step = max(1, frame_step)
+        self.roi = roi
+        self.track_ttl = track_ttl
+        self.min_confidence = min_confidence
+
+    def analyze_chunk(self, chunk: VideoChunk) -> Dict[str, Any]:
+        """
+        구간 처리
+
+        Returns:
+            {'video', 'index', 'frames', 'failed_frames', 'counts': {시간대 시작 시각: {차종: 수}},
+             'detections': DetectionBatch (timestamp, frame_number 포함)}
+            failed_frames는 추론이 실패해 탐지 없음으로 처리한 프레임 수
+        """
+        tracker = VehicleTracker(track_ttl=self.track_ttl)
+        counts: Dict[datetime, Dict[str, int]] = {}
+        records = []
+        processed = 0
+        failed = 0
+
+        cap = cv2.VideoCapture(chunk.video_path)
+        try:
+            if not cap.isOpened():
+                raise IOError(f"영상을 열 수 없습니다: {chunk.video_path}")
+            if chunk.warmup_frame > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, chunk.warmup_frame)
+
+            for frame_number in range(chunk.warmup_frame, chunk.end_frame):
+                # 건너뛸 프레임은 디코딩하지 않음
+                if (frame_number - chunk.warmup_frame) % self.frame_step:
+                    if not cap.grab():
+                        break
+                    continue
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                processed += 1
+
+                h, w = frame.shape[:2]
+                _, results = self.detector.detect(frame, self.roi, annotate=False)
+                if results is None:
+                    # 추론 실패 (detect_batch가 예외 후 (frame, None) 반환) - 구간 전체를 버리지 않음
+                    failed += 1
+                    detections = DetectionBatch.empty()
+                else:
+                    detections = extract_tracker_detections(results[0], (w, h), self.min_confidence)
+                _, new_detections = tracker.update(detections, now=frame_number / chunk.fps)
+
+                # 워밍업 구간에서 처음 보인 객체는 앞 구간에서 이미 카운트됨
+                if frame_number < chunk.start_frame or not new_detections:
+                    continue
+
+                timestamp = chunk.frame_time(frame_number)
+                hour = timestamp.replace(minute=0, second=0, microsecond=0)
+                hour_counts = counts.setdefault(hour, {})
+                for vehicle_type, count in new_detections.type_counts().items():
+                    hour_counts[vehicle_type] = hour_counts.get(vehicle_type, 0) + count
+                new_detections.stamp(timestamp, frame_number)
+                records.append(new_detections)
+        finally:
+            cap.release()
+
+        return {
+            'video': chunk.video_path,
+            'index': chunk.index,
+            'frames': processed,
+            'failed_frames': failed,
+            'counts': counts,
+            'detections': DetectionBatch.concat(records),
+        }
+
+
+def merge_counts(chunk_results: List[Dict[str, Any]]) -> Dict[str, Dict[datetime, Dict[str, int]]]:
+    """구간 결과를 영상/시간대/차종별 카운트로 합산"""
+    merged: Dict[str, Dict[datetime, Dict[str, int]]] = {}
+    for result in chunk_results:
+        video = merged.setdefault(result['video'], {})
+        for hour, hour_counts in result['counts'].items():
+            target = video.setdefault(hour, {})
+            for vehicle_type, count in hour_counts.items():
+                target[vehicle_type] = target.get(vehicle_type, 0) + count
+    return merged
+
+
+def summarize_counts(merged: Dict[str, Dict[datetime, Dict[str, int]]],
+                     esal_calculator: ESALCalculator = None) -> List[Dict[str, Any]]:
+    """
+    영상/시간대별 카운트와 ESAL 요약 행 생성
+
+    Returns:
+        [{'video', 'hour', 'vehicle_type', 'count', 'esal'}, ...] (시간순 정렬)
+    """
+    esal_calculator = esal_calculator or ESALCalculator()
+    rows = []
+    for video in sorted(merged):
+        for hour in sorted(merged[video]):
+            _, class_scores = esal_calculator.calculate_total_score(merged[video][hour])
+            for vehicle_type, count in sorted(merged[video][hour].items()):
+                rows.append({
+                    'video': video,
+                    'hour': hour,
+                    'vehicle_type': vehicle_type,
+                    'count': count,
+                    'esal': class_scores[vehicle_type],
+                })
+    return rows
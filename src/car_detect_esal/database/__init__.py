@@ -5,10 +5,14 @@ Database Package Initialization
 
 from .schema import TrafficDatabaseSchema, ESAL_VALUES, MAINTENANCE_THRESHOLDS
 from .manager import TrafficDatabaseManager
+from .writer import DetectionWriteQueue
+from .camera_registry import CameraRegistry
 
 __all__ = [
     'TrafficDatabaseSchema',
     'TrafficDatabaseManager', 
+    'DetectionWriteQueue',
+    'CameraRegistry',
     'ESAL_VALUES',
     'MAINTENANCE_THRESHOLDS'
 ]
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+카메라 메타데이터 캐시
+Camera Metadata Cache
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+class CameraRegistry:
+    """
+    프로세스 내 카메라 정보(name, location) 캐시
+
+    add_camera_stream / get_camera_list 결과로 채워지며, 탐지 결과 기록 시
+    camera_streams 테이블을 다시 조회하지 않도록 한다. 존재하지 않는 카메라도
+    (None으로) 캐시하여 등록되지 않은 카메라 때문에 매번 조회하지 않는다.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        """
+        Args:
+            ttl: 캐시 항목 유효 시간(초)
+        """
+        self.ttl = ttl
+        self._entries: Dict[str, tuple] = {}  # camera_id -> (info 또는 None, 저장 시각)
+        self._lock = threading.Lock()
+
+        # 지표
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, camera_ids: Iterable[str]) -> tuple:
+        """
+        캐시 조회
+
+        Returns:
+            (found, missing) - found: {camera_id: info 또는 None}, missing: 캐시에 없는/만료된 ID 리스트
+        """
+        now = time.monotonic()
+        found = {}
+        missing = []
+        with self._lock:
+            for camera_id in camera_ids:
+                entry = self._entries.get(camera_id)
+                if entry is not None and now - entry[1] < self.ttl:
+                    found[camera_id] = entry[0]
+                    self.hits += 1
+                else:
+                    missing.append(camera_id)
+                    self.misses += 1
+        return found, missing
+
+    def get(self, camera_id: str) -> Optional[Dict]:
+        """단일 카메라 정보 (없거나 만료되면 None)"""
+        found, _ = self.lookup([camera_id])
+        return found.get(camera_id)
+
+    def put(self, camera_id: str, info: Optional[Dict]):
+        """
+        카메라 정보 저장
+
+        Args:
+            info: {'name': ..., 'location': ...} 또는 미등록 카메라면 None
+        """
+        if info is not None:
+            info = {'name': info.get('name'), 'location': info.get('location')}
+        with self._lock:
+            self._entries[camera_id] = (info, time.monotonic())
+
+    def put_many(self, cameras: List[Dict]):
+        """camera_streams 조회 결과(id, name, location 포함)로 캐시 채우기"""
+        for camera in cameras:
+            if camera.get('id') is not None:
+                self.put(camera['id'], camera)
+
+    def invalidate(self, camera_id: str = None):
+        """특정 카메라 또는 전체 캐시 무효화"""
+        with self._lock:
+            if camera_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(camera_id, None)
+
+    def get_stats(self) -> Dict:
+        """캐시 지표 반환"""
+        with self._lock:
+            size = len(self._entries)
+        total = self.hits + self.misses
+        return {
+            'size': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,150 @@
+"""
+집합 기반 ESAL 분석 엔진
+Set-based ESAL Analysis Engine
+
+집계 테이블(detection_rollup_hourly)과 ESAL 가중치 테이블(esal_weights)을 조인하여
+한 번의 INSERT ... SELECT로 esal_analysis 행을 계산/저장한다.
+탐지 결과를 Python으로 가져와 행 단위로 계산하지 않는다.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .schema import ESAL_VALUES, ESAL_VEHICLE_GROUPS, MAINTENANCE_THRESHOLDS
+
+
+class ESALAnalysisEngine:
+    """
+    ESAL 분석 SQL 엔진
+
+    분석 구간은 정시 단위로 맞춰지며 현재 시간대를 포함한다.
+    포장 손상 수준/유지보수 긴급도는 카메라의 누적 ESAL을 MAINTENANCE_THRESHOLDS와
+    비교하여 정하고, 예상 유지보수일은 분석 구간의 ESAL 증가 속도로 다음 기준값에
+    도달하는 날짜를 추정한다.
+    """
+
+    # 분석 주기별 구간 길이
+    ANALYSIS_WINDOWS = {
+        'hourly': timedelta(hours=1),
+        'daily': timedelta(days=1),
+        'weekly': timedelta(days=7),
+        'monthly': timedelta(days=30),
+    }
+
+    ANALYSIS_SQL = """
+        INSERT INTO esal_analysis
+        (timestamp, camera_id, analysis_period, period_start, period_end,
+         car_count, bus_count, truck_count, van_count, motorbike_count, other_count,
+         total_esal, car_esal, bus_esal, truck_esal, van_esal,
+         pavement_damage_level, maintenance_urgency, estimated_maintenance_date)
+        SELECT
+            %(now)s, %(camera_id)s, %(period)s, %(period_start)s, %(period_end)s,
+            a.car_count, a.bus_count, a.truck_count, a.van_count, a.motorbike_count, a.other_count,
+            a.total_esal, a.car_esal, a.bus_esal, a.truck_esal, a.van_esal,
+            CASE
+                WHEN c.cumulative_esal >= %(reconstruction)s THEN 5
+                WHEN c.cumulative_esal >= %(rehabilitation)s THEN 4
+                WHEN c.cumulative_esal >= %(surface_treatment)s THEN 3
+                WHEN c.cumulative_esal >= %(preventive)s THEN 2
+                ELSE 1
+            END,
+            CASE
+                WHEN c.cumulative_esal >= %(reconstruction)s THEN 'critical'
+                WHEN c.cumulative_esal >= %(rehabilitation)s THEN 'high'
+                WHEN c.cumulative_esal >= %(preventive)s THEN 'medium'
+                ELSE 'low'
+            END,
+            CASE
+                WHEN c.cumulative_esal >= %(reconstruction)s THEN %(today)s
+                WHEN a.total_esal <= 0 THEN NULL
+                ELSE DATE_ADD(%(today)s, INTERVAL CEIL(
+                    (CASE
+                        WHEN c.cumulative_esal < %(preventive)s THEN %(preventive)s
+                        WHEN c.cumulative_esal < %(surface_treatment)s THEN %(surface_treatment)s
+                        WHEN c.cumulative_esal < %(rehabilitation)s THEN %(rehabilitation)s
+                        ELSE %(reconstruction)s
+                    END - c.cumulative_esal) / (a.total_esal / %(window_days)s)
+                ) DAY)
+            END
+        FROM (
+            SELECT
+                COALESCE(SUM(CASE WHEN w.vehicle_group = 'car' THEN r.vehicle_count END), 0) AS car_count,
+                COALESCE(SUM(CASE WHEN w.vehicle_group = 'bus' THEN r.vehicle_count END), 0) AS bus_count,
+                COALESCE(SUM(CASE WHEN w.vehicle_group = 'truck' THEN r.vehicle_count END), 0) AS truck_count,
+                COALESCE(SUM(CASE WHEN w.vehicle_group = 'van' THEN r.vehicle_count END), 0) AS van_count,
+                COALESCE(SUM(CASE WHEN w.vehicle_group = 'motorbike' THEN r.vehicle_count END), 0) AS motorbike_count,
+                COALESCE(SUM(CASE WHEN w.vehicle_group IS NULL OR w.vehicle_group = 'other'
+                                  THEN r.vehicle_count END), 0) AS other_count,
+                COALESCE(SUM(r.vehicle_count * COALESCE(w.esal_value, 0)), 0) AS total_esal,
+                COALESCE(SUM(CASE WHEN w.vehicle_group = 'car' THEN r.vehicle_count * w.esal_value END), 0) AS car_esal,
+                COALESCE(SUM(CASE WHEN w.vehicle_group = 'bus' THEN r.vehicle_count * w.esal_value END), 0) AS bus_esal,
+                COALESCE(SUM(CASE WHEN w.vehicle_group = 'truck' THEN r.vehicle_count * w.esal_value END), 0) AS truck_esal,
+                COALESCE(SUM(CASE WHEN w.vehicle_group = 'van' THEN r.vehicle_count * w.esal_value END), 0) AS van_esal
+            FROM detection_rollup_hourly r
+            LEFT JOIN esal_weights w ON w.vehicle_type = r.vehicle_type
+            WHERE r.camera_id = %(camera_id)s
+              AND r.bucket_start >= %(period_start)s
+              AND r.bucket_start < %(period_end)s
+        ) a
+        CROSS JOIN (
+            SELECT COALESCE(SUM(d.vehicle_count * COALESCE(w.esal_value, 0)), 0) AS cumulative_esal
+            FROM detection_rollup_daily d
+            LEFT JOIN esal_weights w ON w.vehicle_type = d.vehicle_type
+            WHERE d.camera_id = %(camera_id)s
+        ) c
+    """
+
+    @staticmethod
+    def weight_rows() -> List[Tuple[str, float, str]]:
+        """esal_weights 테이블 내용 (ESAL_VALUES 기준)"""
+        return [
+            (vehicle_type, float(value), ESAL_VEHICLE_GROUPS.get(vehicle_type, 'other'))
+            for vehicle_type, value in ESAL_VALUES.items()
+        ]
+
+    def sync_weights(self, cursor):
+        """ESAL_VALUES 변경 사항을 esal_weights 테이블에 반영"""
+        cursor.executemany("""
+            REPLACE INTO esal_weights (vehicle_type, esal_value, vehicle_group)
+            VALUES (%s, %s, %s)
+        """, self.weight_rows())
+
+    def window(self, period: str, now: datetime = None) -> Tuple[datetime, datetime]:
+        """
+        분석 구간 계산 (정시 단위, 현재 시간대 포함)
+
+        Raises:
+            ValueError: 지원하지 않는 분석 주기
+        """
+        if period not in self.ANALYSIS_WINDOWS:
+            raise ValueError(f"지원하지 않는 분석 주기: {period}")
+        now = now or datetime.now()
+        period_end = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        return period_end - self.ANALYSIS_WINDOWS[period], period_end
+
+    def build_params(self, camera_id: str, period: str, now: datetime = None) -> Dict:
+        """ANALYSIS_SQL 파라미터 생성"""
+        now = now or datetime.now()
+        period_start, period_end = self.window(period, now)
+        params = {
+            'now': now,
+            'today': now.date(),
+            'camera_id': camera_id,
+            'period': period,
+            'period_start': period_start,
+            'period_end': period_end,
+            'window_days': self.ANALYSIS_WINDOWS[period].total_seconds() / 86400.0,
+        }
+        params.update({key: float(value) for key, value in MAINTENANCE_THRESHOLDS.items()})
+        return params
+
+    def run(self, cursor, camera_id: str, period: str, now: datetime = None) -> Optional[Dict]:
+        """
+        ESAL 분석 실행 및 저장 (commit은 호출자가 수행)
+
+        Returns:
+            저장된 esal_analysis 행
+        """
+        cursor.execute(self.ANALYSIS_SQL, self.build_params(camera_id, period, now))
+        cursor.execute("SELECT * FROM esal_analysis WHERE id = %s", (cursor.lastrowid,))
+        return cursor.fetchone()
@@ -6,11 +6,23 @@ Traffic Database Manager for MariaDB/MySQL
 import pymysql
 import json
 import logging
+import threading
 from datetime import datetime, timedelta
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Sequence, Tuple, Any, Union
 
+from ..core.detection_batch import DetectionBatch
 from .schema import TrafficDatabaseSchema, ESAL_VALUES, MAINTENANCE_THRESHOLDS
+from .writer import DetectionWriteQueue
+from .pool import ConnectionPool
+from .camera_registry import CameraRegistry
+from .rollups import DetectionRollups
+from .esal_engine import ESALAnalysisEngine
+from .partitions import DetectionPartitionManager
+
+# DB 장애 시 탐지 결과를 임시 보관하는 저널 파일
+DEFAULT_JOURNAL_PATH = Path(__file__).parent.parent.parent.parent / "data" / "detection_journal.jsonl"
 
 class TrafficDatabaseManager:
     """교통 데이터베이스 관리 클래스 (MariaDB/MySQL)"""
@@ -32,8 +44,45 @@ class TrafficDatabaseManager:
         
         self.config = self._load_config(config_path)
         
+        # 정규화 기록 모드: vehicle_detections에 camera_id만 저장 (이름/위치는 조회 시 JOIN)
+        self.normalized_detections = self.config.get('normalized_detections', False)
+        
+        # 카메라 메타데이터 캐시 (탐지 결과 기록 시 camera_streams 조회 제거)
+        self.camera_registry = CameraRegistry(ttl=self.config.get('camera_cache_ttl', 300))
+        
+        # 카메라/시간/차종별 집계 테이블 관리
+        self.rollups = DetectionRollups()
+        self.esal_engine = ESALAnalysisEngine()
+        
+        # vehicle_detections 월 파티션 관리 (미래 파티션 생성, 보관 기간 지난 파티션 삭제)
+        self.partitions = DetectionPartitionManager(
+            months_ahead=self.config.get('partition_months_ahead', 3)
+        )
+        self._maintenance_thread = None
+        self._maintenance_stop = threading.Event()
+        self._maintenance_wake = threading.Event()
+        self._maintenance_callbacks = []  # 요청된 유지보수 완료 시 호출할 콜백
+        self._maintenance_lock = threading.Lock()
+        
+        # 비동기 탐지 결과 writer (필요할 때 생성)
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        
+        # 연결 풀 (pool_size: 최대 연결 수, pool_recycle: 연결 최대 수명)
+        self.pool = ConnectionPool(
+            self._create_connection,
+            min_size=self.config.get('pool_min_size', 1),
+            max_size=self.config.get('pool_size', 5),
+            max_lifetime=self.config.get('pool_recycle', 3600),
+            idle_timeout=self.config.get('pool_idle_timeout', 300),
+            checkout_timeout=self.config.get('pool_timeout', 10),
+        )
+        
         # 데이터베이스 초기화
         self._initialize_database()
+        self.pool.prefill()
+        self.get_camera_list()  # 카메라 캐시 미리 채우기
+        self._start_maintenance()
     
     def _load_config(self, config_path: Path) -> Dict:
         """설정 파일 로드"""
@@ -53,8 +102,8 @@ class TrafficDatabaseManager:
                 'charset': 'utf8mb4'
             }
     
-    def get_connection(self):
-        """MariaDB 연결 생성"""
+    def _create_connection(self):
+        """MariaDB 연결 생성 (연결 풀에서 사용)"""
         return pymysql.connect(
             host=self.config['host'],
             port=self.config['port'],
@@ -66,6 +115,28 @@ class TrafficDatabaseManager:
             cursorclass=pymysql.cursors.DictCursor
         )
     
+    def get_connection(self):
+        """
+        연결 풀에서 연결 대여
+        
+        반환된 연결은 기존 pymysql 연결처럼 사용하며, close() 호출 시 풀로 반환된다.
+        """
+        return self.pool.acquire()
+    
+    def connection(self):
+        """
+        연결 풀 컨텍스트 매니저
+        
+            with db_manager.connection() as conn:
+                cursor = conn.cursor()
+                ...
+        """
+        return self.pool.connection()
+    
+    def get_pool_stats(self) -> Dict:
+        """연결 풀 지표 (대기 시간, 대여 횟수 등)"""
+        return self.pool.get_stats()
+    
     def _initialize_database(self):
         """데이터베이스 테이블 및 인덱스 생성"""
         conn = None
@@ -77,6 +148,9 @@ class TrafficDatabaseManager:
             for table_sql in TrafficDatabaseSchema.get_all_tables():
                 cursor.execute(table_sql)
             
+            # 기존 테이블에 없는 열 추가
+            self._add_missing_columns(cursor)
+            
             # 모든 인덱스 생성 (이미 테이블에 포함됨)
             for index_sql in TrafficDatabaseSchema.get_all_indexes():
                 if index_sql.strip():  # 빈 문자열 체크
@@ -85,6 +159,12 @@ class TrafficDatabaseManager:
             # 기본 설정값 삽입
             self._insert_default_config(cursor)
             
+            # ESAL 가중치 테이블 동기화 (ESAL_VALUES 기준)
+            self.esal_engine.sync_weights(cursor)
+            
+            # 집계 테이블 최초 도입 시 기존 원본 데이터로 백필
+            self._backfill_rollups(cursor)
+            
             conn.commit()
             self.logger.info(f"데이터베이스 초기화 완료: {self.config['database']}")
             
@@ -97,6 +177,17 @@ class TrafficDatabaseManager:
             if conn:
                 conn.close()
     
+    def _add_missing_columns(self, cursor):
+        """ADDED_COLUMNS 중 테이블에 없는 열을 추가 (파티션 테이블도 ALTER TABLE로 추가됨)"""
+        for table, column, definition in TrafficDatabaseSchema.ADDED_COLUMNS:
+            cursor.execute("""
+                SELECT 1 FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+            """, (table, column))
+            if not cursor.fetchone():
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                self.logger.info(f"{table}.{column} 열 추가")
+    
     def _insert_default_config(self, cursor):
         """기본 시스템 설정값 삽입"""
         default_configs = [
@@ -113,6 +204,118 @@ class TrafficDatabaseManager:
                 VALUES (%s, %s, %s, %s)
             """, (key, value, type_, desc))
     
+    def _backfill_rollups(self, cursor):
+        """집계 테이블이 비어 있고 원본 데이터가 있으면 전체 재계산"""
+        cursor.execute("SELECT 1 FROM detection_rollup_daily LIMIT 1")
+        if cursor.fetchone():
+            return
+        cursor.execute("SELECT 1 FROM vehicle_detections LIMIT 1")
+        if not cursor.fetchone():
+            return
+        count = self.rollups.rebuild(cursor)
+        self.logger.info(f"집계 테이블 백필 완료: 탐지 결과 {count}건")
+    
+    def _start_maintenance(self):
+        """파티션/보관 기간 유지보수 스레드 시작 (시작 시 1회, 이후 maintenance_interval마다)"""
+        interval = self.config.get('maintenance_interval', 21600)
+        
+        def loop():
+            while not self._maintenance_stop.is_set():
+                with self._maintenance_lock:
+                    callbacks, self._maintenance_callbacks = self._maintenance_callbacks, []
+                report = self.run_partition_maintenance()
+                for callback in callbacks:
+                    try:
+                        callback(report)
+                    except Exception as e:
+                        self.logger.error(f"유지보수 완료 콜백 오류: {e}")
+                self._maintenance_wake.wait(interval)
+                self._maintenance_wake.clear()
+        
+        self._maintenance_thread = threading.Thread(target=loop, name="DetectionMaintenance", daemon=True)
+        self._maintenance_thread.start()
+    
+    def request_partition_maintenance(self, callback=None):
+        """
+        유지보수 스레드에서 파티션/보관 기간 유지보수를 즉시 실행하도록 요청 (논블로킹)
+        
+        파티션이 없는 테이블의 분할 DELETE는 오래 걸릴 수 있으므로 GUI 스레드에서
+        run_partition_maintenance()를 직접 호출하지 않고 이 메서드를 사용한다.
+        
+        Args:
+            callback: 완료 시 유지보수 스레드에서 report 딕셔너리로 호출됨
+        """
+        with self._maintenance_lock:
+            if callback is not None:
+                self._maintenance_callbacks.append(callback)
+        self._maintenance_wake.set()
+    
+    def get_retention_days(self) -> int:
+        """system_config의 database_cleanup_days (데이터 보관 기간, 일)"""
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT config_value FROM system_config WHERE config_key = 'database_cleanup_days'"
+            )
+            row = cursor.fetchone()
+            return int(row['config_value']) if row else 365
+            
+        except Exception as e:
+            self.logger.warning(f"보관 기간 설정 조회 실패, 기본값 사용: {e}")
+            return 365
+        finally:
+            if conn:
+                conn.close()
+    
+    def run_partition_maintenance(self, today=None) -> Dict:
+        """
+        vehicle_detections 파티션 유지보수 실행
+        
+        미래 월 파티션을 만들고 database_cleanup_days가 지난 파티션을 삭제한다.
+        파티션이 없는 테이블은 만료 행을 분할 DELETE로 정리한다.
+        집계 테이블은 보관 기간과 무관하게 유지된다.
+        
+        Returns:
+            {'partitioned', 'created', 'dropped', 'deleted_rows'} (실패 시 빈 딕셔너리)
+        """
+        retention_days = self.get_retention_days()
+        conn = None
+        try:
+            conn = self.get_connection()
+            report = self.partitions.maintain(conn, retention_days, today)
+            if report['created'] or report['dropped'] or report['deleted_rows']:
+                self.logger.info(
+                    f"파티션 유지보수: 생성 {report['created']}, 삭제 {report['dropped']}, "
+                    f"삭제된 행 {report['deleted_rows']}"
+                )
+            return report
+            
+        except Exception as e:
+            self.logger.error(f"파티션 유지보수 실패: {e}")
+            return {}
+        finally:
+            if conn:
+                conn.close()
+    
+    def migrate_detections_to_partitioned(self) -> bool:
+        """
+        기존 vehicle_detections를 월 파티션 테이블로 변환 (테이블 전체 복사, 서비스 중지 시간에 실행)
+        """
+        conn = None
+        try:
+            conn = self.get_connection()
+            self.partitions.migrate(conn)
+            self.logger.info("vehicle_detections 파티션 변환 완료")
+        except Exception as e:
+            self.logger.error(f"vehicle_detections 파티션 변환 실패: {e}")
+            return False
+        finally:
+            if conn:
+                conn.close()
+        return bool(self.run_partition_maintenance())
+    
     def add_camera_stream(self, camera_id: str, name: str, location: str, 
                          stream_url: str = None, **kwargs) -> bool:
         """카메라 스트림 정보 추가"""
@@ -134,6 +337,7 @@ class TrafficDatabaseManager:
             ))
             
             conn.commit()
+            self.camera_registry.put(camera_id, {'name': name, 'location': location})
             self.logger.info(f"카메라 스트림 추가: {camera_id} - {name}")
             return True
             
@@ -175,9 +379,26 @@ class TrafficDatabaseManager:
             if conn:
                 conn.close()
     
-    def record_vehicle_detection(self, camera_id: str, detections: List[Dict]) -> bool:
-        """차량 탐지 결과 기록 (배치 처리)"""
-        if not detections:
+    def record_vehicle_detection(self, camera_id: str, detections) -> bool:
+        """차량 탐지 결과 기록 (DetectionBatch 또는 탐지 딕셔너리 리스트)"""
+        if not isinstance(detections, DetectionBatch):
+            detections = DetectionBatch.from_records(detections)
+        if not len(detections):
+            return True
+        
+        return self.record_vehicle_detections_bulk([(camera_id, detections)])
+    
+    def record_vehicle_detections_bulk(self, rows: List[Tuple[str, DetectionBatch]]) -> bool:
+        """
+        여러 카메라의 차량 탐지 결과를 한 번의 트랜잭션으로 기록
+        
+        INSERT 파라미터는 배치의 열을 리스트로 변환한 뒤 zip으로 묶어 만든다.
+        
+        Args:
+            rows: [(camera_id, DetectionBatch), ...]
+        """
+        rows = [(camera_id, detections) for camera_id, detections in rows if len(detections)]
+        if not rows:
             return True
         
         conn = None
@@ -185,50 +406,63 @@ class TrafficDatabaseManager:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            # 카메라 정보 조회
-            cursor.execute("""
-                SELECT name, location FROM camera_streams WHERE id = %s
-            """, (camera_id,))
-            
-            camera_info = cursor.fetchone()
-            if not camera_info:
-                self.logger.warning(f"카메라 정보를 찾을 수 없음: {camera_id}")
-                camera_name = "Unknown"
-                camera_location = "Unknown"
-            else:
-                camera_name = camera_info['name']
-                camera_location = camera_info['location']
+            # 카메라 정보는 캐시에서 조회 (정규화 모드에서는 필요 없음)
+            camera_info = {}
+            if not self.normalized_detections:
+                camera_info = self._resolve_cameras(cursor, {camera_id for camera_id, _ in rows})
             
-            # 배치 INSERT
+            # 배치 INSERT (열 단위로 변환 후 행 튜플로 묶음)
+            now = datetime.now()
             insert_data = []
-            for det in detections:
-                insert_data.append((
-                    camera_id,
-                    camera_name,
-                    camera_location,
-                    det.get('frame_number'),
-                    det['vehicle_type'],
-                    det.get('vehicle_class'),
-                    det['confidence'],
-                    det['bbox_x'],
-                    det['bbox_y'],
-                    det['bbox_width'],
-                    det['bbox_height'],
-                    det.get('roi_id'),
-                    det.get('roi_name')
+            rollup_rows = []
+            total = 0
+            for camera_id, detections in rows:
+                count = len(detections)
+                total += count
+                detections.stamp(now)
+                if self.normalized_detections:
+                    name = location = None
+                else:
+                    info = camera_info.get(camera_id)
+                    name = info['name'] if info else "Unknown"
+                    location = info['location'] if info else "Unknown"
+                timestamps = detections.timestamps()
+                vehicle_types = detections.vehicle_types()
+                bbox_x, bbox_y, bbox_width, bbox_height = detections.boxes.T.tolist()
+                rollup_rows.extend(zip(repeat(camera_id, count), timestamps, vehicle_types))
+                insert_data.extend(zip(
+                    timestamps,
+                    repeat(camera_id, count),
+                    repeat(name, count),
+                    repeat(location, count),
+                    detections.frame_numbers(),
+                    vehicle_types,
+                    detections.vehicle_classes(),
+                    detections.conf.tolist(),
+                    detections.track_ids(),
+                    detections.directions(),
+                    bbox_x,
+                    bbox_y,
+                    bbox_width,
+                    bbox_height,
+                    repeat(None, count),  # roi_id
+                    repeat(None, count)   # roi_name
                 ))
             
             cursor.executemany("""
                 INSERT INTO vehicle_detections 
-                (camera_id, camera_name, camera_location, frame_number,
-                 vehicle_type, vehicle_class, confidence,
+                (timestamp, camera_id, camera_name, camera_location, frame_number,
+                 vehicle_type, vehicle_class, confidence, track_id, direction,
                  bbox_x, bbox_y, bbox_width, bbox_height,
                  roi_id, roi_name)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """, insert_data)
             
+            # 집계 테이블을 같은 트랜잭션에서 갱신 (원본과 집계가 항상 일치)
+            self.rollups.apply(cursor, rollup_rows)
+            
             conn.commit()
-            self.logger.info(f"차량 탐지 결과 {len(detections)}건 기록 완료")
+            self.logger.info(f"차량 탐지 결과 {total}건 기록 완료")
             return True
             
         except Exception as e:
@@ -239,56 +473,231 @@ class TrafficDatabaseManager:
         finally:
             if conn:
                 conn.close()
+    
+    def _resolve_cameras(self, cursor, camera_ids) -> Dict[str, Optional[Dict]]:
+        """
+        카메라 정보 조회 (캐시 우선)
+        
+        캐시에 없거나 만료된 카메라가 있을 때만 camera_streams 전체를 한 번 다시 읽어
+        캐시를 갱신한다. 등록되지 않은 카메라는 None으로 캐시하여 반복 조회를 막는다.
+        """
+        found, missing = self.camera_registry.lookup(camera_ids)
+        if not missing:
+            return found
+        
+        self._fetch_cameras(cursor)
+        refreshed, _ = self.camera_registry.lookup(missing)
+        for camera_id in missing:
+            info = refreshed.get(camera_id)
+            if info is None:
+                self.logger.warning(f"카메라 정보를 찾을 수 없음: {camera_id}")
+                self.camera_registry.put(camera_id, None)
+            found[camera_id] = info
+        return found
+    
+    def _fetch_cameras(self, cursor) -> List[Dict]:
+        """camera_streams 전체 조회 후 카메라 캐시 갱신"""
+        cursor.execute("""
+            SELECT id, name, location, is_active, created_at
+            FROM camera_streams
+            ORDER BY created_at DESC
+        """)
+        cameras = cursor.fetchall() or []
+        self.camera_registry.put_many(cameras)
+        return list(cameras)
+    
+    def invalidate_camera_cache(self, camera_id: str = None):
+        """카메라 캐시 무효화 (외부에서 camera_streams를 수정한 경우)"""
+        self.camera_registry.invalidate(camera_id)
+    
+    def get_detection_writer(self) -> DetectionWriteQueue:
+        """비동기 탐지 결과 writer (최초 호출 시 생성 및 시작)"""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = DetectionWriteQueue(
+                    self,
+                    max_queue=self.config.get('write_queue_size', 10000),
+                    batch_size=self.config.get('write_batch_size', 200),
+                    flush_interval=self.config.get('write_flush_interval', 2.0),
+                    journal_path=self.config.get('journal_path', DEFAULT_JOURNAL_PATH),
+                )
+                self._writer.start()
+            return self._writer
+    
+    def enqueue_vehicle_detections(self, camera_id: str, detections) -> int:
+        """
+        차량 탐지 결과를 비동기 writer 큐에 추가 (호출 스레드를 블록하지 않음)
+        
+        Returns:
+            메모리 큐에 들어간 건수 (나머지는 디스크 저널로 기록됨)
+        """
+        return self.get_detection_writer().enqueue(camera_id, detections)
+    
+    def get_writer_stats(self) -> Dict:
+        """비동기 writer 지표 (writer가 없으면 빈 딕셔너리)"""
+        return self._writer.get_stats() if self._writer else {}
+    
+    def close(self):
+        """백그라운드 writer/유지보수 스레드 종료 (남은 탐지 결과 flush) 및 연결 풀 정리"""
+        self._maintenance_stop.set()
+        self._maintenance_wake.set()
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer:
+            writer.stop()
+        self.pool.close_all()
 
     def get_detection_statistics(self, camera_id: str = None, 
                                  start_date: datetime = None,
                                  end_date: datetime = None) -> Dict:
-        """탐지 통계 조회"""
+        """탐지 통계 조회 (집계 테이블 사용, 시간 단위 정밀도)"""
+        stats = self.get_vehicle_counts(start_date, end_date, camera_id)
+        return {
+            'total': stats['total'],
+            'by_vehicle_type': stats['by_vehicle_type']
+        }
+    
+    def get_vehicle_counts(self, start: datetime = None, end: datetime = None,
+                           camera_id: Union[str, Sequence[str]] = None) -> Dict:
+        """
+        차종별 탐지 수 및 ESAL 조회 (집계 테이블 사용)
+        
+        Args:
+            start: 시작 시각 (None이면 전체 기간)
+            end: 종료 시각 (None이면 현재까지)
+            camera_id: 카메라 ID 또는 ID 목록 (None이면 전체 카메라)
+            
+        Returns:
+            {'total', 'by_vehicle_type', 'total_esal', 'esal_by_vehicle_type'}
+        """
         conn = None
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
+            return self.rollups.query_counts(cursor, start, end, camera_id)
             
-            # 기본 쿼리
-            query = """
-                SELECT 
-                    COUNT(*) as total_count,
-                    vehicle_type,
-                    COUNT(*) as count
-                FROM vehicle_detections
-                WHERE 1=1
-            """
-            params = []
-            
-            # 조건 추가
-            if camera_id:
-                query += " AND camera_id = %s"
-                params.append(camera_id)
-            
-            if start_date:
-                query += " AND timestamp >= %s"
-                params.append(start_date)
-            
-            if end_date:
-                query += " AND timestamp <= %s"
-                params.append(end_date)
-            
-            query += " GROUP BY vehicle_type"
-            
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            
-            # Organize statistics
-            stats = {
-                'total': sum(r['count'] for r in results),
-                'by_vehicle_type': {r['vehicle_type']: r['count'] for r in results}
-            }
+        except Exception as e:
+            self.logger.error(f"Failed to get statistics: {e}")
+            return {'total': 0, 'by_vehicle_type': {}, 'total_esal': 0.0, 'esal_by_vehicle_type': {}}
+        finally:
+            if conn:
+                conn.close()
+    
+    def find_camera_ids(self, name_query: str) -> List[str]:
+        """
+        이름에 검색어가 포함된 카메라 ID 목록 (camera_streams 기준)
+        
+        Args:
+            name_query: 카메라 이름 검색어 (부분 일치)
+        """
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM camera_streams WHERE name LIKE %s", (f"%{name_query}%",))
+            return [row['id'] for row in cursor.fetchall()]
+            
+        except Exception as e:
+            self.logger.error(f"Failed to find cameras: {e}")
+            return []
+        finally:
+            if conn:
+                conn.close()
+    
+    def get_today_counts(self, camera_id: str = None) -> Dict:
+        """오늘(자정 이후) 차종별 탐지 수 및 ESAL"""
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+        return self.get_vehicle_counts(today, None, camera_id)
+    
+    def rebuild_rollups(self, start_date=None, end_date=None) -> int:
+        """
+        원본 테이블로부터 집계 테이블 재계산 (날짜 단위, 양 끝 포함)
+        
+        Args:
+            start_date: 시작 날짜 (None이면 원본의 최초 날짜)
+            end_date: 종료 날짜 (None이면 원본의 마지막 날짜)
+            
+        Returns:
+            재계산에 사용된 탐지 행 수 (실패 시 -1)
+        """
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            count = self.rollups.rebuild(cursor, start_date, end_date)
+            conn.commit()
+            self.logger.info(f"집계 테이블 재계산 완료: 탐지 결과 {count}건")
+            return count
+            
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            self.logger.error(f"집계 테이블 재계산 실패: {e}")
+            return -1
+        finally:
+            if conn:
+                conn.close()
+    
+    def calculate_esal_analysis(self, camera_id: str, period: str = 'daily') -> Optional[Dict]:
+        """
+        ESAL 분석 실행 후 esal_analysis 테이블에 저장
+        
+        집계 테이블과 ESAL 가중치 테이블을 조인한 단일 INSERT ... SELECT로 계산한다.
+        
+        Args:
+            camera_id: 카메라 ID
+            period: 분석 주기 (hourly, daily, weekly, monthly)
             
-            return stats
+        Returns:
+            저장된 분석 결과 (실패 시 None)
+        """
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            result = self.esal_engine.run(cursor, camera_id, period)
+            conn.commit()
+            self.logger.info(f"ESAL 분석 완료: {camera_id} ({period})")
+            return result
             
         except Exception as e:
-            self.logger.error(f"Failed to get statistics: {e}")
-            return {'total': 0, 'by_vehicle_type': {}}
+            if conn:
+                conn.rollback()
+            self.logger.error(f"ESAL 분석 실패: {e}")
+            return None
+        finally:
+            if conn:
+                conn.close()
+    
+    def clear_detections(self) -> int:
+        """
+        모든 탐지 결과와 집계 삭제
+        
+        Returns:
+            삭제된 탐지 결과 수
+        """
+        count = self.get_vehicle_counts()['total']
+        
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            for table in ('vehicle_detections', 'detection_rollup_hourly', 'detection_rollup_daily'):
+                try:
+                    # TRUNCATE is faster and avoids row-level locking
+                    cursor.execute(f"TRUNCATE TABLE {table}")
+                except Exception as truncate_error:
+                    self.logger.warning(f"TRUNCATE 실패, DELETE 사용 ({table}): {truncate_error}")
+                    cursor.execute(f"DELETE FROM {table}")
+            conn.commit()
+            self.logger.info(f"탐지 결과 {count}건 삭제")
+            return count
+            
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            self.logger.error(f"탐지 결과 삭제 실패: {e}")
+            raise
         finally:
             if conn:
                 conn.close()
@@ -307,11 +716,11 @@ class TrafficDatabaseManager:
                 'latest_detection': None
             }
             
-            # Total detections
-            cursor.execute("SELECT COUNT(*) as count FROM vehicle_detections")
+            # Total detections (from daily rollups)
+            cursor.execute("SELECT COALESCE(SUM(vehicle_count), 0) as count FROM detection_rollup_daily")
             result = cursor.fetchone()
             if result:
-                status['total_detections'] = result['count']
+                status['total_detections'] = int(result['count'])
             
             # Total cameras
             cursor.execute("SELECT COUNT(*) as count FROM camera_streams WHERE is_active = 1")
@@ -347,14 +756,7 @@ class TrafficDatabaseManager:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            cursor.execute("""
-                SELECT id, name, location, is_active, created_at
-                FROM camera_streams
-                ORDER BY created_at DESC
-            """)
-            
-            cameras = cursor.fetchall()
-            return cameras if cameras else []
+            return self._fetch_cameras(cursor)
             
         except Exception as e:
             self.logger.error(f"Failed to get camera list: {e}")
@@ -0,0 +1,209 @@
+"""
+vehicle_detections 월 단위 파티션 관리
+Monthly Partition Maintenance for vehicle_detections
+
+timestamp 기준 RANGE 파티션(pYYYYMM)을 미리 만들고, 보관 기간
+(system_config.database_cleanup_days)이 지난 파티션을 DROP PARTITION으로 삭제한다.
+파티션이 없는 기존 테이블은 보관 기간 정리를 분할 DELETE로 대신한다.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+
+def month_start(value: date) -> date:
+    """해당 월의 1일"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """월 단위 이동 (1일 기준)"""
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class DetectionPartitionManager:
+    """
+    vehicle_detections 파티션 유지보수
+
+    - 파티션 이름은 pYYYYMM, 상한은 다음 달 1일 (VALUES LESS THAN TO_DAYS(...))
+    - 항상 마지막에 p_future (MAXVALUE) 파티션을 두고, 새 월 파티션은
+      p_future를 REORGANIZE하여 만든다 (p_future가 비어 있으면 메타데이터 작업)
+    - 상한이 보관 기준일 이전인 파티션만 삭제하므로 보관 기간 내 데이터는 남는다
+    """
+
+    TABLE = 'vehicle_detections'
+    FUTURE_PARTITION = 'p_future'
+
+    def __init__(self, months_ahead: int = 3, delete_chunk_size: int = 10000):
+        """
+        Args:
+            months_ahead: 미리 만들어 둘 미래 월 파티션 수
+            delete_chunk_size: 파티션이 없는 테이블에서 한 번에 삭제할 행 수
+        """
+        self.logger = logging.getLogger(__name__)
+        self.months_ahead = max(1, months_ahead)
+        self.delete_chunk_size = max(1, delete_chunk_size)
+
+    @staticmethod
+    def partition_name(month: date) -> str:
+        return f"p{month:%Y%m}"
+
+    @staticmethod
+    def parse_partition_name(name: str) -> Optional[date]:
+        """pYYYYMM -> 해당 월 1일 (월 파티션이 아니면 None)"""
+        try:
+            if len(name) == 7 and name.startswith('p'):
+                return date(int(name[1:5]), int(name[5:7]), 1)
+        except ValueError:
+            pass
+        return None
+
+    def plan(self, existing: List[date], today: date, retention_days: int,
+             first_month: date = None) -> Tuple[List[date], List[date]]:
+        """
+        생성/삭제할 월 파티션 계산
+
+        Args:
+            existing: 현재 월 파티션 (각 월의 1일)
+            today: 기준 날짜
+            retention_days: 보관 기간(일), 0 이하면 삭제하지 않음
+            first_month: 월 파티션이 하나도 없을 때 시작할 월 (기존 데이터의 최초 월)
+
+        Returns:
+            (create, drop) - 각 월의 1일 리스트
+        """
+        existing = sorted(existing)
+        horizon = add_months(month_start(today), self.months_ahead)
+
+        if existing:
+            start = add_months(existing[-1], 1)
+        else:
+            start = month_start(min(first_month or today, today))
+
+        create = []
+        month = start
+        while month <= horizon:
+            create.append(month)
+            month = add_months(month, 1)
+
+        drop = []
+        if retention_days > 0:
+            cutoff = today - timedelta(days=retention_days)
+            # 파티션 상한(다음 달 1일)이 기준일 이하이면 전체가 만료된 파티션
+            drop = [m for m in existing if add_months(m, 1) <= cutoff]
+        return create, drop
+
+    def list_partitions(self, cursor) -> List[str]:
+        """vehicle_detections의 파티션 이름 (파티션이 없으면 빈 리스트)"""
+        cursor.execute("""
+            SELECT PARTITION_NAME AS name
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+              AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """, (self.TABLE,))
+        return [row['name'] for row in cursor.fetchall()]
+
+    def maintain(self, conn, retention_days: int, today: date = None) -> Dict:
+        """
+        미래 파티션 생성 및 만료 파티션 삭제
+
+        Args:
+            conn: DB 연결 (ALTER TABLE은 자동 commit됨)
+            retention_days: 보관 기간(일)
+            today: 기준 날짜 (None이면 오늘)
+
+        Returns:
+            {'partitioned', 'created', 'dropped', 'deleted_rows'}
+        """
+        today = today or datetime.now().date()
+        cursor = conn.cursor()
+        report = {'partitioned': False, 'created': [], 'dropped': [], 'deleted_rows': 0}
+
+        names = self.list_partitions(cursor)
+        if not names:
+            # 파티션이 없는 기존 테이블: 분할 DELETE로 보관 기간 적용
+            report['deleted_rows'] = self._delete_expired(conn, cursor, retention_days, today)
+            return report
+
+        report['partitioned'] = True
+        monthly = [m for m in (self.parse_partition_name(n) for n in names) if m]
+
+        first_month = None
+        if not monthly:
+            cursor.execute(f"SELECT MIN(timestamp) AS first FROM {self.TABLE}")
+            row = cursor.fetchone()
+            if row and row.get('first'):
+                first_month = row['first'].date()
+
+        create, drop = self.plan(monthly, today, retention_days, first_month)
+
+        if create and self.FUTURE_PARTITION in names:
+            definitions = ", ".join(
+                f"PARTITION {self.partition_name(m)} VALUES LESS THAN (TO_DAYS('{add_months(m, 1):%Y-%m-%d}'))"
+                for m in create
+            )
+            cursor.execute(
+                f"ALTER TABLE {self.TABLE} REORGANIZE PARTITION {self.FUTURE_PARTITION} INTO "
+                f"({definitions}, PARTITION {self.FUTURE_PARTITION} VALUES LESS THAN MAXVALUE)"
+            )
+            report['created'] = [self.partition_name(m) for m in create]
+
+        if drop:
+            dropped = [self.partition_name(m) for m in drop]
+            cursor.execute(f"ALTER TABLE {self.TABLE} DROP PARTITION {', '.join(dropped)}")
+            report['dropped'] = dropped
+
+        return report
+
+    def _delete_expired(self, conn, cursor, retention_days: int, today: date) -> int:
+        """파티션이 없는 테이블의 만료 행을 작은 단위로 나눠 삭제 (긴 잠금 방지)"""
+        if retention_days <= 0:
+            return 0
+        cutoff = datetime.combine(today - timedelta(days=retention_days), datetime.min.time())
+        deleted = 0
+        while True:
+            cursor.execute(f"DELETE FROM {self.TABLE} WHERE timestamp < %s LIMIT {self.delete_chunk_size}",
+                           (cutoff,))
+            conn.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < self.delete_chunk_size:
+                return deleted
+
+    def migrate(self, conn):
+        """
+        기존 (파티션 없는) vehicle_detections를 파티션 테이블로 변환
+
+        테이블 전체를 복사하는 작업이므로 서비스 중지 시간에 실행해야 한다.
+        파티션 테이블은 외래 키를 지원하지 않으므로 roi_id 외래 키를 제거한다.
+        테이블을 제자리에서 변환하므로 열(track_id, direction 포함)은 그대로 유지된다.
+        """
+        cursor = conn.cursor()
+        if self.list_partitions(cursor):
+            return
+
+        cursor.execute("""
+            SELECT CONSTRAINT_NAME AS name
+            FROM information_schema.REFERENTIAL_CONSTRAINTS
+            WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """, (self.TABLE,))
+        for row in cursor.fetchall():
+            cursor.execute(f"ALTER TABLE {self.TABLE} DROP FOREIGN KEY {row['name']}")
+
+        cursor.execute(f"UPDATE {self.TABLE} SET timestamp = NOW() WHERE timestamp IS NULL")
+        conn.commit()
+        cursor.execute(f"""
+            ALTER TABLE {self.TABLE}
+                MODIFY id BIGINT NOT NULL AUTO_INCREMENT,
+                MODIFY timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                DROP PRIMARY KEY,
+                ADD PRIMARY KEY (id, timestamp)
+        """)
+        cursor.execute(f"""
+            ALTER TABLE {self.TABLE}
+            PARTITION BY RANGE (TO_DAYS(timestamp)) (
+                PARTITION {self.FUTURE_PARTITION} VALUES LESS THAN MAXVALUE
+            )
+        """)
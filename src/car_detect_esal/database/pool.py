@@ -0,0 +1,304 @@
+"""
+스레드 안전 데이터베이스 연결 풀
+Thread-safe Database Connection Pool
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List
+
+
+class PoolTimeoutError(RuntimeError):
+    """풀에서 제한 시간 안에 연결을 얻지 못함"""
+
+
+class _PoolEntry:
+    """풀이 관리하는 실제 연결과 메타데이터"""
+
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn: Any):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """
+    풀에서 대여한 연결 래퍼
+
+    기존 pymysql 연결과 동일하게 사용하며, close()를 호출하면 연결을 끊지 않고
+    풀로 반환한다. 컨텍스트 매니저로 사용하면 블록 종료 시 자동 반환된다.
+    """
+
+    def __init__(self, pool: 'ConnectionPool', entry: _PoolEntry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        entry = self.__dict__.get('_entry')
+        if entry is None:
+            raise AttributeError(f"반환된 연결입니다: {name}")
+        return getattr(entry.conn, name)
+
+    def close(self):
+        """연결을 풀로 반환"""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    최소/최대 크기, 상태 확인(ping/reconnect), 유휴 연결 정리를 지원하는 연결 풀
+
+    - 유휴 연결은 health_check_interval보다 오래 쉬었으면 대여 전에 ping으로 확인
+    - max_lifetime을 넘긴 연결은 폐기 후 새로 생성 (pool_recycle)
+    - idle_timeout을 넘긴 유휴 연결은 min_size까지 정리
+    - 반환 시 rollback으로 열린 트랜잭션/읽기 스냅샷을 정리
+    """
+
+    def __init__(self, factory: Callable[[], Any], min_size: int = 1, max_size: int = 5,
+                 max_lifetime: float = 3600.0, idle_timeout: float = 300.0,
+                 checkout_timeout: float = 10.0, health_check_interval: float = 30.0):
+        """
+        Args:
+            factory: 새 연결을 만드는 함수
+            min_size: 유지할 최소 유휴 연결 수
+            max_size: 동시에 열 수 있는 최대 연결 수
+            max_lifetime: 연결 최대 수명(초)
+            idle_timeout: 유휴 연결 정리 기준 시간(초)
+            checkout_timeout: 연결 대여 최대 대기 시간(초)
+            health_check_interval: 이 시간 이상 쉰 연결은 대여 전 ping 확인(초)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.factory = factory
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+
+        self._cond = threading.Condition()
+        self._idle: List[_PoolEntry] = []
+        self._size = 0  # 열려 있는 전체 연결 수 (대여 중 + 유휴)
+        self._closed = False
+
+        # 지표
+        self.checkouts = 0
+        self.waits = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.created = 0
+        self.discarded = 0
+        self.ping_failures = 0
+        self.timeouts = 0
+
+    def acquire(self, timeout: float = None) -> PooledConnection:
+        """
+        연결 대여
+
+        Raises:
+            PoolTimeoutError: 제한 시간 안에 연결을 얻지 못한 경우
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        waited = False
+
+        while True:
+            entry = None
+            create = False
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("연결 풀이 닫혔습니다")
+                self._evict_idle_locked()
+
+                if self._idle:
+                    entry = self._idle.pop()  # 최근에 쓴 연결 우선 (LIFO)
+                elif self._size < self.max_size:
+                    self._size += 1
+                    create = True
+                else:
+                    remaining = timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeoutError(
+                            f"연결 풀 대기 시간 초과 ({timeout:.1f}s, 최대 {self.max_size}개 사용 중)")
+                    waited = True
+                    self._cond.wait(remaining)
+                    continue
+
+            if create:
+                try:
+                    entry = _PoolEntry(self.factory())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self.created += 1
+            elif not self._validate(entry):
+                self._discard(entry)
+                continue
+
+            wait_time = time.monotonic() - start
+            with self._cond:
+                self.checkouts += 1
+                if waited:
+                    self.waits += 1
+                self.total_wait_time += wait_time
+                self.max_wait_time = max(self.max_wait_time, wait_time)
+            return PooledConnection(self, entry)
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """
+        컨텍스트 매니저 API
+
+            with pool.connection() as conn:
+                cursor = conn.cursor()
+                ...
+                conn.commit()
+
+        예외가 발생하면 rollback 후 반환한다.
+        """
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            conn.close()
+
+    def release(self, entry: _PoolEntry):
+        """연결 반환 (PooledConnection.close에서 호출)"""
+        try:
+            # 커밋되지 않은 작업/읽기 스냅샷 정리
+            entry.conn.rollback()
+        except Exception:
+            self._discard(entry)
+            return
+
+        now = time.monotonic()
+        if self._closed or now - entry.created_at >= self.max_lifetime:
+            self._discard(entry)
+            return
+
+        entry.last_used = now
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def prefill(self):
+        """min_size만큼 유휴 연결을 미리 생성"""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                entry = _PoolEntry(self.factory())
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self.created += 1
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def close_all(self):
+        """유휴 연결을 모두 닫고 풀 종료 (대여 중인 연결은 반환 시 닫힘)"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for entry in idle:
+            self._discard(entry)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """풀 지표 반환"""
+        with self._cond:
+            idle = len(self._idle)
+            size = self._size
+        return {
+            'size': size,
+            'idle': idle,
+            'in_use': size - idle,
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'checkouts': self.checkouts,
+            'waits': self.waits,
+            'timeouts': self.timeouts,
+            'avg_wait_time': self.total_wait_time / self.checkouts if self.checkouts else 0.0,
+            'max_wait_time': self.max_wait_time,
+            'created': self.created,
+            'discarded': self.discarded,
+            'ping_failures': self.ping_failures,
+        }
+
+    def _validate(self, entry: _PoolEntry) -> bool:
+        """대여 전 연결 상태 확인 (수명 초과/오래 쉰 연결 ping)"""
+        now = time.monotonic()
+        if now - entry.created_at >= self.max_lifetime:
+            return False
+        if now - entry.last_used < self.health_check_interval:
+            return True
+        try:
+            entry.conn.ping(reconnect=True)
+            return True
+        except Exception as e:
+            self.ping_failures += 1
+            self.logger.warning(f"연결 상태 확인 실패, 폐기: {e}")
+            return False
+
+    def _discard(self, entry: _PoolEntry):
+        """연결을 닫고 풀 크기에서 제외"""
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self.discarded += 1
+            self._cond.notify()
+
+    def _evict_idle_locked(self):
+        """idle_timeout을 넘긴 유휴 연결 정리 (min_size 유지, 락 보유 상태에서 호출)"""
+        if not self._idle:
+            return
+        now = time.monotonic()
+        keep = []
+        evict = []
+        # 오래된 연결부터 검사
+        for entry in self._idle:
+            if now - entry.last_used >= self.idle_timeout and len(self._idle) - len(evict) > self.min_size:
+                evict.append(entry)
+            else:
+                keep.append(entry)
+        if not evict:
+            return
+        self._idle = keep
+        for entry in evict:
+            try:
+                entry.conn.close()
+            except Exception:
+                pass
+            self._size -= 1
+            self.discarded += 1
@@ -0,0 +1,230 @@
+"""
+탐지 결과 집계(rollup) 관리
+Detection Rollup Maintenance
+
+vehicle_detections 원본 테이블 대신 카메라/시간/차종별로 미리 집계한
+detection_rollup_hourly, detection_rollup_daily 테이블을 유지하여
+대시보드 통계 조회가 원본 테이블 크기와 무관하게 동작하도록 한다.
+"""
+
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+from .schema import ESAL_VALUES
+
+
+def esal_weight(vehicle_type: str) -> float:
+    """
+    차종별 차량당 ESAL 값 (ESALCalculator와 동일한 매칭 규칙)
+
+    Args:
+        vehicle_type: 차량 클래스명
+
+    Returns:
+        차량당 ESAL 값 (매칭되지 않으면 0)
+    """
+    name = (vehicle_type or '').lower()
+    value = ESAL_VALUES.get(name)
+    if value is not None:
+        return float(value)
+    for key, value in ESAL_VALUES.items():
+        if key in name:
+            return float(value)
+    return 0.0
+
+
+def _hour_floor(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+class DetectionRollups:
+    """
+    시간/일 단위 집계 테이블 관리
+
+    - apply(): 탐지 결과 INSERT와 같은 트랜잭션에서 집계값을 증가 (INSERT ... ON DUPLICATE KEY UPDATE)
+    - rebuild(): 원본 테이블로부터 집계를 다시 계산 (최초 도입 시 백필, 불일치 복구용)
+    - query_counts(): 집계 테이블만으로 기간별 차종 통계 조회
+    """
+
+    HOURLY_UPSERT = """
+        INSERT INTO detection_rollup_hourly
+        (camera_id, bucket_start, vehicle_type, vehicle_count, esal_total)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            vehicle_count = vehicle_count + VALUES(vehicle_count),
+            esal_total = esal_total + VALUES(esal_total)
+    """
+
+    DAILY_UPSERT = """
+        INSERT INTO detection_rollup_daily
+        (camera_id, bucket_date, vehicle_type, vehicle_count, esal_total)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            vehicle_count = vehicle_count + VALUES(vehicle_count),
+            esal_total = esal_total + VALUES(esal_total)
+    """
+
+    @staticmethod
+    def aggregate(rows: Iterable[Tuple[str, datetime, str]]) -> Tuple[List[tuple], List[tuple]]:
+        """
+        탐지 행을 시간/일 단위 버킷으로 집계
+
+        Args:
+            rows: [(camera_id, timestamp, vehicle_type), ...]
+
+        Returns:
+            (hourly_params, daily_params) - 각 UPSERT 문의 executemany 파라미터
+        """
+        hourly: Dict[tuple, int] = {}
+        for camera_id, timestamp, vehicle_type in rows:
+            key = (camera_id, _hour_floor(timestamp), vehicle_type)
+            hourly[key] = hourly.get(key, 0) + 1
+        return DetectionRollups._to_params(hourly)
+
+    @staticmethod
+    def _to_params(hourly: Dict[tuple, int]) -> Tuple[List[tuple], List[tuple]]:
+        """{(camera_id, bucket_start, vehicle_type): count} -> UPSERT 파라미터"""
+        daily: Dict[tuple, int] = {}
+        hourly_params = []
+        for (camera_id, bucket_start, vehicle_type), count in sorted(hourly.items()):
+            hourly_params.append((camera_id, bucket_start, vehicle_type, count,
+                                  count * esal_weight(vehicle_type)))
+            day_key = (camera_id, bucket_start.date(), vehicle_type)
+            daily[day_key] = daily.get(day_key, 0) + count
+
+        daily_params = [
+            (camera_id, bucket_date, vehicle_type, count, count * esal_weight(vehicle_type))
+            for (camera_id, bucket_date, vehicle_type), count in sorted(daily.items())
+        ]
+        return hourly_params, daily_params
+
+    def apply(self, cursor, rows: Iterable[Tuple[str, datetime, str]]):
+        """
+        새로 기록한 탐지 행을 집계 테이블에 반영 (호출자의 트랜잭션 안에서 실행)
+
+        Args:
+            cursor: 탐지 결과 INSERT에 사용한 커서
+            rows: [(camera_id, timestamp, vehicle_type), ...]
+        """
+        hourly_params, daily_params = self.aggregate(rows)
+        if hourly_params:
+            cursor.executemany(self.HOURLY_UPSERT, hourly_params)
+            cursor.executemany(self.DAILY_UPSERT, daily_params)
+
+    def rebuild(self, cursor, start_date: date = None, end_date: date = None) -> int:
+        """
+        원본 테이블로부터 집계 재계산 (일 단위, 양 끝 포함)
+
+        Args:
+            cursor: 커서 (commit은 호출자가 수행)
+            start_date: 시작 날짜 (None이면 원본의 최초 날짜)
+            end_date: 종료 날짜 (None이면 원본의 마지막 날짜)
+
+        Returns:
+            재계산에 사용된 탐지 행 수
+        """
+        if start_date is None or end_date is None:
+            cursor.execute("SELECT MIN(timestamp) AS first, MAX(timestamp) AS last FROM vehicle_detections")
+            bounds = cursor.fetchone() or {}
+            if not bounds.get('first'):
+                return 0
+            start_date = start_date or bounds['first'].date()
+            end_date = end_date or bounds['last'].date()
+
+        range_start = datetime.combine(start_date, dt_time.min)
+        range_end = datetime.combine(end_date + timedelta(days=1), dt_time.min)
+
+        cursor.execute("DELETE FROM detection_rollup_hourly WHERE bucket_start >= %s AND bucket_start < %s",
+                       (range_start, range_end))
+        cursor.execute("DELETE FROM detection_rollup_daily WHERE bucket_date >= %s AND bucket_date <= %s",
+                       (start_date, end_date))
+
+        # 범위 조건으로 idx_timestamp 사용
+        cursor.execute("""
+            SELECT camera_id, vehicle_type,
+                   DATE_FORMAT(timestamp, '%%Y-%%m-%%d %%H:00:00') AS bucket,
+                   COUNT(*) AS count
+            FROM vehicle_detections
+            WHERE timestamp >= %s AND timestamp < %s
+            GROUP BY camera_id, vehicle_type, bucket
+        """, (range_start, range_end))
+
+        hourly = {}
+        total = 0
+        for row in cursor.fetchall():
+            bucket = datetime.strptime(row['bucket'], '%Y-%m-%d %H:%M:%S')
+            hourly[(row['camera_id'], bucket, row['vehicle_type'])] = row['count']
+            total += row['count']
+
+        hourly_params, daily_params = self._to_params(hourly)
+        if hourly_params:
+            cursor.executemany(self.HOURLY_UPSERT, hourly_params)
+            cursor.executemany(self.DAILY_UPSERT, daily_params)
+        return total
+
+    def query_counts(self, cursor, start: datetime = None, end: datetime = None,
+                     camera_id: Union[str, Sequence[str]] = None) -> Dict:
+        """
+        집계 테이블에서 차종별 탐지 수와 ESAL 조회
+
+        시작 시각이 자정이고 종료 시각이 없으면 일 단위 테이블을, 그 외에는 시간 단위
+        테이블을 사용한다 (시간 단위 정밀도).
+
+        Args:
+            camera_id: 카메라 ID 또는 ID 목록 (None이면 전체 카메라, 빈 목록이면 결과 없음)
+
+        Returns:
+            {'total', 'by_vehicle_type', 'total_esal', 'esal_by_vehicle_type'}
+        """
+        use_daily = end is None and (start is None or start.time() == dt_time.min)
+        if use_daily:
+            query = """
+                SELECT vehicle_type, SUM(vehicle_count) AS count, SUM(esal_total) AS esal
+                FROM detection_rollup_daily
+                WHERE 1=1
+            """
+        else:
+            query = """
+                SELECT vehicle_type, SUM(vehicle_count) AS count, SUM(esal_total) AS esal
+                FROM detection_rollup_hourly
+                WHERE 1=1
+            """
+        params = []
+
+        if isinstance(camera_id, str):
+            query += " AND camera_id = %s"
+            params.append(camera_id)
+        elif camera_id is not None:
+            camera_ids = list(camera_id)
+            if not camera_ids:
+                return {'total': 0, 'by_vehicle_type': {}, 'total_esal': 0.0, 'esal_by_vehicle_type': {}}
+            query += f" AND camera_id IN ({', '.join(['%s'] * len(camera_ids))})"
+            params.extend(camera_ids)
+
+        if start:
+            if use_daily:
+                query += " AND bucket_date >= %s"
+                params.append(start.date())
+            else:
+                query += " AND bucket_start >= %s"
+                params.append(_hour_floor(start))
+
+        if end:
+            query += " AND bucket_start <= %s"
+            params.append(end)
+
+        query += " GROUP BY vehicle_type"
+        cursor.execute(query, params)
+
+        by_type = {}
+        esal_by_type = {}
+        for row in cursor.fetchall():
+            by_type[row['vehicle_type']] = int(row['count'] or 0)
+            esal_by_type[row['vehicle_type']] = float(row['esal'] or 0.0)
+
+        return {
+            'total': sum(by_type.values()),
+            'by_vehicle_type': by_type,
+            'total_esal': sum(esal_by_type.values()),
+            'esal_by_vehicle_type': esal_by_type,
+        }
@@ -14,10 +14,12 @@ class TrafficDatabaseSchema:
     """교통 데이터베이스 스키마 정의"""
     
     # 1. 차량 탐지 결과 테이블
+    #    timestamp 기준 월 단위 RANGE 파티션 (pYYYYMM은 DetectionPartitionManager가 생성/삭제)
+    #    파티션 테이블은 외래 키를 지원하지 않으므로 roi_id는 인덱스만 둔다
     DETECTION_TABLE = """
     CREATE TABLE IF NOT EXISTS vehicle_detections (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        id BIGINT AUTO_INCREMENT,
+        timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
         camera_id VARCHAR(100) NOT NULL,
         camera_name VARCHAR(255),
         camera_location VARCHAR(255),
@@ -28,6 +30,10 @@ class TrafficDatabaseSchema:
         vehicle_class INT,       -- YOLO class ID
         confidence FLOAT,             -- 탐지 신뢰도 (0.0 ~ 1.0)
         
+        -- 추적 정보
+        track_id INT,                 -- 추적기 ID (스트림 내에서만 고유, 순환됨)
+        direction VARCHAR(10),        -- 계수선 통과 방향 (forward, backward / 계수선 없으면 NULL)
+        
         -- 바운딩 박스 좌표 (정규화된 좌표)
         bbox_x FLOAT,                 -- 중심점 x 좌표
         bbox_y FLOAT,                 -- 중심점 y 좌표
@@ -42,11 +48,15 @@ class TrafficDatabaseSchema:
         weather_condition VARCHAR(50),      -- 날씨 조건
         lighting_condition VARCHAR(50),     -- 조명 조건 (day, night, dawn, dusk)
         
+        PRIMARY KEY (id, timestamp),
         INDEX idx_timestamp (timestamp),
         INDEX idx_camera (camera_id),
         INDEX idx_vehicle_type (vehicle_type),
-        FOREIGN KEY (roi_id) REFERENCES roi_regions (id)
-    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+        INDEX idx_roi (roi_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    PARTITION BY RANGE (TO_DAYS(timestamp)) (
+        PARTITION p_future VALUES LESS THAN MAXVALUE
+    );
     """
     
     # 2. ROI(Region of Interest) 정의 테이블
@@ -218,11 +228,59 @@ class TrafficDatabaseSchema:
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
     """
     
+    # 8. 시간 단위 집계 테이블 (카메라/시간/차종별 탐지 수 및 ESAL)
+    HOURLY_ROLLUP_TABLE = """
+    CREATE TABLE IF NOT EXISTS detection_rollup_hourly (
+        camera_id VARCHAR(100) NOT NULL,
+        bucket_start DATETIME NOT NULL,     -- 집계 구간 시작 (정시)
+        vehicle_type VARCHAR(50) NOT NULL,
+        
+        vehicle_count INT NOT NULL DEFAULT 0,
+        esal_total DOUBLE NOT NULL DEFAULT 0,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        
+        PRIMARY KEY (camera_id, bucket_start, vehicle_type),
+        INDEX idx_bucket (bucket_start)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """
+    
+    # 9. 일 단위 집계 테이블 (카메라/날짜/차종별 탐지 수 및 ESAL)
+    DAILY_ROLLUP_TABLE = """
+    CREATE TABLE IF NOT EXISTS detection_rollup_daily (
+        camera_id VARCHAR(100) NOT NULL,
+        bucket_date DATE NOT NULL,
+        vehicle_type VARCHAR(50) NOT NULL,
+        
+        vehicle_count INT NOT NULL DEFAULT 0,
+        esal_total DOUBLE NOT NULL DEFAULT 0,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        
+        PRIMARY KEY (camera_id, bucket_date, vehicle_type),
+        INDEX idx_bucket_date (bucket_date)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """
+    
+    # 10. 차종별 ESAL 가중치 테이블 (ESAL_VALUES로부터 생성)
+    ESAL_WEIGHTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS esal_weights (
+        vehicle_type VARCHAR(50) PRIMARY KEY,
+        esal_value DOUBLE NOT NULL,
+        vehicle_group VARCHAR(20) NOT NULL DEFAULT 'other'  -- esal_analysis 집계 컬럼 (car, bus, truck, van, motorbike, other)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """
+    
     # 인덱스 생성 쿼리들 (이미 테이블에 포함됨)
     INDEXES = [
         # 이미 각 테이블의 CREATE 문에 INDEX가 포함되어 있음
     ]
     
+    # 기존 테이블에 나중에 추가된 열 (table, column, 정의) - CREATE TABLE IF NOT EXISTS로는
+    # 추가되지 않으므로 초기화 시 없는 열만 ALTER TABLE로 추가
+    ADDED_COLUMNS = [
+        ('vehicle_detections', 'track_id', 'INT AFTER confidence'),
+        ('vehicle_detections', 'direction', 'VARCHAR(10) AFTER track_id'),
+    ]
+    
     @classmethod
     def get_all_tables(cls) -> List[str]:
         """모든 테이블 생성 쿼리 반환"""
@@ -233,7 +291,10 @@ class TrafficDatabaseSchema:
             cls.ESAL_TABLE,
             cls.TRAFFIC_PATTERN_TABLE,
             cls.MAINTENANCE_TABLE,
-            cls.SYSTEM_CONFIG_TABLE
+            cls.SYSTEM_CONFIG_TABLE,
+            cls.HOURLY_ROLLUP_TABLE,
+            cls.DAILY_ROLLUP_TABLE,
+            cls.ESAL_WEIGHTS_TABLE
         ]
     
     @classmethod
@@ -254,6 +315,15 @@ ESAL_VALUES = {
     'trailer': 24820,
 }
 
+# esal_analysis 테이블의 차종별 집계 컬럼 (목록에 없는 차종은 other)
+ESAL_VEHICLE_GROUPS = {
+    'car': 'car',
+    'motorbike': 'motorbike',
+    'van': 'van',
+    'bus': 'bus',
+    'truck': 'truck',
+}
+
 # 유지보수 기준 ESAL 값
 MAINTENANCE_THRESHOLDS = {
     'preventive': 500000,          # 예방적 유지보수
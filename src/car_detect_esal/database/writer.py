@@ -0,0 +1,385 @@
+"""
+비동기 차량 탐지 결과 기록 큐
+Asynchronous Detection Write Queue
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from ..core.detection_batch import DetectionBatch
+
+# (camera_id, 탐지 배치) - 큐/DB 기록 단위
+BatchRow = Tuple[str, DetectionBatch]
+
+
+class DetectionWriteQueue:
+    """
+    차량 탐지 결과를 추론 스레드와 분리하여 기록하는 전용 writer 스레드
+
+    - 모든 카메라의 탐지 결과를 하나의 bounded 큐에 모아 배치로 기록
+      (큐 항목은 행이 아니라 (camera_id, DetectionBatch)이며 용량/배치 크기는 행 수 기준)
+    - 배치 크기(batch_size) 또는 시간(flush_interval) 조건으로 flush
+    - 큐가 가득 차면 넘친 행을 enqueue()에서 바로 디스크 저널(JSONL)에 기록하고
+      (메모리에 쌓지 않음), DB 기록이 실패해도 저널에 기록한다. DB가 복구되면 writer
+      루프가 한 번에 한 청크씩 저널을 재생하여 실시간 flush를 막지 않고 반영
+    - enqueue()는 절대 블록되지 않으므로 느리거나 꺼진 DB가 탐지를 멈추지 않음
+    """
+
+    def __init__(self, manager, max_queue: int = 10000, batch_size: int = 200,
+                 flush_interval: float = 2.0, journal_path: Path = None,
+                 retry_interval: float = 30.0):
+        """
+        Args:
+            manager: TrafficDatabaseManager (record_vehicle_detections_bulk 제공)
+            max_queue: 메모리 큐 최대 행 수 (초과분은 저널로 기록)
+            batch_size: 한 번에 기록하는 최대 행 수
+            flush_interval: 배치가 차지 않아도 flush하는 주기(초)
+            journal_path: DB 장애 시 기록할 저널 파일 경로
+            retry_interval: DB 장애 후 재시도/저널 재생 주기(초)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.manager = manager
+        self.max_queue = max(1, max_queue)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.journal_path = Path(journal_path) if journal_path else None
+
+        self._queue = deque()
+        self._depth = 0  # 큐에 있는 행 수
+        self._cond = threading.Condition()
+        self._journal_lock = threading.Lock()  # 저널 추가 기록/재생 파일 교체 직렬화
+        self._thread = None
+        self._running = False
+        self._db_available = True
+        self._last_failure = 0.0
+
+        # 백프레셔/처리량 지표
+        self.enqueued = 0
+        self.written = 0
+        self.batches_written = 0
+        self.failed_batches = 0
+        self.overflowed = 0
+        self.dropped = 0  # 저널 경로가 없거나 저널 기록 실패로 유실된 행
+        self.spilled = 0
+        self.replayed = 0
+        self.max_depth = 0
+        self.last_flush_latency = 0.0
+        self.last_error = None
+
+    def start(self):
+        """writer 스레드 시작"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="DetectionWriteQueue", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """writer 스레드 중지 - 남은 행은 flush (실패 시 저널로 기록)"""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def enqueue(self, camera_id: str, detections: Union[DetectionBatch, Sequence[Dict]]) -> int:
+        """
+        탐지 결과를 큐에 추가 (논블로킹)
+
+        Args:
+            camera_id: 카메라 ID
+            detections: DetectionBatch 또는 탐지 결과 딕셔너리 리스트
+
+        Returns:
+            메모리 큐에 들어간 행 수 (나머지는 저널로 넘어감)
+        """
+        if not isinstance(detections, DetectionBatch):
+            detections = DetectionBatch.from_records(detections)
+        count = len(detections)
+        if not count:
+            return 0
+
+        # 실제 탐지 시각을 보존 (기록 지연/재생과 무관하게)
+        detections.stamp(datetime.now())
+
+        with self._cond:
+            space = max(0, self.max_queue - self._depth)
+            accepted = min(count, space)
+            if accepted == count:
+                self._queue.append((camera_id, detections))
+            elif accepted:
+                self._queue.append((camera_id, detections.take(slice(0, accepted))))
+            self._depth += accepted
+            self.enqueued += count
+            self.overflowed += count - accepted
+            self.max_depth = max(self.max_depth, self._depth)
+            if self._depth >= self.batch_size:
+                self._cond.notify_all()
+
+        if accepted < count:
+            # 넘친 행은 메모리에 두지 않고 바로 저널에 기록 (writer 스레드가 막혀 있어도 유한 메모리)
+            self._spill([(camera_id, detections.take(slice(accepted, None)))])
+        return accepted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """큐 지표 반환"""
+        with self._cond:
+            depth = self._depth
+        return {
+            'queue_depth': depth,
+            'max_depth': self.max_depth,
+            'capacity': self.max_queue,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'batches_written': self.batches_written,
+            'failed_batches': self.failed_batches,
+            'overflowed': self.overflowed,
+            'dropped': self.dropped,
+            'spilled': self.spilled,
+            'replayed': self.replayed,
+            'journal_backlog': max(0, self.spilled - self.replayed),
+            'journal_pending': self._journal_exists(),
+            'db_available': self._db_available,
+            'last_flush_latency': self.last_flush_latency,
+            'last_error': self.last_error,
+        }
+
+    def _take_batch(self, wait: bool = True) -> List[BatchRow]:
+        """
+        flush 조건이 될 때까지 기다렸다가 최대 batch_size 행의 배치를 꺼냄
+
+        Args:
+            wait: False면 기다리지 않고 현재 큐에서 꺼냄 (저널 재생 중)
+        """
+        with self._cond:
+            deadline = time.monotonic() + (self.flush_interval if wait else 0.0)
+            while self._running and self._depth < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # 종료 시에는 남은 행을 모두 꺼냄
+            limit = self.batch_size if self._running else self._depth
+            batch = []
+            taken = 0
+            while self._queue and taken < limit:
+                camera_id, detections = self._queue[0]
+                if taken + len(detections) > limit:
+                    # 배치 크기를 넘는 부분은 큐에 남김
+                    split = limit - taken
+                    batch.append((camera_id, detections.take(slice(0, split))))
+                    self._queue[0] = (camera_id, detections.take(slice(split, None)))
+                    taken = limit
+                    break
+                self._queue.popleft()
+                batch.append((camera_id, detections))
+                taken += len(detections)
+            self._depth -= taken
+            return batch
+
+    def _run(self):
+        """writer 메인 루프"""
+        replaying = False
+        while True:
+            # 저널 재생 중에는 기다리지 않고 실시간 배치와 재생 청크를 번갈아 처리
+            batch = self._take_batch(wait=not replaying)
+
+            if batch:
+                self._write(batch)
+
+            replaying = False
+            if self._db_available and self._journal_exists():
+                replaying = self._replay_chunk()
+            elif not self._db_available and time.monotonic() - self._last_failure >= self.retry_interval:
+                # 재시도 시점: 저널 재생이 성공하면 DB 복구로 판단
+                self._db_available = True
+                replaying = self._replay_chunk()
+
+            with self._cond:
+                if not self._running and not self._queue:
+                    break
+
+    def _write(self, batch: List[BatchRow]):
+        """배치 기록 - 실패하거나 DB 장애 중이면 저널로 기록"""
+        if not self._db_available:
+            self._spill(batch)
+            return
+
+        start = time.monotonic()
+        ok = False
+        try:
+            ok = self.manager.record_vehicle_detections_bulk(batch)
+        except Exception as e:
+            self.last_error = str(e)
+        self.last_flush_latency = time.monotonic() - start
+
+        if ok:
+            self.written += _row_count(batch)
+            self.batches_written += 1
+        else:
+            self.failed_batches += 1
+            self._mark_db_down()
+            self._spill(batch)
+
+    def _mark_db_down(self):
+        """DB 장애 상태로 전환"""
+        if self._db_available:
+            self.logger.warning("DB 기록 실패 - 저널 모드로 전환")
+        self._db_available = False
+        self._last_failure = time.monotonic()
+
+    @property
+    def _replay_path(self) -> Path:
+        """재생 중인 저널 (재생 시작 시 저널을 이 이름으로 교체하여 새 기록과 분리)"""
+        return self.journal_path.with_name(self.journal_path.name + '.replay')
+
+    @property
+    def _offset_path(self) -> Path:
+        """재생 파일에서 DB에 반영 완료된 바이트 위치"""
+        return self.journal_path.with_name(self.journal_path.name + '.replay.offset')
+
+    def _journal_exists(self) -> bool:
+        return self.journal_path is not None and (
+            self.journal_path.exists() or self._replay_path.exists())
+
+    def _spill(self, rows: List[BatchRow]):
+        """배치를 행 단위 레코드로 디스크 저널에 추가"""
+        count = _row_count(rows)
+        if self.journal_path is None:
+            self.dropped += count
+            self.logger.error(f"저널 경로가 없어 탐지 결과 {count}건 유실")
+            return
+        lines = [
+            json.dumps({'camera_id': camera_id, 'detection': det},
+                       default=_json_default, ensure_ascii=False) + '\n'
+            for camera_id, detections in rows
+            for det in detections.records()
+        ]
+        try:
+            with self._journal_lock:
+                self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.journal_path, 'a', encoding='utf-8') as f:
+                    f.writelines(lines)
+                self.spilled += count
+        except Exception as e:
+            self.dropped += count
+            self.last_error = str(e)
+            self.logger.error(f"저널 기록 실패 ({count}건 유실): {e}")
+
+    def _replay_chunk(self) -> bool:
+        """
+        저널에서 batch_size 행 한 청크를 DB에 재기록
+
+        저널을 재생 파일로 교체한 뒤 저장된 위치부터 한 청크만 읽어 기록하고 완료 위치를
+        저장한다. writer 루프가 반복 호출하므로 긴 재생이 실시간 flush를 막지 않으며,
+        메모리 사용은 청크 하나로 제한된다. 중간에 DB가 다시 끊기거나 프로세스가
+        종료되어도 다음 재생은 저장된 위치부터 이어간다.
+
+        Returns:
+            재생할 행이 남아 있으면 True
+        """
+        try:
+            with self._journal_lock:
+                if not self._replay_path.exists():
+                    if not self.journal_path.exists():
+                        return False
+                    self.journal_path.replace(self._replay_path)
+                    self._save_replay_offset(0)
+
+            with open(self._replay_path, 'rb') as f:
+                f.seek(self._load_replay_offset())
+                rows = []
+                while len(rows) < self.batch_size:
+                    line = f.readline()
+                    if not line:
+                        break
+                    record = _parse_journal_line(line)
+                    if record is not None:
+                        rows.append(record)
+                offset = f.tell()
+                at_end = not f.readline()
+
+            if rows:
+                try:
+                    ok = self.manager.record_vehicle_detections_bulk(_group_records(rows))
+                except Exception as e:
+                    self.last_error = str(e)
+                    ok = False
+                if not ok:
+                    self._mark_db_down()
+                    return False
+                self.replayed += len(rows)
+
+            if at_end:
+                self._replay_path.unlink()
+                self._offset_path.unlink(missing_ok=True)
+                self.logger.info("저널 재생 파일 반영 완료")
+                return self._journal_exists()
+            self._save_replay_offset(offset)
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            return False
+
+    def _load_replay_offset(self) -> int:
+        try:
+            return int(self._offset_path.read_text().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _save_replay_offset(self, offset: int):
+        """완료 위치 기록 (임시 파일 교체로 원자적으로 갱신)"""
+        tmp = self._offset_path.with_name(self._offset_path.name + '.tmp')
+        tmp.write_text(str(offset))
+        tmp.replace(self._offset_path)
+
+
+def _parse_journal_line(line: bytes) -> Optional[Tuple[str, Dict]]:
+    """저널 한 줄을 (camera_id, 탐지 딕셔너리)로 변환 - 빈 줄/손상된 줄은 None"""
+    if not line.strip():
+        return None
+    try:
+        record = json.loads(line.decode('utf-8'))
+        det = record['detection']
+        if det.get('timestamp'):
+            det['timestamp'] = datetime.fromisoformat(det['timestamp'])
+        return record['camera_id'], det
+    except Exception:
+        return None
+
+
+def _row_count(rows: List[BatchRow]) -> int:
+    return sum(len(detections) for _, detections in rows)
+
+
+def _group_records(rows: List[Tuple[str, Dict]]) -> List[BatchRow]:
+    """연속된 같은 카메라의 레코드를 DetectionBatch로 묶음 (저널 재생용)"""
+    grouped = []
+    start = 0
+    for i in range(1, len(rows) + 1):
+        if i == len(rows) or rows[i][0] != rows[start][0]:
+            grouped.append((rows[start][0],
+                            DetectionBatch.from_records([det for _, det in rows[start:i]])))
+            start = i
+    return grouped
+
+
+def _json_default(value):
+    """저널 직렬화 보조 (datetime 등)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()  # NumPy 스칼라
+    return str(value)
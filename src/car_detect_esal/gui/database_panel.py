@@ -167,36 +167,19 @@ class DatabaseStatsWidget(QtWidgets.QWidget):
     def _update_today_stats(self):
         """Update today's statistics"""
         try:
-            conn = self.db_manager.get_connection()
-            cursor = conn.cursor()
+            # Served from the rollup tables (no scan of vehicle_detections)
+            today_stats = self.db_manager.get_today_counts()
+            today_count = today_stats['total']
             
-            today = datetime.now().date()
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM vehicle_detections WHERE DATE(timestamp) = %s",
-                (today,)
-            )
-            result = cursor.fetchone()
-            today_count = result['count'] if result else 0
             self.today_detections_label.setText(f"Today: {today_count:,}")
             
-            cursor.execute("""
-                SELECT vehicle_type, COUNT(*) as count
-                FROM vehicle_detections 
-                WHERE DATE(timestamp) = %s
-                GROUP BY vehicle_type
-            """, (today,))
-            
-            vehicle_stats = cursor.fetchall()
-            stats_dict = {row['vehicle_type']: row['count'] for row in vehicle_stats}
+            stats_dict = today_stats['by_vehicle_type']
             
             self.car_count_label.setText(f"Car: {stats_dict.get('car', 0):,}")
             self.truck_count_label.setText(f"Truck: {stats_dict.get('truck', 0):,}")
             self.bus_count_label.setText(f"Bus: {stats_dict.get('bus', 0):,}")
             self.van_count_label.setText(f"Van: {stats_dict.get('van', 0):,}")
             self.motorbike_count_label.setText(f"Motorbike: {stats_dict.get('motorbike', 0):,}")
-            
-            cursor.close()
-            conn.close()
                 
         except Exception as e:
             print(f"[DB Panel] Today's statistics update failed: {e}")
@@ -204,17 +187,20 @@ class DatabaseStatsWidget(QtWidgets.QWidget):
     def _update_recent_detections(self):
         """Update recent detections list"""
         try:
-            conn = self.db_manager.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT timestamp, camera_name, vehicle_type, confidence
-                FROM vehicle_detections
-                ORDER BY timestamp DESC
-                LIMIT 20
-            """)
-            
-            recent = cursor.fetchall()
+            with self.db_manager.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("""
+                    SELECT d.timestamp, d.vehicle_type, d.confidence,
+                           COALESCE(d.camera_name, c.name) AS camera_name
+                    FROM vehicle_detections d
+                    LEFT JOIN camera_streams c ON c.id = d.camera_id
+                    ORDER BY d.timestamp DESC
+                    LIMIT 20
+                """)
+                
+                recent = cursor.fetchall()
+                cursor.close()
             
             text_lines = []
             for row in recent:
@@ -225,9 +211,6 @@ class DatabaseStatsWidget(QtWidgets.QWidget):
                 text_lines.append(f"[{ts}] {cam[:15]:<15} | {vtype:<10} | {conf:.2f}")
             
             self.recent_list.setText("\n".join(text_lines) if text_lines else "No recent detections")
-            
-            cursor.close()
-            conn.close()
                 
         except Exception as e:
             print(f"[DB Panel] Recent detections update failed: {e}")
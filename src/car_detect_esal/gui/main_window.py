@@ -3,9 +3,12 @@ Simple Main Window - Clean and Minimalist Design
 """
 
 import sys
+import math
 from PyQt5 import QtCore, QtGui, QtWidgets
-from ..core import Config, VehicleDetector
+from ..core import Config, BatchInferenceServer
+from ..core.performance_config import PerformanceConfig
 from ..database import TrafficDatabaseManager
+from .model_loader import ModelLoader
 from .stream_panel import StreamPanel
 
 
@@ -16,8 +19,19 @@ class MainWindow(QtWidgets.QMainWindow):
         super().__init__()
         self.config = Config()
         self.detector = None
+        self.inference_server = None
         self.panels = []
         self._cols = 2
+        # Preset that selects the inference backend
+        self.performance_preset = PerformanceConfig.DEFAULT_PRESET
+        # Panel shown alone at full rate (None = grid view)
+        self._focused_panel = None
+        # Tiles whose video is narrower than this get the low-rate thumbnail stream
+        self.thumbnail_width = 480
+        # Background model loads in flight (kept referenced until finished)
+        self._model_loaders = []
+        # Start All pressed before the model was ready
+        self._start_pending = False
         
         # Database
         try:
@@ -87,13 +101,20 @@ class MainWindow(QtWidgets.QMainWindow):
         layout.setSpacing(0)
         layout.setContentsMargins(0, 0, 0, 0)
         
-        # Left: Video area
+        # Left: Video area (scrollable grid for large camera counts)
         self.video_area = QtWidgets.QWidget()
         self.video_area.setStyleSheet("background: #000000;")
         self.video_layout = QtWidgets.QGridLayout(self.video_area)
         self.video_layout.setSpacing(2)
         self.video_layout.setContentsMargins(2, 2, 2, 2)
         
+        self.video_scroll = QtWidgets.QScrollArea()
+        self.video_scroll.setWidgetResizable(True)
+        self.video_scroll.setFrameShape(QtWidgets.QFrame.NoFrame)
+        self.video_scroll.setWidget(self.video_area)
+        self.video_scroll.verticalScrollBar().valueChanged.connect(self._update_panel_visibility)
+        self.video_scroll.horizontalScrollBar().valueChanged.connect(self._update_panel_visibility)
+        
         # Right: Compact control sidebar
         sidebar = QtWidgets.QWidget()
         sidebar.setFixedWidth(280)
@@ -232,6 +253,24 @@ class MainWindow(QtWidgets.QMainWindow):
         self.iou_spin.setValue(0.45)
         settings_layout.addRow("IOU:", self.iou_spin)
         
+        self.preset_combo = QtWidgets.QComboBox()
+        self.preset_combo.addItems(PerformanceConfig.PRESET_ORDER)
+        self.preset_combo.setCurrentText(self.performance_preset)
+        self.preset_combo.currentTextChanged.connect(self._on_preset_changed)
+        settings_layout.addRow("Preset:", self.preset_combo)
+        
+        self.model_status_label = QtWidgets.QLabel("Model: not loaded")
+        self.model_status_label.setStyleSheet("color: #b0b0b0; font-size: 11px;")
+        self.model_status_label.setWordWrap(True)
+        settings_layout.addRow(self.model_status_label)
+        
+        self.model_progress = QtWidgets.QProgressBar()
+        self.model_progress.setRange(0, 100)
+        self.model_progress.setTextVisible(False)
+        self.model_progress.setFixedHeight(6)
+        self.model_progress.hide()
+        settings_layout.addRow(self.model_progress)
+        
         sidebar_layout.addWidget(settings_group)
         
         # Stats section
@@ -287,7 +326,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self._refresh_db_stats()  # Initial refresh
         
         # ROI Guide
-        roi_guide = QtWidgets.QLabel("💡 ROI Detection:\nDrag on video to select area\nDouble-click to reset")
+        roi_guide = QtWidgets.QLabel("💡 ROI Detection:\nDrag on video to select area\nDouble-click to reset\n\n📏 Counting Line:\nToggle Line, then drag across the road\nCounts only vehicles crossing it")
         roi_guide.setStyleSheet("""
             padding: 8px;
             background: #2d3d2d;
@@ -314,24 +353,90 @@ class MainWindow(QtWidgets.QMainWindow):
         sidebar_layout.addWidget(db_label)
         
         # Add to main layout
-        layout.addWidget(self.video_area, 1)
+        layout.addWidget(self.video_scroll, 1)
         layout.addWidget(sidebar, 0)
         
         # Update timer
         self.update_timer = QtCore.QTimer()
         self.update_timer.timeout.connect(self._update_stats)
         self.update_timer.start(1000)
+        
+        # Visibility timer (catches layout/resize changes not tied to scrolling)
+        self.visibility_timer = QtCore.QTimer()
+        self.visibility_timer.timeout.connect(self._update_panel_visibility)
+        self.visibility_timer.start(500)
 
     def _load_model(self):
-        """Load detection model"""
-        try:
-            self.detector = VehicleDetector(
-                model_path=str(self.config.DEFAULT_MODEL_PATH),
-                conf=0.5
-            )
-            print("Model loaded successfully")
-        except Exception as e:
-            print(f"Model load failed: {e}")
+        """Load the current preset's model in the background (cached models return at once)"""
+        preset = PerformanceConfig.get_preset(self.performance_preset)
+        loader = ModelLoader(
+            self.performance_preset,
+            model_path=str(self.config.DEFAULT_MODEL_PATH),
+            conf=0.5,
+            backend=preset.get("backend", "pytorch"),
+            model_variant=preset.get("variant"),
+            warmup_sizes=PerformanceConfig.get_imgsz_values(),
+            parent=self
+        )
+        loader.progress.connect(self._on_model_progress)
+        loader.loaded.connect(self._on_model_loaded)
+        loader.failed.connect(self._on_model_failed)
+        loader.finished.connect(lambda: self._model_loaders.remove(loader))
+        self._model_loaders.append(loader)
+        
+        self.model_progress.setValue(0)
+        self.model_progress.show()
+        loader.start()
+
+    def _on_model_progress(self, percent, message):
+        """Show background load progress"""
+        self.model_progress.setValue(percent)
+        self.model_status_label.setText(f"Model: {message}")
+
+    def _on_model_loaded(self, preset, detector):
+        """Hand the loaded model to every panel through a new shared inference server"""
+        if preset != self.performance_preset:
+            return  # superseded by a later preset change
+        self.model_progress.hide()
+        self.model_status_label.setText(f"Model: {preset} ({detector.backend.name})")
+        if detector is self.detector:
+            return
+        
+        # 모든 패널이 공유하는 배치 추론 서버
+        old_server = self.inference_server
+        self.detector = detector
+        self.inference_server = BatchInferenceServer(detector)
+        self.inference_server.start()
+        for panel in self.panels:
+            panel.set_model(detector, self.inference_server)
+        if old_server:
+            old_server.stop()
+        print(f"Model ready: {preset}")
+        
+        if self._start_pending:
+            self._start_pending = False
+            self._start_all()
+
+    def _on_model_failed(self, preset, message):
+        """Report a failed background load"""
+        if preset != self.performance_preset:
+            return
+        self.model_progress.hide()
+        self.model_status_label.setText(f"Model load failed: {message}")
+        print(f"Model load failed: {message}")
+
+    def _on_preset_changed(self, preset):
+        """Switch presets (reuses cached models instead of reloading weights)"""
+        if preset == self.performance_preset:
+            return
+        self.performance_preset = preset
+        for panel in self.panels:
+            panel.set_performance_config(self._performance_config())
+        self._load_model()
+
+    def _performance_config(self) -> dict:
+        """Stream settings (fps_target, imgsz, keyframe_interval, ...) of the current preset"""
+        return dict(PerformanceConfig.get_preset(self.performance_preset), preset=self.performance_preset)
 
     def _add_stream(self):
         """Add new video stream"""
@@ -414,16 +519,18 @@ class MainWindow(QtWidgets.QMainWindow):
             panel = StreamPanel(
                 source=url,
                 detector=self.detector,
-                performance_config={"sleep_time": 0.03, "imgsz": 640},
+                performance_config=self._performance_config(),
                 db_manager=self.db_manager,
-                camera_id=camera_id
+                camera_id=camera_id,
+                inference_server=self.inference_server
             )
             
-            row = len(self.panels) // self._cols
-            col = len(self.panels) % self._cols
-            self.video_layout.addWidget(panel, row, col)
+            panel.focus_requested.connect(self._toggle_focus)
+            if self._focused_panel is not None:
+                panel.hide()
             
             self.panels.append(panel)
+            self._relayout_panels()
             self.url_input.clear()
             self._update_stats()
             
@@ -434,6 +541,11 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def _start_all(self):
         """Start all streams"""
+        if self.detector is None:
+            # Streams start once the background load finishes
+            self._start_pending = True
+            self.model_status_label.setText("Model: loading... streams will start when ready")
+            return
         for panel in self.panels:
             if not panel.worker or not panel.worker.isRunning():
                 panel.start()
@@ -458,8 +570,48 @@ class MainWindow(QtWidgets.QMainWindow):
                     panel.stop()
                 panel.deleteLater()
             self.panels.clear()
+            self._focused_panel = None
             self._update_stats()
 
+    def _relayout_panels(self):
+        """Arrange panels in a near-square grid (at least self._cols columns)"""
+        cols = max(self._cols, math.ceil(math.sqrt(len(self.panels))))
+        for panel in self.panels:
+            self.video_layout.removeWidget(panel)
+        for index, panel in enumerate(self.panels):
+            self.video_layout.addWidget(panel, index // cols, index % cols)
+
+    def _toggle_focus(self, panel):
+        """Show one panel alone at full rate, or return to the grid"""
+        if self._focused_panel is panel:
+            self._focused_panel = None
+        else:
+            self._focused_panel = panel
+        
+        for other in self.panels:
+            focused = self._focused_panel is None or other is self._focused_panel
+            other.setVisible(focused)
+            other.focus_btn.setChecked(other is self._focused_panel)
+        self._update_panel_visibility()
+
+    def _update_panel_visibility(self):
+        """Pick each panel's display mode from its on-screen visibility and size"""
+        minimized = self.isMinimized() or not self.isVisible()
+        for panel in self.panels:
+            if minimized or not panel.isVisible() or panel.visibleRegion().isEmpty():
+                mode = StreamPanel.DISPLAY_HIDDEN
+            elif panel is self._focused_panel or panel.video.width() >= self.thumbnail_width:
+                mode = StreamPanel.DISPLAY_FULL
+            else:
+                mode = StreamPanel.DISPLAY_THUMBNAIL
+            panel.set_display_mode(mode)
+
+    def changeEvent(self, event):
+        """Stop frame delivery while minimized"""
+        super().changeEvent(event)
+        if event.type() == QtCore.QEvent.WindowStateChange:
+            self._update_panel_visibility()
+
     def _update_stats(self):
         """Update statistics display"""
         total_detections = 0
@@ -475,27 +627,9 @@ class MainWindow(QtWidgets.QMainWindow):
             return
         
         try:
-            from datetime import datetime
-            
-            # Get total detections
-            conn = self.db_manager.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT COUNT(*) as count FROM vehicle_detections")
-            result = cursor.fetchone()
-            total_count = result['count'] if result else 0
-            
-            # Get today's detections
-            today = datetime.now().date()
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM vehicle_detections WHERE DATE(timestamp) = %s",
-                (today,)
-            )
-            result = cursor.fetchone()
-            today_count = result['count'] if result else 0
-            
-            cursor.close()
-            conn.close()
+            # Served from the rollup tables, independent of raw table size
+            total_count = self.db_manager.get_vehicle_counts()['total']
+            today_count = self.db_manager.get_today_counts()['total']
             
             self.db_total_label.setText(f"Total: {total_count:,}")
             self.db_today_label.setText(f"Today: {today_count:,}")
@@ -517,15 +651,31 @@ class MainWindow(QtWidgets.QMainWindow):
     def closeEvent(self, event):
         """Handle window close"""
         self._stop_all()
+        if self._model_loaders:
+            # Skip remaining warm-up; a load/export in progress cannot be interrupted, so wait for it
+            self.model_status_label.setText("Model: closing... waiting for model load to finish")
+            QtWidgets.QApplication.processEvents()
+            for loader in list(self._model_loaders):
+                loader.cancel()
+            for loader in list(self._model_loaders):
+                loader.wait()
+        if self.inference_server:
+            self.inference_server.stop()
+        if self.db_manager:
+            self.db_manager.close()
         event.accept()
 
 
 class DatabaseViewerDialog(QtWidgets.QDialog):
     """Database viewer dialog"""
     
+    # Retention report from the manager's maintenance thread (delivered on the GUI thread)
+    retention_finished = QtCore.pyqtSignal(object)
+    
     def __init__(self, db_manager, parent=None):
         super().__init__(parent)
         self.db_manager = db_manager
+        self.retention_finished.connect(self._on_retention_finished)
         self.setWindowTitle("Database Viewer")
         self.resize(1100, 650)
         self._setup_ui()
@@ -623,6 +773,11 @@ class DatabaseViewerDialog(QtWidgets.QDialog):
         clear_btn.clicked.connect(self._clear_database)
         controls_layout.addWidget(clear_btn)
         
+        # Retention button (drops expired monthly partitions)
+        self.retention_btn = QtWidgets.QPushButton("Apply Retention")
+        self.retention_btn.clicked.connect(self._apply_retention)
+        controls_layout.addWidget(self.retention_btn)
+        
         # Refresh button
         refresh_btn = QtWidgets.QPushButton("Refresh")
         refresh_btn.clicked.connect(self._refresh_data)
@@ -750,45 +905,44 @@ class DatabaseViewerDialog(QtWidgets.QDialog):
             from ..core.esal_calculator import ESALCalculator
             esal_calc = ESALCalculator()
             
-            conn = self.db_manager.get_connection()
-            cursor = conn.cursor()
-            
             # Build query
-            query = "SELECT * FROM vehicle_detections WHERE 1=1"
+            # Camera name comes from camera_streams when rows are stored normalized
+            query = """
+                SELECT d.timestamp, d.vehicle_type, d.confidence,
+                       COALESCE(d.camera_name, c.name) AS camera_name
+                FROM vehicle_detections d
+                LEFT JOIN camera_streams c ON c.id = d.camera_id
+                WHERE 1=1
+            """
             params = []
             
             # Filter by vehicle type
             vehicle_filter = self.filter_combo.currentText()
             if vehicle_filter != "All":
-                query += " AND vehicle_type = %s"
+                query += " AND d.vehicle_type = %s"
                 params.append(vehicle_filter)
             
             # Search by camera name
             search_text = self.search_input.text().strip()
             if search_text:
-                query += " AND camera_name LIKE %s"
+                query += " AND COALESCE(d.camera_name, c.name) LIKE %s"
                 params.append(f"%{search_text}%")
             
-            query += " ORDER BY timestamp DESC LIMIT 1000"
-            
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
+            query += " ORDER BY d.timestamp DESC LIMIT 1000"
             
-            # Calculate class counts
-            class_counts = {}
-            esal_scores = []
+            with self.db_manager.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+                cursor.close()
             
             # Update main table
             self.table.setRowCount(len(rows))
             for i, row in enumerate(rows):
                 vehicle_type = row['vehicle_type'] or 'unknown'
                 
-                # Count by class
-                class_counts[vehicle_type] = class_counts.get(vehicle_type, 0) + 1
-                
                 # Calculate ESAL score for this detection
                 esal_score = esal_calc._get_score_per_vehicle(vehicle_type)
-                esal_scores.append((vehicle_type, esal_score))
                 
                 # Fill table
                 self.table.setItem(i, 0, QtWidgets.QTableWidgetItem(
@@ -807,6 +961,16 @@ class DatabaseViewerDialog(QtWidgets.QDialog):
                     f"{esal_score:.2f}"
                 ))
             
+            # Class and ESAL statistics come from the rollup tables, limited to the
+            # cameras matching the search box so the totals describe the listed rows
+            camera_ids = self.db_manager.find_camera_ids(search_text) if search_text else None
+            stats = self.db_manager.get_vehicle_counts(camera_id=camera_ids)
+            class_counts = stats['by_vehicle_type']
+            esal_by_class = stats['esal_by_vehicle_type']
+            if vehicle_filter != "All":
+                class_counts = {k: v for k, v in class_counts.items() if k == vehicle_filter}
+                esal_by_class = {k: v for k, v in esal_by_class.items() if k == vehicle_filter}
+            
             # Update class statistics table
             self.class_stats.setRowCount(len(class_counts))
             sorted_classes = sorted(class_counts.items(), key=lambda x: x[1], reverse=True)
@@ -818,20 +982,14 @@ class DatabaseViewerDialog(QtWidgets.QDialog):
             
             # Update ESAL statistics
             esal_text = "ESAL Score by Vehicle Type:\n\n"
-            esal_by_class = {}
-            for vtype, score in esal_scores:
-                if vtype not in esal_by_class:
-                    esal_by_class[vtype] = []
-                esal_by_class[vtype].append(score)
-            
             for vtype in sorted(esal_by_class.keys()):
-                scores = esal_by_class[vtype]
-                avg_score = sum(scores) / len(scores)
-                total_score = sum(scores)
+                total_score = esal_by_class[vtype]
+                count = class_counts.get(vtype, 0)
+                avg_score = total_score / count if count else 0.0
                 esal_text += f"{vtype:12s}: {avg_score:6.2f} avg\n"
                 esal_text += f"{'':12s}  {total_score:6.2f} total\n\n"
             
-            total_esal = sum(score for _, score in esal_scores)
+            total_esal = sum(esal_by_class.values())
             esal_text += f"{'─' * 25}\n"
             esal_text += f"{'Total ESAL':12s}: {total_esal:6.2f}\n"
             
@@ -839,9 +997,6 @@ class DatabaseViewerDialog(QtWidgets.QDialog):
             
             self.info_label.setText(f"Showing {len(rows)} records (max 1000) | Total ESAL: {total_esal:.2f}")
             
-            cursor.close()
-            conn.close()
-            
         except Exception as e:
             print(f"[DatabaseViewer] Refresh failed: {e}")
             import traceback
@@ -894,6 +1049,41 @@ class DatabaseViewerDialog(QtWidgets.QDialog):
                 f"Export failed:\n{e}"
             )
     
+    def _apply_retention(self):
+        """Delete detections older than the configured retention period (on the maintenance thread)"""
+        self.retention_btn.setEnabled(False)
+        self.info_label.setText("Applying retention...")
+        self.db_manager.request_partition_maintenance(self._emit_retention_finished)
+    
+    def _emit_retention_finished(self, report):
+        """Maintenance thread callback - hand the report to the GUI thread"""
+        try:
+            self.retention_finished.emit(report)
+        except RuntimeError:
+            pass  # dialog closed while maintenance was running
+    
+    def _on_retention_finished(self, report):
+        """Report the retention result"""
+        self.retention_btn.setEnabled(True)
+        retention_days = self.db_manager.get_retention_days()
+        
+        if not report:
+            QtWidgets.QMessageBox.critical(self, "Error", "Retention maintenance failed.")
+            return
+        
+        if report['partitioned']:
+            dropped = ", ".join(report['dropped']) or "none"
+            message = f"Dropped expired partitions: {dropped}"
+        else:
+            message = f"Deleted {report['deleted_rows']:,} expired records."
+        
+        QtWidgets.QMessageBox.information(
+            self,
+            "Retention Applied",
+            f"Retention period: {retention_days} days\n\n{message}"
+        )
+        self._refresh_data()
+    
     def _clear_database(self):
         """Clear all detection records from database"""
         reply = QtWidgets.QMessageBox.question(
@@ -928,31 +1118,8 @@ class DatabaseViewerDialog(QtWidgets.QDialog):
             return
         
         try:
-            # Get count before deletion using a fresh connection
-            conn1 = self.db_manager.get_connection()
-            cursor1 = conn1.cursor()
-            cursor1.execute("SELECT COUNT(*) as count FROM vehicle_detections")
-            result = cursor1.fetchone()
-            record_count = result['count'] if result else 0
-            cursor1.close()
-            conn1.close()
-            
-            # Use TRUNCATE instead of DELETE for better performance and avoid locking issues
-            conn2 = self.db_manager.get_connection()
-            cursor2 = conn2.cursor()
-            
-            try:
-                # TRUNCATE is faster and avoids row-level locking
-                cursor2.execute("TRUNCATE TABLE vehicle_detections")
-                conn2.commit()
-            except Exception as truncate_error:
-                # If TRUNCATE fails, try DELETE with explicit table lock
-                print(f"[Clear DB] TRUNCATE failed, trying DELETE: {truncate_error}")
-                cursor2.execute("DELETE FROM vehicle_detections")
-                conn2.commit()
-            
-            cursor2.close()
-            conn2.close()
+            # Clears raw detections together with the rollup tables
+            record_count = self.db_manager.clear_detections()
             
             QtWidgets.QMessageBox.information(
                 self,
@@ -0,0 +1,62 @@
+"""
+Background model loading thread
+"""
+
+from typing import Iterable, Optional
+from PyQt5 import QtCore
+from ..core.model_manager import ModelManager, get_model_manager
+
+
+class ModelLoader(QtCore.QThread):
+    """
+    모델 로드/워밍업을 GUI 스레드 밖에서 수행
+
+    ModelManager 캐시에 있으면 즉시 loaded를 방출한다. request는 호출 측이 응답을
+    구분하는 데 쓰는 값(예: 프리셋 이름)으로 시그널에 그대로 전달된다.
+    cancel()을 호출하면 남은 워밍업을 생략하고 결과 시그널을 방출하지 않는다
+    (가중치 로드/최초 내보내기는 중단할 수 없으므로 종료 시에는 wait()로 기다려야 한다).
+    """
+
+    progress = QtCore.pyqtSignal(int, str)       # 퍼센트, 메시지
+    loaded = QtCore.pyqtSignal(object, object)   # request, VehicleDetector
+    failed = QtCore.pyqtSignal(object, str)      # request, 오류 메시지
+
+    def __init__(self, request, model_path: str, imgsz: int = 640, conf: float = 0.5,
+                 backend: str = 'pytorch', model_variant: Optional[str] = None,
+                 warmup_sizes: Iterable[int] = (), manager: ModelManager = None, parent=None):
+        super().__init__(parent)
+        self.request = request
+        self.model_path = model_path
+        self.imgsz = imgsz
+        self.conf = conf
+        self.backend = backend
+        self.model_variant = model_variant
+        self.warmup_sizes = list(warmup_sizes)
+        self.manager = manager or get_model_manager()
+        self._cancelled = False
+
+    def cancel(self):
+        """로드 취소 요청 (워밍업 생략, 시그널 방출 안 함)"""
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def run(self):
+        try:
+            detector = self.manager.get(
+                self.model_path,
+                imgsz=self.imgsz,
+                conf=self.conf,
+                backend=self.backend,
+                model_variant=self.model_variant,
+                warmup_sizes=self.warmup_sizes,
+                progress=self.progress.emit,
+                cancelled=self.is_cancelled
+            )
+            if not self._cancelled:
+                self.loaded.emit(self.request, detector)
+        except Exception as e:
+            print(f"[ModelLoader] 모델 로드 실패: {e}")
+            if not self._cancelled:
+                self.failed.emit(self.request, str(e))
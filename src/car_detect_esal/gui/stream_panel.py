@@ -7,18 +7,35 @@ from typing import Optional
 from .video_label import VideoLabel
 from .stream_worker import StreamWorker
 from ..core.detector import VehicleDetector
+from ..core.counting_line import CountingLine
 from ..core.esal_calculator import ESALCalculator
 
 class StreamPanel(QtWidgets.QWidget):
-    """단일 스트림을 위한 패널 위젯"""
+    """
+    단일 스트림을 위한 패널 위젯
+    
+    표시 모드에 따라 워커가 보내는 프레임을 조절한다.
+    - hidden: 프레임을 받지 않음 (오버레이/QImage 변환 생략, 탐지·카운트는 계속)
+    - thumbnail: 작은 타일용 저빈도 프레임 (thumbnail_fps)
+    - full: 포커스/큰 패널용 전체 빈도 프레임 (display_fps)
+    """
+    
+    DISPLAY_HIDDEN = 'hidden'
+    DISPLAY_THUMBNAIL = 'thumbnail'
+    DISPLAY_FULL = 'full'
+    
+    focus_requested = QtCore.pyqtSignal(object)  # StreamPanel
     
     def __init__(self, source: str, detector: VehicleDetector, performance_config: dict = None, 
-                 db_manager=None, camera_id: str = None):
+                 db_manager=None, camera_id: str = None, inference_server=None):
         super().__init__()
         self.source = source
         self.detector = detector
-        self.performance_config = performance_config or {"sleep_time": 0.1, "imgsz": 640}
+        self.inference_server = inference_server
+        self.performance_config = performance_config or {"fps_target": 10, "imgsz": 640}
         self.roi = None
+        # 계수선 모드 (None이면 새 추적 생성 시 카운트)
+        self.counting_line = None
         self.worker = None
         self.esal_calculator = ESALCalculator()
         
@@ -28,6 +45,13 @@ class StreamPanel(QtWidgets.QWidget):
         
         self._setup_ui()
         self._connect_signals()
+        
+        # 화면 갱신 주기로 워커의 최신 프레임만 가져와 표시
+        self.display_fps = self.performance_config.get("display_fps", 30)
+        self.thumbnail_fps = self.performance_config.get("thumbnail_fps", 5)
+        self.display_mode = self.DISPLAY_FULL
+        self._display_timer = QtCore.QTimer(self)
+        self._display_timer.timeout.connect(self._poll_frame)
 
     def _setup_ui(self):
         """UI 구성 요소 설정"""
@@ -131,8 +155,26 @@ class StreamPanel(QtWidgets.QWidget):
             }
         """)
         
+        # 포커스 버튼 (이 스트림만 크게 보기 / 그리드로 복귀)
+        self.focus_btn = QtWidgets.QPushButton("Focus")
+        self.focus_btn.setCheckable(True)
+        
+        # 계수선 그리기 모드 (켜면 드래그로 선을 그림) 및 카운트 방향
+        self.line_btn = QtWidgets.QPushButton("Line")
+        self.line_btn.setCheckable(True)
+        self.line_btn.setToolTip("Drag to draw a counting line | Double-click to remove")
+        self.direction_combo = QtWidgets.QComboBox()
+        for label, direction in (("⇅ Both", CountingLine.BOTH),
+                                 ("→ Fwd", CountingLine.FORWARD),
+                                 ("← Bwd", CountingLine.BACKWARD)):
+            self.direction_combo.addItem(label, direction)
+        self.direction_combo.setToolTip("Counting direction (forward = right of the drawn line)")
+        
         bottom_layout.addWidget(self.start_btn)
         bottom_layout.addWidget(self.stop_btn)
+        bottom_layout.addWidget(self.focus_btn)
+        bottom_layout.addWidget(self.line_btn)
+        bottom_layout.addWidget(self.direction_combo)
         
         bottom_layout.addStretch()
         
@@ -152,6 +194,64 @@ class StreamPanel(QtWidgets.QWidget):
         self.start_btn.clicked.connect(self.start)
         self.stop_btn.clicked.connect(self.stop)
         self.video.roi_changed.connect(self.on_roi_changed)
+        self.video.display_size_changed.connect(self.on_display_resized)
+        self.focus_btn.clicked.connect(lambda: self.focus_requested.emit(self))
+        self.video.line_changed.connect(self.on_line_changed)
+        self.line_btn.toggled.connect(self._on_line_mode_toggled)
+        self.direction_combo.currentIndexChanged.connect(self._on_direction_changed)
+    
+    def _on_line_mode_toggled(self, checked):
+        """계수선 그리기 모드 전환"""
+        self.video.line_mode = checked
+    
+    def _on_direction_changed(self, _index):
+        """현재 계수선에 새 카운트 방향 적용"""
+        if self.counting_line is not None:
+            p1, p2, _ = self.counting_line.to_tuple()
+            self.on_line_changed((p1, p2))
+    
+    def on_line_changed(self, points):
+        """
+        계수선 변경 처리 - 탐지는 선 주변 띠에서만, 카운트는 선을 넘을 때만
+        
+        Args:
+            points: ((x1, y1), (x2, y2)) 원본 프레임 좌표 또는 None
+        """
+        direction = self.direction_combo.currentData()
+        line = None
+        if points:
+            line = CountingLine(points[0], points[1], direction,
+                                band=self.performance_config.get("line_band", 80))
+        self.counting_line = line
+        self.video.set_counting_line(points, direction)
+        if self.worker is not None:
+            self.worker.set_counting_line(line)
+        
+        if line is not None:
+            self.roi_label.setText(f"Line: {direction}")
+            self.roi_label.setStyleSheet("color: #FF9800; font-size: 10px; font-weight: bold;")
+            print(f"[StreamPanel] Counting line set: {points[0]} -> {points[1]} ({direction})")
+        else:
+            self.on_roi_changed(self.roi)
+    
+    def set_model(self, detector: VehicleDetector, inference_server=None):
+        """모델 교체 (백그라운드 로드 완료/프리셋 전환) - 실행 중인 워커에도 즉시 반영"""
+        self.detector = detector
+        self.inference_server = inference_server
+        if self.worker is not None:
+            self.worker.inference_server = inference_server
+            self.worker.detector = detector
+    
+    def set_performance_config(self, performance_config: dict):
+        """성능 프리셋 교체 - 실행 중인 워커의 페이싱/해상도/키프레임 간격에도 즉시 반영"""
+        self.performance_config = performance_config
+        if self.worker is not None:
+            self.worker.set_performance_config(performance_config)
+    
+    def on_display_resized(self, size):
+        """표시 영역 크기를 워커에 전달 (축소는 워커 스레드에서 수행)"""
+        if self.worker is not None:
+            self.worker.display_size = size
     
     def on_roi_changed(self, roi):
         """ROI 변경 처리"""
@@ -180,22 +280,27 @@ class StreamPanel(QtWidgets.QWidget):
             self.detector, 
             self.performance_config,
             self.db_manager,
-            self.camera_id
+            self.camera_id,
+            self.inference_server
         )
         
-        self.worker.frame_ready.connect(self.on_frame)
         self.worker.status.connect(self.on_status)
         self.worker.count_changed.connect(self.on_count_changed)
         
         if self.roi is not None:
             self.worker.roi = self.roi
+        if self.counting_line is not None:
+            self.worker.set_counting_line(self.counting_line)
+        self.worker.display_size = (self.video.width(), self.video.height())
             
         self.worker.start()
+        self._apply_display_mode()
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
 
     def stop(self):
         """스트림 중지"""
+        self._display_timer.stop()
         if self.worker:
             self.worker.stop()
             self.worker.wait(2000)
@@ -203,10 +308,53 @@ class StreamPanel(QtWidgets.QWidget):
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
 
-    def on_frame(self, qimg: QtGui.QImage):
-        """프레임 업데이트"""
+    def set_display_mode(self, mode: str):
+        """
+        표시 모드 변경
+        
+        Args:
+            mode: DISPLAY_HIDDEN, DISPLAY_THUMBNAIL, DISPLAY_FULL 중 하나
+        """
+        if mode == self.display_mode:
+            return
+        self.display_mode = mode
+        self._apply_display_mode()
+
+    def _apply_display_mode(self):
+        """현재 표시 모드(숨겨진 위젯은 hidden)를 워커와 표시 타이머에 반영"""
+        mode = self.display_mode if self.isVisible() else self.DISPLAY_HIDDEN
+        if mode == self.DISPLAY_HIDDEN:
+            self._display_timer.stop()
+        else:
+            fps = self.thumbnail_fps if mode == self.DISPLAY_THUMBNAIL else self.display_fps
+            self._display_timer.setInterval(max(1, int(1000 / fps)))
+            if self.worker is not None and self.worker.isRunning():
+                self._display_timer.start()
+        
+        if self.worker is not None:
+            self.worker.render_enabled = mode != self.DISPLAY_HIDDEN
+            self.worker.display_interval = 1.0 / self.thumbnail_fps if mode == self.DISPLAY_THUMBNAIL else 0.0
+
+    def showEvent(self, event):
+        """패널이 보이면 현재 표시 모드로 프레임 수신 재개"""
+        super().showEvent(event)
+        self._apply_display_mode()
+
+    def hideEvent(self, event):
+        """패널이 숨겨지면 프레임 수신 중지 (탐지·카운트는 계속)"""
+        super().hideEvent(event)
+        self._apply_display_mode()
+
+    def _poll_frame(self):
+        """mailbox의 최신 프레임 표시 (새 프레임이 없으면 아무것도 하지 않음)"""
+        if self.worker is None:
+            return
+        item = self.worker.display_mailbox.get_latest(timeout=0)
+        if item is None:
+            return
+        (qimg, orig_size), _ = item
         try:
-            self.video.set_qimage(qimg)
+            self.video.set_qimage(qimg, orig_size)
         except Exception as e:
             print(f"[StreamPanel] Frame error: {e}")
 
@@ -3,48 +3,108 @@ Background worker thread for video stream processing and inference
 """
 
 import time
-import math
+import uuid
+from pathlib import Path
 from PyQt5 import QtCore, QtGui
 from typing import Optional, Tuple, Dict
-from ..core.detector import VehicleDetector, VehicleTracker
+from ..core.detector import VehicleDetector, VehicleTracker, extract_tracker_detections
+from ..core.detection_batch import DetectionBatch
+from ..core.inference_server import BatchInferenceServer
+from ..core.frame_grabber import FrameGrabber, FrameRingBuffer
+from ..core.performance_config import AdaptiveFrameController
+from ..core.quantization import CalibrationRecorder
+from ..core.motion_gate import MotionGate, GateDecision
 from ..database import TrafficDatabaseManager
 
+# Qt 5.14+ 에서만 제공 (없으면 RGB 변환으로 폴백)
+_FORMAT_BGR888 = getattr(QtGui.QImage, 'Format_BGR888', None)
+
 class StreamWorker(QtCore.QThread):
     """
-    비디오 소스를 읽고 모델 추론을 수행하여 QImage를 방출하는 워커 스레드
+    비디오 소스를 읽고 모델 추론을 수행하여 표시용 QImage를 만드는 워커 스레드
+    
+    roi 속성(원본 프레임 좌표)이 설정되면 detector가 원본 해상도에서 해당 영역만
+    크롭해서 추론하고, 원본 프레임 좌표로 변환된 결과를 원본 프레임에 오버레이한다.
     
-    roi 속성이 설정되면 해당 영역만 크롭해서 추론하고, 
-    결과를 원본 프레임에 오버레이한다.
+    표시용 프레임은 display_size(위젯 크기)에 맞춰 워커에서 축소한 뒤 최신 프레임
+    한 장만 담는 display_mailbox에 덮어쓴다. GUI는 화면 갱신 주기로 꺼내 그리기만 한다.
     """
 
-    frame_ready = QtCore.pyqtSignal(object)  # QImage
     status = QtCore.pyqtSignal(str)
     count_changed = QtCore.pyqtSignal(object)  # Dict[str, int]
 
     def __init__(self, source: str, detector: VehicleDetector, performance_config: dict = None, 
-                 db_manager: TrafficDatabaseManager = None, camera_id: str = None):
+                 db_manager: TrafficDatabaseManager = None, camera_id: str = None,
+                 inference_server: BatchInferenceServer = None):
         super().__init__()
         self.source = source
         self.detector = detector
+        # 공유 배치 추론 서버 (없으면 detector 직접 호출)
+        self.inference_server = inference_server
         self._running = True
         
         # 성능 설정 (기본값 사용 또는 전달받은 설정)
         self.performance_config = performance_config or {
-            "sleep_time": 0.1,
+            "fps_target": 10,
             "imgsz": 640
         }
         
+        # 폐루프 프레임 페이싱 (처리 시간을 제외한 남은 예산만큼만 대기)
+        self.frame_controller = AdaptiveFrameController(self.performance_config)
+        
         # ROI: (x, y, w, h) in 원본 프레임 픽셀 좌표 또는 None
         self.roi = None
+        # 계수선 (CountingLine) - 설정되면 ROI 대신 선 주변 띠만 탐지하고 선 통과 시 카운트
+        self.counting_line = None
+        
+        # 화면 표시 여부 (False면 오버레이/QImage 변환을 생략하고 탐지·카운트만 수행)
+        self.render_enabled = True
+        # 표시 프레임 최소 간격(초) - 썸네일 모드에서 표시 빈도를 낮춤, 0이면 매 프레임
+        self.display_interval = 0.0
+        self._last_display = 0.0
+        
+        # 표시 영역 크기 (width, height) - GUI 스레드가 갱신, None이면 원본 크기
+        self.display_size = None
+        
+        # 최신 표시 프레임 한 장만 보관: ((QImage, 원본 프레임 크기), 시각)
+        # GUI가 느리면 이전 프레임을 덮어써서 큐가 쌓이지 않는다.
+        self.display_mailbox = FrameRingBuffer(capacity=1)
         
         # 차량 추적기
         self.tracker = VehicleTracker()
         
+        # 모션 게이트: 움직임이 없거나 멈춘 프레임은 추론 생략, 움직임 영역만 탐지
+        self.motion_gate = None
+        if self.performance_config.get("motion_gate", True):
+            self.motion_gate = MotionGate(
+                refresh_interval=self.performance_config.get("gate_refresh_interval", 2.0)
+            )
+        # 추론을 생략한 프레임에 다시 그릴 마지막 탐지 결과
+        self._last_result = None
+        # 직전 프레임이 게이트로 생략되었는지 (움직임 재개 시 즉시 탐지)
+        self._gated = False
+        
+        # 키프레임 모드: N 프레임마다 탐지하고 사이 프레임은 칼만 예측 박스만 그림
+        self.keyframe_interval = max(1, int(self.performance_config.get("keyframe_interval", 1)))
+        self._since_keyframe = self.keyframe_interval
+        # 이 시간(초) 이상 관측되지 않은 추적은 예측 박스를 그리지 않음
+        self.predict_max_age = self.performance_config.get("predict_max_age", 1.0)
+        
+        # INT8 양자화 보정용 프레임 기록 (performance_config의 calibration_dir 설정 시)
+        self.calibration_recorder = None
+        
         # 데이터베이스 관련
         self.db_manager = db_manager
         self.camera_id = camera_id or f"cam_{int(time.time())}"
-        self.detection_buffer = []  # 탐지 결과 버퍼
-        self.last_db_save = time.time()
+        # 추론 서버 대기 슬롯 토큰 (같은 camera_id를 쓰는 워커끼리 요청을 대체하지 않도록)
+        self.client_token = uuid.uuid4().hex
+        
+        calibration_dir = self.performance_config.get("calibration_dir")
+        if calibration_dir:
+            self.calibration_recorder = CalibrationRecorder(
+                str(Path(calibration_dir) / self.camera_id),
+                interval=self.performance_config.get("calibration_interval", 5.0)
+            )
         
         # FPS 측정용 변수들
         self.fps_counter = 0
@@ -55,14 +115,35 @@ class StreamWorker(QtCore.QThread):
         """워커 스레드 중지"""
         self._running = False
 
+    def set_performance_config(self, performance_config: dict):
+        """프리셋 변경 반영 (실행 중에도 다음 프레임부터 적용)"""
+        self.performance_config = performance_config
+        self.frame_controller.reconfigure(performance_config)
+        self.keyframe_interval = max(1, int(performance_config.get("keyframe_interval", 1)))
+        self._since_keyframe = self.keyframe_interval
+
+    def set_counting_line(self, line):
+        """계수선 설정/해제 (None이면 새 추적 생성 시 카운트하는 기본 모드)"""
+        self.counting_line = line
+        self.tracker.counting_line = line
+
+    def _detection_roi(self, frame_size) -> Optional[Tuple[int, int, int, int]]:
+        """탐지 영역 - 계수선 모드면 선 주변 띠, 아니면 사용자 ROI"""
+        line = self.counting_line
+        if line is not None:
+            return line.band_roi(frame_size)
+        return self.roi
+
     def run(self):
         """메인 워커 루프"""
-        import cv2
+        # 캡처는 별도 스레드에서 수행 - 실시간 소스는 최신 프레임만, 파일은 모든 프레임을 가져감
+        buffer_size = self.performance_config.get("buffer_size", 2)
+        grabber = FrameGrabber(self.source, buffer_size=buffer_size)
+        grabber.start()
         
         # 소스 열기 시도
-        cap = cv2.VideoCapture(self.source)
-        
-        if not cap.isOpened():
+        if not grabber.wait_opened():
+            grabber.stop()
             self.status.emit("소스 열기 실패")
             return
 
@@ -71,21 +152,34 @@ class StreamWorker(QtCore.QThread):
         last_fps_update = time.time()
         
         while self._running:
-            ret, frame = cap.read()
-            if not ret:
-                # 비디오 파일의 끝에 도달했을 때 처음부터 다시 시작
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            item = grabber.read(timeout=1.0)
+            if item is None:
+                if not grabber.is_alive():
+                    self.status.emit("소스 연결 끊김")
+                    break
                 continue
+            frame, _ = item
 
+            self.frame_controller.begin_frame()
             frame_count += 1
             
+            # 오버레이가 그려지기 전의 원본 프레임을 보정용으로 기록
+            if self.calibration_recorder is not None:
+                self.calibration_recorder.maybe_record(frame, self.roi)
+            
+            # 이번 프레임을 화면에 보낼지 결정 (보내지 않는 프레임은 오버레이도 생략)
+            render = self._should_render()
+            
             # 프레임 처리 및 탐지 수행
-            annotated_frame = self._process_frame(frame)
+            annotated_frame = self._process_frame(frame, render)
             
-            # QImage로 변환하여 방출
-            qimg = self._frame_to_qimage(annotated_frame)
-            if qimg is not None:
-                self.frame_ready.emit(qimg)
+            # 표시 중인 스트림만 표시 크기로 축소/변환하여 mailbox에 덮어씀
+            if render:
+                h, w = annotated_frame.shape[:2]
+                display_frame = self._fit_to_display(annotated_frame, self.display_size)
+                qimg = self._frame_to_qimage(display_frame)
+                if qimg is not None:
+                    self.display_mailbox.put((qimg, (w, h)))
             
             # FPS 계산
             current_time = time.time()
@@ -100,35 +194,92 @@ class StreamWorker(QtCore.QThread):
             # 상태 업데이트 (덜 자주 업데이트하여 UI 부하 감소)
             if frame_count % 30 == 0:  # 30프레임마다 한 번씩만 업데이트
                 total_count = self.tracker.count
-                self.status.emit(f"🎥 FPS: {self.current_fps:.1f} | 프레임: {frame_count} | 카운트: {total_count}")
+                buf = grabber.buffer
+                # 실측 탐지 시간 기준 추천 프리셋 (현재 프리셋과 다를 때만 표시)
+                recommended = self.frame_controller.recommend_preset()
+                if recommended == self.performance_config.get("preset"):
+                    recommended = None
+                self.status.emit(
+                    f"🎥 FPS: {self.current_fps:.1f} | 프레임: {frame_count} | 카운트: {total_count}"
+                    f" | 추적: {self.tracker.memory_stats()['tracks']}"
+                    f" | 드롭: {buf.dropped + buf.skipped} | 지연: {buf.last_staleness * 1000:.0f}ms"
+                    f" | imgsz: {self.frame_controller.imgsz}"
+                    + (f" | 게이트 스킵: {self.motion_gate.skip_ratio:.0%}"
+                       f" ({self.motion_gate.avg_latency_ms:.1f}ms)" if self.motion_gate else "")
+                    + (f" | 키프레임: 1/{self.keyframe_interval}" if self.keyframe_interval > 1 else "")
+                    + (f" | 추천 프리셋: {recommended}" if recommended else "")
+                )
             
-            # 적절한 프레임레이트 유지 (부드러운 재생을 위해 sleep 시간 단축)
-            sleep_time = self.performance_config.get("sleep_time", 0.03)  # 33FPS 목표
-            time.sleep(sleep_time)
+            # 목표 FPS의 프레임 예산 중 남은 시간만큼만 대기
+            self.frame_controller.pace()
 
-        cap.release()
+        grabber.stop()
+        grabber.join(2.0)
+        self.display_mailbox.close()
         self.status.emit("중지됨")
 
-    def _process_frame(self, frame) -> any:
+    def _should_render(self) -> bool:
+        """표시 여부와 표시 간격(display_interval)에 따라 이번 프레임 렌더링 여부 결정"""
+        if not self.render_enabled:
+            return False
+        now = time.monotonic()
+        if now - self._last_display < self.display_interval:
+            return False
+        self._last_display = now
+        return True
+
+    def _process_frame(self, frame, render: bool = True) -> any:
         """프레임 처리 및 차량 탐지"""
         try:
-            import cv2
-            
-            # 프레임을 성능 설정에 따른 해상도로 리사이즈 (속도 최적화)
-            target_size = self.performance_config.get("imgsz", 640)
             h, w = frame.shape[:2]
-            original_frame_size = (w, h)  # 데이터베이스 저장용 원본 크기
+            original_frame_size = (w, h)  # 좌표 정규화용 원본 크기
             
-            if w != target_size or h != target_size:
-                frame = cv2.resize(frame, (target_size, target_size), interpolation=cv2.INTER_LINEAR)
+            roi = self._detection_roi(original_frame_size)
+            region = None
+            force = False
+            if self.motion_gate is not None:
+                decision = self.motion_gate.check(frame, roi)
+                if not decision.run:
+                    # 장면이 그대로이므로 추적 시계를 멈추고 이전 결과를 다시 그림
+                    self._gated = True
+                    self.tracker.hold(within=roi)
+                    if render and self._last_result is not None and self.detector is not None:
+                        frame = self.detector.renderer.render(frame, self._last_result)
+                    return frame
+                region = decision.region
+                # 게이트의 주기 탐지 요청이나 정지 후 새 움직임은 키프레임 간격과 무관하게 탐지
+                force = decision.reason == GateDecision.REFRESH or self._gated
+                self._gated = False
             
-            # 탐지 수행
-            annotated, results = self.detector.detect(frame, self.roi)
+            # 키프레임 사이 프레임: 탐지 없이 추적을 예측 위치로 전파해서 그림
+            self._since_keyframe += 1
+            if (not force and self._since_keyframe < self.keyframe_interval
+                    and self._last_result is not None and self.detector is not None):
+                self.tracker.predict()
+                if render:
+                    predicted = self.tracker.predicted_result(original_frame_size, self.detector.names,
+                                                              self.predict_max_age)
+                    frame = self.detector.renderer.render(frame, predicted)
+                return frame
+            self._since_keyframe = 0
+            
+            # 탐지 수행 (ROI 크롭/레터박스는 detector가 원본 프레임에서 한 번만 수행)
+            # 계수선 모드는 모션 영역이 없으면 띠 전체를 탐지 (띠 밖의 추적은 정상적으로 만료)
+            motion_region = region
+            if region is None and self.counting_line is not None:
+                region = roi
+            annotated, results = self._detect(frame, render, region)
+            self.frame_controller.mark_detected()
             
             # 탐지 결과를 추적 시스템에 전달하고 새로운 객체만 DB에 저장
             if results is not None:
+                self._last_result = results[0]
                 detections = self._extract_detections_with_bbox(results, original_frame_size)
                 
+                # 움직임 영역만 탐지한 경우 영역 밖 추적은 유지
+                if motion_region is not None:
+                    self.tracker.hold(outside=motion_region, within=roi)
+                
                 # 추적기 업데이트 - 새로운 객체만 반환
                 updated_counts, new_detections = self.tracker.update(detections)
                 
@@ -146,145 +297,106 @@ class StreamWorker(QtCore.QThread):
             print(f"[StreamWorker] 프레임 처리 오류: {e}")
             return frame
 
-    def _extract_detections_with_bbox(self, results, original_frame_size) -> list:
-        """YOLO 결과에서 탐지된 객체의 전체 정보 추출 (추적 및 DB 저장용)"""
-        detections = []
+    def _detect(self, frame, annotate: bool = True, region: Optional[Tuple[int, int, int, int]] = None):
+        """
+        배치 추론 서버가 있으면 서버를 통해, 없으면 직접 탐지
         
+        Args:
+            region: 탐지할 (x, y, w, h) 영역 (모션 영역 또는 계수선 띠) - 지정하면 ROI 대신
+                이 영역만 탐지. 입력 크기는 영역을 담는 고정 단계 중 가장 작은 값으로 맞춰
+                다른 카메라의 요청과 같은 배치로 묶일 수 있게 함
+        """
+        roi, imgsz = self.roi, self.frame_controller.imgsz
+        if region is not None:
+            roi = region
+            imgsz = self.frame_controller.region_imgsz(max(region[2], region[3]))
+        if self.inference_server is not None and self.inference_server.is_running:
+            return self.inference_server.infer(self.camera_id, frame, roi, imgsz, annotate=annotate,
+                                               client_id=self.client_token)
+        if self.detector is None:
+            # 모델 백그라운드 로드 중에는 영상만 표시
+            return frame, None
+        return self.detector.detect(frame, roi, imgsz, annotate)
+
+    def _extract_detections_with_bbox(self, results, original_frame_size) -> DetectionBatch:
+        """탐지 결과(원본 프레임 좌표)를 추적기 입력 배치로 변환 (추적 및 DB 저장용)"""
         try:
-            boxes = getattr(results[0], 'boxes', None)
-            names = getattr(results[0], 'names', {})
-            
-            if boxes is None or not hasattr(boxes, 'xyxy'):
-                return detections
-                
-            xyxy = boxes.xyxy.tolist() if hasattr(boxes.xyxy, 'tolist') else []
-            cls_list = boxes.cls.tolist() if hasattr(boxes, 'cls') and hasattr(boxes.cls, 'tolist') else []
-            conf_list = boxes.conf.tolist() if hasattr(boxes, 'conf') and hasattr(boxes.conf, 'tolist') else []
-            
-            frame_width, frame_height = original_frame_size
-            
-            for i, bbox in enumerate(xyxy):
-                if len(bbox) < 4:
-                    continue
-                    
-                x1, y1, x2, y2 = bbox[:4]
-                
-                # 중심점 계산
-                cx = (x1 + x2) / 2.0
-                cy = (y1 + y2) / 2.0
-                
-                # ROI 오프셋 적용 (ROI가 있는 경우)
-                if self.roi:
-                    cx += self.roi[0]
-                    cy += self.roi[1]
-                
-                # 클래스 및 신뢰도
-                vehicle_class = int(cls_list[i]) if i < len(cls_list) else 0
-                vehicle_type = str(names.get(vehicle_class, 'unknown'))
-                confidence = float(conf_list[i]) if i < len(conf_list) else 0.0
-                
-                # 낮은 신뢰도는 제외
-                if confidence < 0.5:
-                    continue
-                
-                # 정규화된 좌표 계산 (0.0 ~ 1.0)
-                norm_x = cx / frame_width
-                norm_y = cy / frame_height
-                norm_width = (x2 - x1) / frame_width
-                norm_height = (y2 - y1) / frame_height
-                
-                # 차량 타입 매핑
-                vehicle_type_map = {
-                    'car': 'car',
-                    'motorcycle': 'motorbike',
-                    'bus': 'bus',
-                    'truck': 'truck',
-                    'bicycle': 'motorbike',
-                    'van': 'van'
-                }
-                
-                standardized_type = vehicle_type_map.get(vehicle_type.lower(), 'car')
-                
-                # bbox 데이터
-                bbox_data = {
-                    'vehicle_type': standardized_type,
-                    'vehicle_class': vehicle_class,
-                    'bbox_x': norm_x,
-                    'bbox_y': norm_y,
-                    'bbox_width': norm_width,
-                    'bbox_height': norm_height
-                }
-                
-                # (중심x, 중심y, 클래스명, 신뢰도, bbox데이터) 형태로 반환
-                detections.append((cx, cy, standardized_type, confidence, bbox_data))
-                    
+            return extract_tracker_detections(results[0], original_frame_size)
         except Exception as e:
             print(f"[StreamWorker] 탐지 추출 오류: {e}")
-        
-        return detections
+            return DetectionBatch.empty()
 
     def _save_new_detections_to_db(self, new_detections):
-        """새로 발견된 객체만 DB에 저장 (중복 방지)"""
+        """새로 발견된 객체만 DB writer 큐에 추가 (중복 방지, 논블로킹)"""
         try:
             if not self.db_manager or not new_detections:
                 return
             
-            # 버퍼에 추가
-            self.detection_buffer.extend(new_detections)
-            
-            # 버퍼가 가득 차거나 일정 시간이 지나면 저장
-            current_time = time.time()
-            buffer_full = len(self.detection_buffer) >= 20  # 20개씩 배치 저장 (이전 50에서 감소)
-            time_to_save = (current_time - self.last_db_save) >= 10  # 10초마다 저장 (이전 30초에서 감소)
-            
-            if (buffer_full or time_to_save) and self.detection_buffer:
-                try:
-                    success = self.db_manager.record_vehicle_detection(
-                        self.camera_id, 
-                        self.detection_buffer
-                    )
-                    
-                    if success:
-                        saved_count = len(self.detection_buffer)
-                        self.detection_buffer.clear()
-                        self.last_db_save = current_time
-                        print(f"[DB] ✅ {saved_count}개의 새로운 차량 저장 완료 (중복 제거됨)")
-                    else:
-                        print("[DB] ❌ 데이터베이스 저장 실패")
-                        
-                except Exception as e:
-                    print(f"[DB] 저장 중 오류: {e}")
+            # 실제 DB 기록은 writer 스레드가 배치로 처리
+            self.db_manager.enqueue_vehicle_detections(self.camera_id, new_detections)
                     
         except Exception as e:
             print(f"[StreamWorker] DB 저장 처리 오류: {e}")
 
-    def _frame_to_qimage(self, frame) -> Optional[QtGui.QImage]:
-        """OpenCV 프레임을 QImage로 변환"""
+    @staticmethod
+    def _fit_to_display(frame, display_size: Optional[Tuple[int, int]]):
+        """
+        종횡비를 유지한 채 프레임을 표시 영역 크기에 맞춤 (워커 스레드에서 수행)
+        
+        Args:
+            frame: 오버레이가 그려진 원본 프레임
+            display_size: 표시 영역 (width, height), None이면 그대로 반환
+        """
+        if not display_size:
+            return frame
+        
+        import cv2
+        
+        h, w = frame.shape[:2]
+        disp_w, disp_h = display_size
+        if disp_w <= 0 or disp_h <= 0:
+            return frame
+        scale = min(disp_w / w, disp_h / h)
+        new_size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        if new_size == (w, h):
+            return frame
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        return cv2.resize(frame, new_size, interpolation=interpolation)
+
+    @staticmethod
+    def _frame_to_qimage(frame) -> Optional[QtGui.QImage]:
+        """
+        OpenCV 프레임을 복사 없이 QImage로 변환
+        
+        Format_BGR888(Qt 5.14+)로 프레임 버퍼를 그대로 감싸고, QImage 객체에 numpy
+        배열 참조를 붙여 GUI 스레드가 사용하는 동안 버퍼가 해제되지 않도록 한다.
+        방출 후 워커는 해당 프레임을 다시 수정하지 않는다.
+        """
         try:
-            import cv2
-            
-            # BGR to RGB 변환
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb.shape
-            bytes_per_line = rgb.strides[0]
+            import numpy as np
             
-            qimg = QtGui.QImage(
-                rgb.data, w, h, bytes_per_line, QtGui.QImage.Format_RGB888
-            )
+            if frame.ndim == 2:
+                buf = np.ascontiguousarray(frame)
+                h, w = buf.shape
+                qimg = QtGui.QImage(buf.data, w, h, buf.strides[0], QtGui.QImage.Format_Grayscale8)
+            elif _FORMAT_BGR888 is not None:
+                buf = np.ascontiguousarray(frame)
+                h, w = buf.shape[:2]
+                qimg = QtGui.QImage(buf.data, w, h, buf.strides[0], _FORMAT_BGR888)
+            else:
+                # 구버전 Qt: RGB 변환 1회 (변환 결과를 그대로 공유)
+                import cv2
+                buf = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                h, w = buf.shape[:2]
+                qimg = QtGui.QImage(buf.data, w, h, buf.strides[0], QtGui.QImage.Format_RGB888)
             
-            # QImage가 자체 버퍼를 소유하도록 복사
-            return qimg.copy()
+            # QImage 수명 동안 numpy 버퍼 유지
+            qimg._buffer = buf
+            return qimg
             
         except Exception as e:
             print(f"[StreamWorker] QImage 변환 오류: {e}")
-            try:
-                # 그레이스케일로 폴백
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                h, w = gray.shape
-                qimg = QtGui.QImage(gray.data, w, h, w, QtGui.QImage.Format_Grayscale8)
-                return qimg.copy()
-            except:
-                return None
+            return None
 
     def reset_count(self):
         """카운트 리셋"""
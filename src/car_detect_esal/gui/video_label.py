@@ -12,9 +12,13 @@ class VideoLabel(QtWidgets.QLabel):
     
     표시된 영상은 aspect-fit(KeepAspectRatio)로 축소/확대되므로, 
     위젯 좌표를 원본 프레임 좌표로 정확히 매핑한다.
+    
+    line_mode가 켜져 있으면 드래그로 ROI 대신 계수선(시작점 -> 끝점)을 그린다.
     """
 
     roi_changed = QtCore.pyqtSignal(object)  # (x,y,w,h) or None
+    line_changed = QtCore.pyqtSignal(object)  # ((x1,y1), (x2,y2)) or None
+    display_size_changed = QtCore.pyqtSignal(object)  # (width, height)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -49,14 +53,76 @@ class VideoLabel(QtWidgets.QLabel):
         self._disp_offset = (0, 0)
         # 마지막으로 설정된 roi (원본 이미지 좌표)
         self._last_roi = None
+        
+        # 계수선 그리기 모드와 현재 계수선 ((x1,y1), (x2,y2)) - 원본 이미지 좌표
+        self.line_mode = False
+        self._line = None
+        self._line_direction = 'both'
+        # 드래그 중인 선의 끝점 (위젯 좌표)
+        self._line_drag = None
+
+    def set_counting_line(self, line, direction: str = 'both'):
+        """표시할 계수선 설정 (원본 이미지 좌표, None이면 제거)"""
+        self._line = line
+        self._line_direction = direction
+        self.update()
+
+    def _to_original(self, pos: QtCore.QPoint) -> Optional[Tuple[int, int]]:
+        """위젯 좌표 -> 원본 이미지 좌표 (표시 영역 안으로 보정)"""
+        if self._orig_size is None or not self._disp_size or not self._disp_size[0]:
+            return None
+        ox, oy = self._disp_offset
+        dw, dh = self._disp_size
+        ow, oh = self._orig_size
+        x = max(0, min(pos.x() - ox, dw - 1))
+        y = max(0, min(pos.y() - oy, dh - 1))
+        return int(x * ow / dw), int(y * oh / dh)
+
+    def _to_display(self, point) -> QtCore.QPointF:
+        """원본 이미지 좌표 -> 위젯 좌표"""
+        ox, oy = self._disp_offset
+        dw, dh = self._disp_size
+        ow, oh = self._orig_size
+        return QtCore.QPointF(point[0] * dw / ow + ox, point[1] * dh / oh + oy)
+
+    def _draw_line(self, qp: QtGui.QPainter, p1: QtCore.QPointF, p2: QtCore.QPointF, direction: str):
+        """계수선과 카운트 방향 화살표 그리기 (forward = p1->p2 기준 오른쪽)"""
+        pen = QtGui.QPen(QtGui.QColor(255, 152, 0))
+        pen.setWidth(3)
+        qp.setPen(pen)
+        qp.drawLine(p1, p2)
+        
+        dx, dy = p2.x() - p1.x(), p2.y() - p1.y()
+        length = (dx * dx + dy * dy) ** 0.5
+        if length < 1:
+            return
+        # 오른쪽 법선 (화면 좌표계, y 아래 방향)
+        nx, ny = -dy / length * 20, dx / length * 20
+        mid = QtCore.QPointF((p1.x() + p2.x()) / 2, (p1.y() + p2.y()) / 2)
+        signs = {'forward': (1,), 'backward': (-1,)}.get(direction, (1, -1))
+        for sign in signs:
+            tip = QtCore.QPointF(mid.x() + nx * sign, mid.y() + ny * sign)
+            qp.drawLine(mid, tip)
+            qp.drawEllipse(tip, 3, 3)
+
+    def resizeEvent(self, ev):
+        """표시 영역 크기 변경을 워커에 알려 워커가 미리 축소하도록 함"""
+        super().resizeEvent(ev)
+        self.display_size_changed.emit((self.width(), self.height()))
 
-    def set_qimage(self, qimg: QtGui.QImage):
-        """QImage를 위젯에 표시"""
+    def set_qimage(self, qimg: QtGui.QImage, orig_size: Optional[Tuple[int, int]] = None):
+        """
+        QImage를 위젯에 표시
+        
+        Args:
+            qimg: 표시할 이미지 (워커가 표시 크기로 미리 축소한 이미지)
+            orig_size: 원본 프레임 (width, height) - ROI 좌표 매핑용, None이면 qimg 크기
+        """
         # keep a reference to qimg to avoid underlying buffer being freed
         self._last_qimg = qimg
         
         # store original frame size
-        new_size = (qimg.width(), qimg.height())
+        new_size = tuple(orig_size) if orig_size else (qimg.width(), qimg.height())
         
         # 크기가 변경된 경우에만 로그 출력 (성능 최적화)
         if not hasattr(self, '_last_frame_size') or self._last_frame_size != new_size:
@@ -68,11 +134,13 @@ class VideoLabel(QtWidgets.QLabel):
         
         self._orig_size = new_size
         
-        # 위젯 크기에 맞춰 스케일링, aspect ratio 유지
+        # 워커가 이미 위젯 크기에 맞췄으므로 그대로 표시
+        # (크기 변경 직후처럼 맞지 않을 때만 빠른 스케일링, aspect ratio 유지)
+        pix = QtGui.QPixmap.fromImage(qimg)
         target_size = self.size()
-        pix = QtGui.QPixmap.fromImage(qimg).scaled(
-            target_size, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation
-        )
+        if (pix.width() > target_size.width() or pix.height() > target_size.height() or
+                (pix.width() < target_size.width() and pix.height() < target_size.height())):
+            pix = pix.scaled(target_size, QtCore.Qt.KeepAspectRatio, QtCore.Qt.FastTransformation)
         self._disp_size = (pix.width(), pix.height())
         
         # compute offsets to center the pixmap
@@ -116,17 +184,35 @@ class VideoLabel(QtWidgets.QLabel):
                 qp.drawText(dx + 5, dy + 20, f"ROI: {rw}x{rh}")
                 
             qp.end()
+        
+        # 계수선 (드래그 중이면 드래그 중인 선)
+        if self._line_drag is not None:
+            qp = QtGui.QPainter(self)
+            self._draw_line(qp, QtCore.QPointF(self._origin), QtCore.QPointF(self._line_drag),
+                            self._line_direction)
+            qp.end()
+        elif self._line is not None and self._orig_size and self._disp_size:
+            qp = QtGui.QPainter(self)
+            self._draw_line(qp, self._to_display(self._line[0]), self._to_display(self._line[1]),
+                            self._line_direction)
+            qp.end()
 
     def mousePressEvent(self, ev: QtGui.QMouseEvent):
         """마우스 클릭으로 ROI 선택 시작"""
-        if ev.button() == QtCore.Qt.LeftButton:
+        if ev.button() == QtCore.Qt.LeftButton and self.line_mode:
+            self._origin = ev.pos()
+            self._line_drag = ev.pos()
+        elif ev.button() == QtCore.Qt.LeftButton:
             self._origin = ev.pos()
             self._rubber.setGeometry(QtCore.QRect(self._origin, QtCore.QSize()))
             self._rubber.show()
 
     def mouseMoveEvent(self, ev: QtGui.QMouseEvent):
         """마우스 드래그로 ROI 영역 조정"""
-        if self._origin is not None:
+        if self._origin is not None and self.line_mode:
+            self._line_drag = ev.pos()
+            self.update()
+        elif self._origin is not None:
             rect = QtCore.QRect(self._origin, ev.pos()).normalized()
             self._rubber.setGeometry(rect)
 
@@ -134,6 +220,19 @@ class VideoLabel(QtWidgets.QLabel):
         """마우스 릴리즈로 ROI 선택 완료"""
         if self._origin is None:
             return
+        
+        if self.line_mode:
+            p1, p2 = self._to_original(self._origin), self._to_original(ev.pos())
+            self._origin = None
+            self._line_drag = None
+            # 너무 짧은 선(단순 클릭)은 무시
+            if p1 is None or p2 is None or abs(p1[0] - p2[0]) + abs(p1[1] - p2[1]) < 10:
+                self.update()
+                return
+            self._line = (p1, p2)
+            self.line_changed.emit(self._line)
+            self.update()
+            return
             
         rect = self._rubber.geometry()
         self._rubber.hide()
@@ -182,7 +281,12 @@ class VideoLabel(QtWidgets.QLabel):
             self.roi_changed.emit((rx, ry, rw, rh))
 
     def mouseDoubleClickEvent(self, ev: QtGui.QMouseEvent):
-        """더블클릭으로 ROI 초기화"""
+        """더블클릭으로 ROI 초기화 (계수선 모드에서는 계수선 제거)"""
+        if self.line_mode:
+            self._line = None
+            self.line_changed.emit(None)
+            self.update()
+            return
         self._last_roi = None
         self.roi_changed.emit(None)
         self.update()  # 화면 갱신으로 ROI 표시 제거
\ No newline at end of file
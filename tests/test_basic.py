@@ -2,7 +2,9 @@
 Basic tests for the Car Detection ESAL system
 """
 
+import time
 import unittest
+from unittest import mock
 import sys
 from pathlib import Path
 
@@ -11,6 +13,24 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from car_detect_esal.core.config import Config
 from car_detect_esal.core.esal_calculator import ESALCalculator
+from car_detect_esal.core.inference_server import BatchInferenceServer
+from car_detect_esal.core.detector import VehicleDetector, VehicleTracker, OverlayRenderer, DetectionResult
+from car_detect_esal.core.preprocess import Letterboxer
+from car_detect_esal.core.inference_backends import InferenceBackend, non_max_suppression, create_backend
+from car_detect_esal.core.frame_grabber import FrameRingBuffer, FrameGrabber
+from car_detect_esal.core.video_analyzer import plan_chunks, merge_counts, summarize_counts, VideoAnalyzer
+from car_detect_esal.core.quantization import CalibrationRecorder, ModelVariantRegistry, compare_counts
+from car_detect_esal.core.model_manager import ModelManager
+from car_detect_esal.core.motion_gate import MotionGate, GateDecision
+from car_detect_esal.core.counting_line import CountingLine
+from car_detect_esal.core.detection_batch import DetectionBatch, vehicle_type_lut
+from car_detect_esal.core.performance_config import PerformanceConfig, AdaptiveFrameController
+from car_detect_esal.database.writer import DetectionWriteQueue
+from car_detect_esal.database.pool import ConnectionPool, PoolTimeoutError
+from car_detect_esal.database.camera_registry import CameraRegistry
+from car_detect_esal.database.rollups import DetectionRollups, esal_weight
+from car_detect_esal.database.esal_engine import ESALAnalysisEngine
+from car_detect_esal.database.partitions import DetectionPartitionManager
 
 class TestConfig(unittest.TestCase):
     """Test configuration module"""
@@ -55,6 +75,1096 @@ class TestESALCalculator(unittest.TestCase):
         rec = self.calculator.get_maintenance_recommendation(1500000)
         self.assertIn('전면재포장', rec)
 
+def _det(x, y, class_name='car', conf=0.9):
+    """Build a tracker input tuple"""
+    bbox = {
+        'vehicle_type': class_name, 'vehicle_class': 0,
+        'bbox_x': 0.0, 'bbox_y': 0.0, 'bbox_width': 0.1, 'bbox_height': 0.1,
+    }
+    return (x, y, class_name, conf, bbox)
+
+
+class TestVehicleTracker(unittest.TestCase):
+    """Test vehicle tracking and counting"""
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('car_detect_esal.core.detector.time.time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tracker = VehicleTracker(track_ttl=3.0, match_threshold=100.0)
+
+    def test_moving_vehicle_counted_once(self):
+        """A vehicle moving within the match threshold is counted once"""
+        for step in range(10):
+            counts, new = self.tracker.update([_det(100 + step * 20, 200)])
+            self.now += 0.1
+        self.assertEqual(counts, {'car': 1})
+        self.assertEqual(self.tracker.count, 1)
+
+    def test_classes_do_not_match(self):
+        """Detections of a different class never match an existing track"""
+        self.tracker.update([_det(100, 100, 'car')])
+        counts, new = self.tracker.update([_det(105, 100, 'truck')])
+        self.assertEqual(counts, {'car': 1, 'truck': 1})
+        self.assertEqual(len(new), 1)
+        self.assertEqual(new[0]['vehicle_type'], 'truck')
+
+    def test_expired_track_counts_again(self):
+        """A track unseen for longer than the TTL is counted again"""
+        self.tracker.update([_det(100, 100)])
+        self.now += 5.0
+        counts, new = self.tracker.update([_det(100, 100)])
+        self.assertEqual(counts, {'car': 2})
+        self.assertEqual(new[0]['track_id'], 1)
+
+    def test_global_assignment(self):
+        """Each track is assigned to its closest detection"""
+        self.tracker.update([_det(100, 100), _det(250, 100)])
+        # 두 차량이 서로 가까워져도 각각 유지
+        counts, new = self.tracker.update([_det(160, 100), _det(200, 100)])
+        self.assertEqual(counts, {'car': 2})
+        self.assertEqual(len(new), 0)
+        # Track 0 (x=100) moves toward 160 and track 1 (x=250) toward 200
+        positions = {t['track_id']: t['pos'][0] for t in self.tracker.tracks}
+        self.assertTrue(100 < positions[0] <= 160)
+        self.assertTrue(200 <= positions[1] < 250)
+
+    def test_explicit_timestamps(self):
+        """Video time passed as `now` drives expiry instead of wall clock"""
+        self.tracker.update([_det(100, 100)], now=0.0)
+        self.tracker.update([_det(100, 100)], now=2.0)
+        counts, _ = self.tracker.update([_det(100, 100)], now=10.0)
+        self.assertEqual(counts, {'car': 2})
+
+    def test_kalman_predicts_between_detections(self):
+        """Constant-velocity prediction follows a vehicle between keyframes"""
+        for step in range(6):
+            self.tracker.update([_det(100 + step * 20, 200)])  # 200 px/s
+            self.now += 0.1
+        self.now += 0.2
+        self.tracker.predict()
+        track = self.tracker.tracks[0]
+        self.assertAlmostEqual(track['pos'][0], 100 + 7 * 20 + 20, delta=15)
+        self.assertAlmostEqual(track['velocity'][0], 200, delta=40)
+
+        result = self.tracker.predicted_result((640, 480), {0: 'car'})
+        self.assertEqual(len(result), 1)
+        x1, y1, x2, y2 = result.xyxy[0]
+        self.assertAlmostEqual((x1 + x2) / 2, track['pos'][0], delta=1)
+
+    def test_prediction_keeps_fast_vehicle_matched(self):
+        """A vehicle that moves beyond the match threshold between keyframes stays one track"""
+        for step in range(4):
+            self.tracker.update([_det(100 + step * 60, 200)])  # 600 px/s at 10 fps
+            self.now += 0.1
+        self.now += 0.2  # two frames without detection
+        counts, new = self.tracker.update([_det(100 + 6 * 60, 200)])
+        self.assertEqual(counts, {'car': 1})
+        self.assertEqual(len(new), 0)
+
+    def test_counting_line_ignores_track_fragments(self):
+        """With a counting line, a broken track that re-forms past the line is not recounted"""
+        self.tracker.counting_line = CountingLine((0, 300), (640, 300), CountingLine.FORWARD)
+        counts, new = self.tracker.update([_det(100, 250, 'truck')])
+        self.assertEqual((counts, len(new)), ({}, 0))
+        self.now += 0.1
+        counts, new = self.tracker.update([_det(100, 310, 'truck')])  # crosses downward
+        self.assertEqual(counts, {'truck': 1})
+        self.assertEqual(new[0]['direction'], CountingLine.FORWARD)
+
+        self.now += 5.0  # track lost, then re-detected below the line
+        counts, new = self.tracker.update([_det(100, 360, 'truck')])
+        self.now += 0.1
+        counts, new = self.tracker.update([_det(100, 380, 'truck')])
+        self.assertEqual(counts, {'truck': 1})
+        self.assertEqual(len(new), 0)
+
+    def test_counting_line_direction(self):
+        self.tracker.counting_line = CountingLine((0, 300), (640, 300), CountingLine.FORWARD)
+        self.tracker.update([_det(100, 350)])
+        self.now += 0.1
+        counts, _ = self.tracker.update([_det(100, 290)])  # crosses upward (backward)
+        self.assertEqual(counts, {})
+
+    def test_memory_bounded_by_live_tracks(self):
+        """Saved flags and arrays are evicted with their tracks, so memory stays flat"""
+        for vehicle in range(200):
+            self.tracker.update([_det(100, 100 + (vehicle % 2) * 300)])
+            self.now += 5.0
+        self.tracker.update([])
+        stats = self.tracker.memory_stats()
+        self.assertEqual(self.tracker.count, 200)
+        self.assertEqual(stats['tracks'], 0)
+        self.assertEqual(stats['array_bytes'], 0)
+        self.assertEqual(stats['tracks_created'], 200)
+        self.assertEqual(self.tracker.saved_track_ids, set())
+
+    def test_track_id_wraps(self):
+        self.tracker.next_track_id = VehicleTracker.MAX_TRACK_ID
+        _, new = self.tracker.update([_det(100, 100), _det(400, 100)])
+        self.assertEqual(sorted(d['track_id'] for d in new), [0, VehicleTracker.MAX_TRACK_ID])
+        self.assertEqual(self.tracker.next_track_id, 1)
+
+    def test_hold_pauses_ttl(self):
+        """Time spent on gated (skipped) frames does not age tracks"""
+        self.tracker.update([_det(100, 100)])
+        for _ in range(10):  # 10 seconds of static frames
+            self.now += 1.0
+            self.tracker.hold()
+        counts, new = self.tracker.update([_det(100, 100)])
+        self.assertEqual(counts, {'car': 1})
+        self.assertEqual(len(new), 0)
+
+    def test_hold_outside_region(self):
+        """Region-only detection keeps tracks outside the region but ages the rest"""
+        self.tracker.update([_det(100, 100), _det(500, 100, 'truck')])
+        self.now += 5.0
+        self.tracker.hold(outside=(400, 0, 200, 200))
+        counts, _ = self.tracker.update([])
+        self.assertEqual([t['class_name'] for t in self.tracker.tracks], ['car'])
+
+
+class TestLetterbox(unittest.TestCase):
+    """Test ROI-first letterbox preprocessing"""
+
+    def test_roi_crop_letterbox_round_trip(self):
+        import numpy as np
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        letterboxer = Letterboxer()
+        transform = letterboxer.get(frame, (100, 200, 400, 200), 320)
+        self.assertIs(letterboxer.get(frame, (100, 200, 400, 200), 320), transform)
+
+        image = transform.apply(frame)
+        # aspect preserved: 400x200 -> 320x160, already a multiple of 32
+        self.assertEqual(image.shape[:2], (160, 320))
+
+        # a box covering the whole ROI maps back to the ROI in frame coordinates
+        boxes = transform.to_original(np.array([[0, 0, 320, 160], [160, 80, 320, 160]]))
+        np.testing.assert_allclose(boxes[0], [100, 200, 500, 400])
+        np.testing.assert_allclose(boxes[1], [300, 300, 500, 400])
+
+    def test_padding_is_removed(self):
+        import numpy as np
+        frame = np.zeros((480, 500, 3), dtype=np.uint8)
+        transform = Letterboxer().get(frame, None, 640)
+        image = transform.apply(frame)
+        self.assertEqual(image.shape[1], 640)
+        self.assertEqual(image.shape[0] % 32, 0)
+        self.assertGreater(transform.pad[1], 0)
+        top = transform.pad[1]
+        boxes = transform.to_original(np.array([[0, top, 640, top + 480 * transform.scale]]))
+        np.testing.assert_allclose(boxes[0], [0, 0, 500, 480], atol=1e-3)
+
+
+class TestOverlayRenderer(unittest.TestCase):
+    """Test in-place overlay rendering"""
+
+    def test_draws_in_place_with_cached_labels(self):
+        import numpy as np
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        result = DetectionResult(
+            np.array([[10, 40, 80, 100], [150, 0, 160, 20]], dtype=np.float32),
+            np.array([0.91, 0.55], dtype=np.float32),
+            np.array([2, 7]),
+            {2: 'car', 7: 'truck'},
+            None
+        )
+        renderer = OverlayRenderer()
+        self.assertIs(renderer.render(frame, result), frame)
+        self.assertTrue(frame[40:100, 10].any())
+        self.assertEqual(len(renderer._labels), 2)
+
+        renderer.render(frame, result)
+        self.assertEqual(len(renderer._labels), 2)
+        self.assertEqual(renderer.color(2), renderer.color(2 + len(renderer.PALETTE)))
+
+
+class TestDetectionBatch(unittest.TestCase):
+    """Test vectorized detection extraction"""
+
+    def setUp(self):
+        import numpy as np
+        self.names = {0: 'car', 3: 'motorcycle', 5: 'bus', 7: 'truck', 9: 'traffic light'}
+        self.result = DetectionResult(
+            np.array([[0, 0, 100, 50], [200, 100, 300, 300], [10, 10, 20, 20], [0, 0, 40, 40]],
+                     dtype=np.float32),
+            np.array([0.9, 0.8, 0.3, 0.7], dtype=np.float32),
+            np.array([7, 3, 0, 42]),
+            self.names,
+        )
+
+    def test_from_result(self):
+        import numpy as np
+        from car_detect_esal.core.detector import extract_tracker_detections
+        batch = extract_tracker_detections(self.result, (400, 200))
+        self.assertEqual(len(batch), 3)  # conf 0.3 dropped
+        np.testing.assert_allclose(batch.centers[:2], [[50, 25], [250, 200]])
+        np.testing.assert_allclose(batch.boxes[0], [0.125, 0.125, 0.25, 0.25])
+        # unknown class id -> car
+        self.assertEqual([batch.vehicle_type(i) for i in range(3)], ['truck', 'motorbike', 'car'])
+        self.assertEqual(batch.model_cls.tolist(), [7, 3, 42])
+
+    def test_lut_built_once_per_names(self):
+        self.assertIs(vehicle_type_lut(self.names), vehicle_type_lut(self.names))
+
+    def test_tracker_accepts_batch(self):
+        batch = DetectionBatch.from_result(self.result, (400, 200))
+        counts, new = VehicleTracker().update(batch, now=0.0)
+        self.assertEqual(counts, {'truck': 1, 'motorbike': 1, 'car': 1})
+        self.assertEqual(new[0]['bbox_width'], 0.25)
+        self.assertEqual(new[0]['vehicle_class'], 7)
+
+    def test_records_round_trip(self):
+        from datetime import datetime
+        batch = DetectionBatch.from_result(self.result, (400, 200))
+        batch.track_id[:] = [5, 6, 7]
+        batch.direction[:] = [1, 0, -1]
+        batch.stamp(datetime(2024, 1, 1, 8, 30), frame_number=12)
+        records = batch.records()
+        self.assertEqual(records[0]['direction'], 'forward')
+        self.assertNotIn('direction', records[1])
+        self.assertEqual(records[2]['timestamp'], datetime(2024, 1, 1, 8, 30))
+        restored = DetectionBatch.from_records(records)
+        self.assertEqual(restored.records(), records)
+        self.assertEqual(restored.frame_numbers(), [12, 12, 12])
+
+        merged = DetectionBatch.concat([batch.take([0]), restored.take(slice(1, None))])
+        self.assertEqual(merged.type_counts(), {'truck': 1, 'motorbike': 1, 'car': 1})
+        self.assertEqual(merged.track_id.tolist(), [5, 6, 7])
+
+    def test_track_and_direction_columns(self):
+        box = {'bbox_x': 0.5, 'bbox_y': 0.5, 'bbox_width': 0.1, 'bbox_height': 0.1}
+        batch = DetectionBatch.from_records([
+            dict(box, vehicle_type='car', confidence=0.9, track_id=7, direction='backward'),
+            dict(box, vehicle_type='truck', confidence=0.8),
+        ])
+        self.assertEqual(batch.track_ids(), [7, None])
+        self.assertEqual(batch.directions(), ['backward', None])
+
+    def test_empty(self):
+        import numpy as np
+        result = DetectionResult(np.empty((0, 4)), np.empty(0), np.empty(0), self.names)
+        batch = DetectionBatch.from_result(result, (400, 200))
+        self.assertEqual(len(batch), 0)
+        counts, new = VehicleTracker().update(batch, now=0.0)
+        self.assertEqual((counts, len(new)), ({}, 0))
+
+
+class TestFrameToQImage(unittest.TestCase):
+    """Test zero-copy frame hand-off to the GUI"""
+
+    def test_qimage_shares_frame_buffer(self):
+        import numpy as np
+        from car_detect_esal.gui.stream_worker import StreamWorker
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        frame[0, 0] = (255, 0, 0)  # blue in BGR
+        qimg = StreamWorker._frame_to_qimage(frame)
+        self.assertEqual((qimg.width(), qimg.height()), (1920, 1080))
+        self.assertEqual(int(qimg.constBits()), frame.ctypes.data)
+        self.assertEqual(qimg.pixelColor(0, 0).blue(), 255)
+
+    def test_fit_to_display_keeps_aspect(self):
+        import numpy as np
+        from car_detect_esal.gui.stream_worker import StreamWorker
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        self.assertIs(StreamWorker._fit_to_display(frame, None), frame)
+        small = StreamWorker._fit_to_display(frame, (480, 480))
+        self.assertEqual(small.shape[:2], (270, 480))
+
+    def test_display_rate_limit(self):
+        from car_detect_esal.gui.stream_worker import StreamWorker
+        worker = StreamWorker("unused", detector=None)
+        worker.display_interval = 60.0
+        self.assertTrue(worker._should_render())
+        self.assertFalse(worker._should_render())
+        worker.display_interval = 0.0
+        worker.render_enabled = False
+        self.assertFalse(worker._should_render())
+
+
+class TestVideoAnalyzer(unittest.TestCase):
+    """Test chunk planning and count merging for archived video analysis"""
+
+    def test_plan_chunks_with_overlap(self):
+        from datetime import datetime
+        start = datetime(2024, 1, 1, 8, 0)
+        chunks = plan_chunks("video.mp4", frame_count=2500, fps=10, chunk_seconds=100,
+                             overlap_seconds=5, start_time=start)
+        self.assertEqual([(c.warmup_frame, c.start_frame, c.end_frame) for c in chunks],
+                         [(0, 0, 1000), (950, 1000, 2000), (1950, 2000, 2500)])
+        self.assertEqual(chunks[1].frame_time(1000), datetime(2024, 1, 1, 8, 1, 40))
+
+    def test_failed_inference_does_not_drop_chunk(self):
+        import cv2
+        import tempfile
+        import numpy as np
+        from datetime import datetime
+
+        class FailingDetector:
+            def detect(self, frame, roi=None, imgsz=None, annotate=True):
+                return frame, None
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "clip.avi")
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+            for _ in range(5):
+                writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+            writer.release()
+
+            chunk = plan_chunks(path, frame_count=5, fps=10, chunk_seconds=100,
+                                start_time=datetime(2024, 1, 1))[0]
+            result = VideoAnalyzer(FailingDetector()).analyze_chunk(chunk)
+
+        self.assertEqual((result['frames'], result['failed_frames']), (5, 5))
+        self.assertEqual(result['counts'], {})
+        self.assertEqual(len(result['detections']), 0)
+
+    def test_merge_and_summarize(self):
+        from datetime import datetime
+        hour = datetime(2024, 1, 1, 8)
+        results = [
+            {'video': 'a.mp4', 'counts': {hour: {'car': 2, 'truck': 1}}},
+            {'video': 'a.mp4', 'counts': {hour: {'car': 3}}},
+        ]
+        merged = merge_counts(results)
+        self.assertEqual(merged['a.mp4'][hour], {'car': 5, 'truck': 1})
+        rows = summarize_counts(merged, ESALCalculator())
+        self.assertEqual([(r['vehicle_type'], r['count']) for r in rows], [('car', 5), ('truck', 1)])
+        self.assertGreater(rows[1]['esal'], rows[0]['esal'])
+
+
+class _EchoBackend(InferenceBackend):
+    """Backend whose raw output is supplied by the test"""
+
+    name = 'echo'
+
+    def forward(self, batch):
+        self.batch_shape = batch.shape
+        return self.output
+
+
+class TestInferenceBackends(unittest.TestCase):
+    """Test shared backend preprocessing and NMS"""
+
+    @staticmethod
+    def _raw(rows, num_classes=3):
+        """(cx, cy, w, h, class, score) rows -> (4 + nc, anchors) YOLOv8 output"""
+        import numpy as np
+        pred = np.zeros((4 + num_classes, len(rows)), dtype=np.float32)
+        for i, (cx, cy, w, h, cls, score) in enumerate(rows):
+            pred[:4, i] = (cx, cy, w, h)
+            pred[4 + cls, i] = score
+        return pred
+
+    def test_nms_suppresses_overlaps(self):
+        pred = self._raw([
+            (50, 50, 20, 20, 0, 0.9),
+            (51, 50, 20, 20, 0, 0.8),   # overlaps the first box
+            (51, 50, 20, 20, 1, 0.7),   # same place, other class
+            (150, 50, 20, 20, 2, 0.6),
+            (300, 50, 20, 20, 2, 0.1),  # below threshold
+        ])
+        xyxy, conf, cls = non_max_suppression(pred, conf_thres=0.25, iou_thres=0.5)
+        self.assertEqual(cls.tolist(), [0, 1, 2])
+        self.assertEqual(xyxy[0].tolist(), [40, 40, 60, 60])
+
+        _, _, cls = non_max_suppression(pred, conf_thres=0.25, iou_thres=0.5, agnostic=True)
+        self.assertEqual(cls.tolist(), [0, 2])
+
+    def test_prepare_pads_bottom_right(self):
+        import numpy as np
+        backend = _EchoBackend("unused.pt", imgsz=64)
+        backend.output = np.stack([self._raw([(10, 10, 4, 4, 0, 0.9)])] * 2)
+        sources = [np.zeros((32, 64, 3), dtype=np.uint8), np.zeros((64, 32, 3), dtype=np.uint8)]
+        results = backend.predict(sources)
+        self.assertEqual(backend.batch_shape, (2, 3, 64, 64))
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[1][0].tolist(), [[8, 8, 12, 12]])
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            create_backend("tensorrt", "unused.pt")
+
+
+class TestQuantization(unittest.TestCase):
+    """Test INT8 validation gates and the variant registry"""
+
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_compare_counts_pass(self):
+        fp32 = {'car': 100, 'truck': 20, 'bus': 10}
+        report = compare_counts(fp32, {'car': 99, 'truck': 20, 'bus': 10})
+        self.assertTrue(report['passed'])
+        self.assertEqual(report['per_class']['car']['delta'], -1)
+        self.assertEqual(set(report['heavy']), {'truck', 'bus'})
+
+    def test_compare_counts_heavy_drift_fails(self):
+        """Losing a few trucks fails even when the total count is within tolerance"""
+        fp32 = {'car': 1000, 'truck': 20}
+        report = compare_counts(fp32, {'car': 1002, 'truck': 17}, max_esal_drift=1.0)
+        self.assertLess(abs(report['total_count']['drift']), 0.05)
+        self.assertFalse(report['passed'])
+        self.assertTrue(any('truck' in f for f in report['failures']))
+
+        # Heavy classes absent from FP32 still fail if INT8 invents them
+        report = compare_counts({'car': 10}, {'car': 10, 'bus': 1})
+        self.assertEqual(report['heavy']['bus']['drift'], 1.0)
+        self.assertFalse(report['passed'])
+
+    def test_registry_roundtrip(self):
+        model = self.dir / 'build' / 'best_int8.onnx'
+        model.parent.mkdir()
+        model.write_bytes(b'onnx')
+        Path(f"{model}.meta.json").write_text('{"names": {"0": "car"}}')
+        weights = self.dir / 'weights'
+        registry = ModelVariantRegistry(str(weights))
+
+        failed = compare_counts({'truck': 10}, {'truck': 5})
+        with self.assertRaises(ValueError):
+            registry.register('int8', str(model), 'onnxruntime', 'best.pt', failed)
+        self.assertIsNone(registry.get('int8'))
+
+        passed = compare_counts({'truck': 10}, {'truck': 10})
+        registry.register('int8', str(model), 'onnxruntime', 'best.pt', passed)
+        entry = ModelVariantRegistry.for_weights(str(weights / 'best.pt')).get('int8')
+        self.assertEqual(entry['backend'], 'onnxruntime')
+        self.assertTrue(Path(entry['path']).exists())
+        self.assertTrue(Path(f"{entry['path']}.meta.json").exists())
+        # 다른 백엔드용으로는 조회되지 않음 (프리셋 백엔드를 바꾸지 않음)
+        self.assertIsNone(registry.get('int8', 'openvino'))
+        self.assertEqual(registry.get('int8', 'onnxruntime')['path'], entry['path'])
+        self.assertEqual(registry.backends('int8'), ['onnxruntime'])
+
+        self.assertTrue(registry.unregister('int8'))
+        self.assertIsNone(registry.get('int8'))
+
+        # 이름당 항목 하나였던 이전 형식도 백엔드별로 읽음
+        registry.path.write_text(
+            '{"int8": {"backend": "onnxruntime", "path": "best_int8.onnx"}}', encoding='utf-8')
+        self.assertIsNotNone(registry.get('int8', 'onnxruntime'))
+        self.assertIsNone(registry.get('int8', 'openvino'))
+
+    def test_calibration_recorder_interval(self):
+        import numpy as np
+        recorder = CalibrationRecorder(str(self.dir / 'cam'), interval=60.0, max_frames=5)
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        self.assertTrue(recorder.maybe_record(frame, (10, 10, 50, 40)))
+        self.assertFalse(recorder.maybe_record(frame))
+        saved = list((self.dir / 'cam').glob('*.jpg'))
+        self.assertEqual(len(saved), 1)
+        import cv2
+        self.assertEqual(cv2.imread(str(saved[0])).shape[:2], (40, 50))
+
+
+class _FakeManagedDetector:
+    """Stands in for VehicleDetector inside ModelManager"""
+
+    instances = 0
+    last = None
+
+    def __init__(self, model_path, imgsz=640, conf=0.5, backend='pytorch', threads=0, model_variant=None):
+        _FakeManagedDetector.instances += 1
+        _FakeManagedDetector.last = self
+        self.conf = conf
+        self.warmed = []
+
+    def warmup(self, imgsz, runs=1):
+        self.warmed.append(imgsz)
+
+
+def _last_warmed():
+    return _FakeManagedDetector.last.warmed
+
+
+class TestModelManager(unittest.TestCase):
+    """Test the process-wide model cache and warm-up"""
+
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.weights = Path(self.tmp.name) / 'best.pt'
+        self.weights.write_bytes(b'weights-v1')
+        _FakeManagedDetector.instances = 0
+        patcher = mock.patch('car_detect_esal.core.model_manager.VehicleDetector', _FakeManagedDetector)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cache_by_hash_backend_imgsz(self):
+        manager = ModelManager()
+        progress = []
+        first = manager.get(str(self.weights), backend='onnxruntime', warmup_sizes=[320, 640, 1280],
+                            progress=lambda p, m: progress.append(p))
+        self.assertEqual(first.warmed, [320, 640])
+        self.assertEqual(progress[-1], 100)
+
+        # Same weights/backend/imgsz -> no reload, conf follows the latest request
+        again = manager.get(str(self.weights), conf=0.7, backend='onnxruntime', warmup_sizes=[320])
+        self.assertIs(again, first)
+        self.assertEqual(again.conf, 0.7)
+        self.assertEqual(_FakeManagedDetector.instances, 1)
+
+        self.assertIsNot(manager.get(str(self.weights), backend='openvino'), first)
+        self.assertIsNot(manager.get(str(self.weights), backend='onnxruntime', imgsz=416), first)
+        self.assertEqual(_FakeManagedDetector.instances, 3)
+
+    def test_cancel_skips_remaining_warmup(self):
+        manager = ModelManager()
+        detector = manager.get(str(self.weights), warmup_sizes=[320, 416, 640],
+                               cancelled=lambda: len(_last_warmed()) >= 1)
+        self.assertEqual(detector.warmed, [320])
+
+    def test_changed_weights_reload(self):
+        manager = ModelManager()
+        first = manager.get(str(self.weights))
+        self.weights.write_bytes(b'weights-v2-retrained')
+        self.assertIsNot(manager.get(str(self.weights)), first)
+
+    def test_detector_warmup_runs_backend(self):
+        import numpy as np
+        backend = _EchoBackend("unused.pt", imgsz=640)
+        backend.output = np.zeros((1, 7, 1), dtype=np.float32)
+        with mock.patch('car_detect_esal.core.detector.create_backend', return_value=backend):
+            detector = VehicleDetector("unused.pt", imgsz=640)
+        detector.warmup(320, runs=2)
+        self.assertEqual(backend.batch_shape, (1, 3, 192, 320))  # 16:9 letterboxed to stride 32
+
+
+class TestMotionGate(unittest.TestCase):
+    """Test motion gating of inference"""
+
+    def setUp(self):
+        import numpy as np
+        self.np = np
+        self.gate = MotionGate(width=160, refresh_interval=2.0)
+        self.background = np.full((360, 640, 3), 80, dtype=np.uint8)
+
+    def _noisy(self, seed):
+        rng = self.np.random.default_rng(seed)
+        noise = rng.integers(-3, 4, self.background.shape)
+        return (self.background.astype(self.np.int16) + noise).astype(self.np.uint8)
+
+    def test_static_scene_skips_until_refresh(self):
+        self.assertTrue(self.gate.check(self._noisy(0), now=0.0).run)
+        decision = self.gate.check(self._noisy(1), now=0.5)
+        self.assertEqual((decision.run, decision.reason), (False, GateDecision.STATIC))
+        decision = self.gate.check(self._noisy(2), now=2.5)
+        self.assertEqual((decision.run, decision.reason), (True, GateDecision.REFRESH))
+        self.assertAlmostEqual(self.gate.skip_ratio, 1 / 3)
+
+    def test_motion_region(self):
+        self.gate.check(self.background, now=0.0)
+        frame = self.background.copy()
+        frame[100:160, 200:300] = 255  # a vehicle appears
+        decision = self.gate.check(frame, now=0.1)
+        self.assertEqual(decision.reason, GateDecision.MOTION)
+        x, y, w, h = decision.region
+        self.assertTrue(x <= 200 and y <= 100 and x + w >= 300 and y + h >= 160)
+        self.assertEqual(x % 32, 0)
+        self.assertLess(w * h, 640 * 360 / 2)
+
+    def test_frozen_feed(self):
+        frame = self._noisy(0)
+        self.gate.check(frame, now=0.0)
+        for t in (1.0, 5.0, 10.0):  # refresh interval does not apply to a frozen feed
+            decision = self.gate.check(frame.copy(), now=t)
+            self.assertEqual(decision.reason, GateDecision.FROZEN)
+        self.assertEqual(self.gate.frozen, 3)
+
+    def test_roi_change_forces_detection(self):
+        self.gate.check(self.background, now=0.0)
+        decision = self.gate.check(self.background, (0, 0, 320, 180), now=0.1)
+        self.assertTrue(decision.run)
+
+
+class TestCountingLine(unittest.TestCase):
+    """Test counting line geometry"""
+
+    def test_crossings(self):
+        import numpy as np
+        line = CountingLine((100, 200), (500, 200))
+        start = np.array([[200, 150], [200, 250], [50, 150], [300, 150], [300, 200]])
+        end = np.array([[200, 250], [200, 150], [50, 250], [300, 180], [300, 250]])
+        # down = forward, up = backward, outside the segment, no crossing, starting on the line
+        self.assertEqual(line.crossings(start, end).tolist(), [1, -1, 0, 0, 0])
+
+    def test_direction_filter(self):
+        import numpy as np
+        crossing = np.array([1, -1, 0], dtype=np.int8)
+        self.assertEqual(CountingLine((0, 0), (1, 0), CountingLine.BACKWARD).counts(crossing).tolist(),
+                         [False, True, False])
+        self.assertEqual(CountingLine((0, 0), (1, 0)).counts(crossing).tolist(), [True, True, False])
+        with self.assertRaises(ValueError):
+            CountingLine((0, 0), (1, 0), 'sideways')
+
+    def test_band_roi(self):
+        line = CountingLine((100, 540), (1800, 560), band=80)
+        x, y, w, h = line.band_roi((1920, 1080))
+        self.assertTrue(x <= 20 and y <= 460 and x + w >= 1880 and y + h >= 640)
+        self.assertEqual((x % 32, y % 32), (0, 0))
+        self.assertGreater(1920 * 1080 / (w * h), 5)
+
+
+class TestFrameRingBuffer(unittest.TestCase):
+    """Test drop-oldest frame buffering"""
+
+    def test_drops_oldest_and_returns_latest(self):
+        buffer = FrameRingBuffer(capacity=2)
+        for i in range(5):
+            buffer.put(i)
+        frame, _ = buffer.get_latest(timeout=0)
+        self.assertEqual(frame, 4)
+        self.assertEqual(buffer.dropped, 3)
+        self.assertEqual(buffer.skipped, 1)
+        self.assertIsNone(buffer.get_latest(timeout=0))
+
+    def test_file_source_delivers_every_frame(self):
+        import cv2
+        import tempfile
+        import numpy as np
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "clip.avi")
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+            for i in range(100):
+                writer.write(np.full((48, 64, 3), i * 2, dtype=np.uint8))
+            writer.release()
+
+            grabber = FrameGrabber(path, buffer_size=2)
+            self.assertTrue(grabber.is_file)
+            grabber.start()
+            self.assertTrue(grabber.wait_opened())
+            values = []
+            for _ in range(100):
+                time.sleep(0.001)  # 소비자가 캡처보다 느린 상황
+                frame, _ = grabber.read(timeout=2.0)
+                values.append(int(frame[0, 0, 0]))
+            grabber.stop()
+            grabber.join(2.0)
+
+        self.assertEqual(len(values), 100)
+        # MJPG 손실 압축 오차를 허용하되 프레임 순서/누락은 검출
+        self.assertTrue(all(abs(v - i * 2) <= 2 for i, v in enumerate(values)))
+        self.assertEqual(grabber.buffer.skipped, 0)
+        self.assertEqual(grabber.buffer.dropped, 0)
+
+
+class TestAdaptiveFrameController(unittest.TestCase):
+    """Test closed-loop frame pacing"""
+
+    def setUp(self):
+        self.now = 0.0
+        patcher = mock.patch('car_detect_esal.core.performance_config.time.monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run_frames(self, controller, frame_time, frames, detected=True):
+        remaining = 0.0
+        for _ in range(frames):
+            controller.begin_frame()
+            if detected:
+                controller.mark_detected()
+            self.now += frame_time
+            remaining = controller.end_frame()
+        return remaining
+
+    def test_sleeps_only_remaining_budget(self):
+        controller = AdaptiveFrameController({"fps_target": 10, "imgsz": 640})
+        remaining = self._run_frames(controller, 0.04, 1)
+        self.assertAlmostEqual(remaining, 0.06)
+        self.assertEqual(self._run_frames(controller, 0.2, 1), 0.0)
+
+    def test_steps_imgsz_down_and_up_with_hysteresis(self):
+        controller = AdaptiveFrameController({"fps_target": 10, "imgsz": 640}, window=5, patience=2)
+        # 목표 미달이 한 윈도우뿐이면 유지
+        self._run_frames(controller, 0.2, 5)
+        self.assertEqual(controller.imgsz, 640)
+        self._run_frames(controller, 0.2, 5)
+        self.assertEqual(controller.imgsz, 512)
+        # 여유가 충분하면 다시 상향 (프리셋 imgsz가 상한)
+        self._run_frames(controller, 0.01, 20)
+        self.assertEqual(controller.imgsz, 640)
+
+    def test_skipped_frames_do_not_raise_imgsz(self):
+        controller = AdaptiveFrameController({"fps_target": 10, "imgsz": 640}, window=5, patience=2)
+        self._run_frames(controller, 0.2, 10)
+        self.assertEqual(controller.imgsz, 512)
+        # 게이트/키프레임으로 탐지를 생략한 빠른 프레임은 측정에서 제외
+        self.assertAlmostEqual(self._run_frames(controller, 0.001, 50, detected=False), 0.099)
+        self.assertEqual(controller.imgsz, 512)
+        self.assertAlmostEqual(controller.measured_frame_time, 0.2)
+
+    def test_reconfigure_applies_preset(self):
+        controller = AdaptiveFrameController({"fps_target": 6, "imgsz": 640})
+        controller.imgsz = 416
+        controller.reconfigure(PerformanceConfig.get_preset("ultra_fast"))
+        self.assertEqual(controller.fps_target, 20)
+        self.assertEqual((controller.max_imgsz, controller.imgsz), (320, 320))
+        self.assertAlmostEqual(controller.frame_budget, 0.05)
+
+    def test_region_imgsz_snaps_to_ladder(self):
+        controller = AdaptiveFrameController({"fps_target": 10, "imgsz": 640})
+        sizes = {controller.region_imgsz(extent) for extent in range(1, 2000, 7)}
+        self.assertEqual(sizes, {160, 320, 416, 512, 640})
+        self.assertEqual(controller.region_imgsz(200), 320)
+        controller.imgsz = 416
+        self.assertEqual(controller.region_imgsz(500), 416)
+        self.assertEqual(controller.region_imgsz(100), 160)
+
+    def test_default_preset_needs_no_optional_backend(self):
+        preset = PerformanceConfig.get_preset(PerformanceConfig.DEFAULT_PRESET)
+        self.assertEqual(preset["backend"], "pytorch")
+
+    def test_recommend_preset_from_measurement(self):
+        self.assertEqual(PerformanceConfig.recommend_preset_for_measurement(0.1, 640), "quality")
+        self.assertEqual(PerformanceConfig.recommend_preset_for_measurement(0.5, 640), "ultra_fast")
+        controller = AdaptiveFrameController({"fps_target": 6, "imgsz": 640}, window=5)
+        self.assertIsNone(controller.recommend_preset())
+        self._run_frames(controller, 0.1, 5)
+        self.assertEqual(controller.recommend_preset(), "quality")
+
+
+class _FakeBulkManager:
+    """record_vehicle_detections_bulk 호출을 기록하는 테스트용 DB 관리자"""
+
+    def __init__(self):
+        self.available = True
+        self.rows = []
+
+    def record_vehicle_detections_bulk(self, rows):
+        if not self.available:
+            return False
+        self.rows.extend((camera_id, det) for camera_id, batch in rows for det in batch.records())
+        return True
+
+
+class TestDetectionWriteQueue(unittest.TestCase):
+    """Test asynchronous detection writes"""
+
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.journal = Path(self.tmp.name) / "journal.jsonl"
+        self.manager = _FakeBulkManager()
+
+    def _detection(self):
+        return {'vehicle_type': 'truck', 'confidence': 0.9,
+                'bbox_x': 0.5, 'bbox_y': 0.5, 'bbox_width': 0.1, 'bbox_height': 0.1}
+
+    def test_coalesces_cameras_and_flushes_on_stop(self):
+        writer = DetectionWriteQueue(self.manager, batch_size=100, flush_interval=10.0,
+                                     journal_path=self.journal)
+        writer.start()
+        writer.enqueue("cam1", [self._detection()])
+        writer.enqueue("cam2", [self._detection(), self._detection()])
+        writer.stop()
+        self.assertEqual([cam for cam, _ in self.manager.rows], ["cam1", "cam2", "cam2"])
+        self.assertIn('timestamp', self.manager.rows[0][1])
+        self.assertEqual(writer.batches_written, 1)
+
+    def test_spills_to_journal_and_replays(self):
+        self.manager.available = False
+        writer = DetectionWriteQueue(self.manager, batch_size=1, flush_interval=0.01,
+                                     journal_path=self.journal, retry_interval=0.05)
+        writer.start()
+        writer.enqueue("cam1", [self._detection(), self._detection()])
+        for _ in range(100):
+            if writer.spilled >= 2:
+                break
+            time.sleep(0.01)
+        self.assertTrue(self.journal.exists())
+        self.manager.available = True
+        for _ in range(100):
+            if not self.journal.exists():
+                break
+            time.sleep(0.02)
+        writer.stop()
+        self.assertFalse(self.journal.exists())
+        self.assertEqual(len(self.manager.rows), 2)
+        self.assertEqual(writer.replayed, 2)
+
+    def test_replay_streams_chunks_and_resumes(self):
+        writer = DetectionWriteQueue(self.manager, batch_size=2, journal_path=self.journal)
+        writer._spill([("cam1", DetectionBatch.from_records([self._detection()] * 5))])
+
+        calls = []
+        record = self.manager.record_vehicle_detections_bulk
+
+        def flaky(rows):
+            calls.append(sum(len(batch) for _, batch in rows))
+            return len(calls) < 2 and record(rows)
+
+        self.manager.record_vehicle_detections_bulk = flaky
+        self.assertTrue(writer._replay_chunk())
+        self.assertFalse(writer._replay_chunk())
+        # 첫 청크만 반영되고 재생 파일에 완료 위치가 남음
+        self.assertEqual(calls, [2, 2])
+        self.assertEqual((len(self.manager.rows), writer.replayed), (2, 2))
+        self.assertFalse(self.journal.exists())
+        self.assertTrue(writer._journal_exists())
+
+        self.manager.record_vehicle_detections_bulk = record
+        writer._db_available = True
+        while writer._replay_chunk():
+            pass
+        self.assertEqual((len(self.manager.rows), writer.replayed), (5, 5))
+        self.assertEqual(list(Path(self.tmp.name).iterdir()), [])
+
+    def test_overflow_spills_from_enqueue(self):
+        writer = DetectionWriteQueue(self.manager, max_queue=2, journal_path=self.journal)
+        self.assertEqual(writer.enqueue("cam1", [self._detection()] * 5), 2)
+        # writer 스레드 없이도 넘친 행은 바로 저널에 기록됨
+        with open(self.journal, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 3)
+        stats = writer.get_stats()
+        self.assertEqual((stats['queue_depth'], stats['overflowed'], stats['journal_backlog']), (2, 3, 3))
+
+        no_journal = DetectionWriteQueue(self.manager, max_queue=1)
+        no_journal.enqueue("cam1", [self._detection()] * 3)
+        self.assertEqual(no_journal.get_stats()['dropped'], 2)
+
+    def test_splits_batches_at_batch_size(self):
+        writer = DetectionWriteQueue(self.manager, batch_size=3, flush_interval=10.0,
+                                     journal_path=self.journal)
+        writer.enqueue("cam1", [self._detection()] * 2)
+        writer.enqueue("cam2", [self._detection()] * 4)
+        self.assertEqual(writer.get_stats()['queue_depth'], 6)
+        writer._running = True  # take a full-size batch as the running writer thread would
+        batch = writer._take_batch()
+        self.assertEqual([(cam, len(det)) for cam, det in batch], [("cam1", 2), ("cam2", 1)])
+        self.assertEqual(writer.get_stats()['queue_depth'], 3)
+
+
+class _FakeConnection:
+    """테스트용 DB 연결"""
+
+    def __init__(self):
+        self.closed = False
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def ping(self, reconnect=True):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test database connection pooling"""
+
+    def test_reuses_connections(self):
+        created = []
+        pool = ConnectionPool(lambda: created.append(_FakeConnection()) or created[-1], max_size=2)
+        with pool.connection() as conn:
+            first = conn._entry.conn
+        with pool.connection() as conn:
+            self.assertIs(conn._entry.conn, first)
+        self.assertEqual(len(created), 1)
+        self.assertEqual(pool.get_stats()['checkouts'], 2)
+        self.assertGreaterEqual(first.rollbacks, 2)
+
+    def test_max_size_and_timeout(self):
+        pool = ConnectionPool(_FakeConnection, max_size=1)
+        conn = pool.acquire()
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire(timeout=0.01)
+        conn.close()
+        pool.acquire(timeout=0.01).close()
+        self.assertEqual(pool.get_stats()['timeouts'], 1)
+
+    def test_idle_eviction_keeps_min_size(self):
+        pool = ConnectionPool(_FakeConnection, min_size=1, max_size=3, idle_timeout=0.0)
+        conns = [pool.acquire() for _ in range(3)]
+        for conn in conns:
+            conn.close()
+        pool.acquire().close()
+        self.assertEqual(pool.get_stats()['size'], 1)
+
+
+class TestCameraRegistry(unittest.TestCase):
+    """Test camera metadata cache"""
+
+    def test_lookup_ttl_and_invalidate(self):
+        registry = CameraRegistry(ttl=60)
+        registry.put_many([{'id': 'cam1', 'name': 'A', 'location': 'L'}])
+        registry.put('ghost', None)
+        found, missing = registry.lookup(['cam1', 'ghost', 'cam2'])
+        self.assertEqual(found, {'cam1': {'name': 'A', 'location': 'L'}, 'ghost': None})
+        self.assertEqual(missing, ['cam2'])
+
+        registry.invalidate('cam1')
+        self.assertEqual(registry.lookup(['cam1'])[1], ['cam1'])
+
+        registry.put('cam1', {'name': 'A', 'location': 'L'})
+        with mock.patch('car_detect_esal.database.camera_registry.time.monotonic',
+                        return_value=time.monotonic() + 120):
+            self.assertEqual(registry.lookup(['cam1'])[1], ['cam1'])
+
+
+class TestDetectionRollups(unittest.TestCase):
+    """Test hourly/daily rollup aggregation"""
+
+    def test_aggregate_buckets(self):
+        from datetime import datetime
+        rows = [
+            ("cam1", datetime(2024, 5, 1, 9, 5), "truck"),
+            ("cam1", datetime(2024, 5, 1, 9, 55), "truck"),
+            ("cam1", datetime(2024, 5, 1, 10, 1), "truck"),
+            ("cam2", datetime(2024, 5, 1, 9, 30), "car"),
+        ]
+        hourly, daily = DetectionRollups.aggregate(rows)
+        self.assertEqual(hourly[0], ("cam1", datetime(2024, 5, 1, 9), "truck", 2, 2 * 25160.0))
+        self.assertEqual(len(hourly), 3)
+        self.assertEqual(daily[0], ("cam1", datetime(2024, 5, 1).date(), "truck", 3, 3 * 25160.0))
+        self.assertEqual(daily[1][3], 1)
+
+    def test_query_counts_camera_list(self):
+        cursor = mock.Mock()
+        cursor.fetchall.return_value = [{'vehicle_type': 'truck', 'count': 2, 'esal': 50320.0}]
+        rollups = DetectionRollups()
+        stats = rollups.query_counts(cursor, camera_id=["cam1", "cam2"])
+        query, params = cursor.execute.call_args[0]
+        self.assertIn("camera_id IN (%s, %s)", query)
+        self.assertEqual(params, ["cam1", "cam2"])
+        self.assertEqual(stats['by_vehicle_type'], {'truck': 2})
+
+        cursor.reset_mock()
+        stats = rollups.query_counts(cursor, camera_id=[])
+        cursor.execute.assert_not_called()
+        self.assertEqual(stats['total'], 0)
+
+    def test_esal_weight_matching(self):
+        self.assertEqual(esal_weight("Truck"), 25160.0)
+        self.assertEqual(esal_weight("cars"), 1.0)
+        self.assertEqual(esal_weight("person"), 0.0)
+
+
+class TestESALAnalysisEngine(unittest.TestCase):
+    """Test ESAL analysis windows and parameters"""
+
+    def test_window_and_params(self):
+        from datetime import datetime
+        engine = ESALAnalysisEngine()
+        now = datetime(2024, 5, 1, 9, 30)
+        params = engine.build_params("cam1", "weekly", now)
+        self.assertEqual(params['period_end'], datetime(2024, 5, 1, 10))
+        self.assertEqual(params['period_start'], datetime(2024, 4, 24, 10))
+        self.assertEqual(params['window_days'], 7.0)
+        self.assertEqual(params['reconstruction'], 1000000.0)
+        with self.assertRaises(ValueError):
+            engine.window("yearly", now)
+
+    def test_weight_rows_groups(self):
+        weights = {row[0]: row for row in ESALAnalysisEngine.weight_rows()}
+        self.assertEqual(weights['truck'], ('truck', 25160.0, 'truck'))
+        self.assertEqual(weights['trailer'][2], 'other')
+
+
+class TestDetectionPartitionManager(unittest.TestCase):
+    """Test monthly partition planning"""
+
+    def test_plan_creates_future_and_drops_expired(self):
+        from datetime import date
+        manager = DetectionPartitionManager(months_ahead=2)
+        existing = [date(2023, 11, 1), date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1)]
+        create, drop = manager.plan(existing, date(2024, 2, 15), retention_days=60)
+        self.assertEqual(create, [date(2024, 3, 1), date(2024, 4, 1)])
+        # cutoff 2023-12-17: only November is entirely expired
+        self.assertEqual(drop, [date(2023, 11, 1)])
+
+    def test_plan_initial_partitions_from_first_data(self):
+        from datetime import date
+        manager = DetectionPartitionManager(months_ahead=1)
+        create, drop = manager.plan([], date(2024, 1, 10), retention_days=0, first_month=date(2023, 11, 20))
+        self.assertEqual(create, [date(2023, 11, 1), date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1)])
+        self.assertEqual(drop, [])
+        self.assertEqual(DetectionPartitionManager.parse_partition_name("p202312"), date(2023, 12, 1))
+        self.assertIsNone(DetectionPartitionManager.parse_partition_name("p_future"))
+
+
+class _FakeBatchDetector:
+    """detect_batch 호출을 기록하는 테스트용 탐지기"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def detect(self, frame, roi=None, imgsz=None, annotate=True):
+        return self.detect_batch([frame], [roi], imgsz, [annotate])[0]
+
+    def detect_batch(self, frames, rois=None, imgsz=None, annotate=None):
+        self.batch_sizes.append(len(frames))
+        return [(frame, [f"result-{frame}"]) for frame in frames]
+
+
+class TestBatchInferenceServer(unittest.TestCase):
+    """Test shared batched inference scheduling"""
+
+    def test_results_routed_per_camera(self):
+        """Frames from several cameras are batched and routed back"""
+        import threading
+
+        detector = _FakeBatchDetector()
+        server = BatchInferenceServer(detector, max_batch_size=4, max_wait=0.2)
+        server.start()
+        results = {}
+
+        def submit(cam):
+            results[cam] = server.infer(cam, cam)
+
+        threads = [threading.Thread(target=submit, args=(f"cam{i}",)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        server.stop()
+
+        for i in range(4):
+            self.assertEqual(results[f"cam{i}"], (f"cam{i}", [f"result-cam{i}"]))
+        self.assertEqual(sum(detector.batch_sizes), 4)
+        self.assertLess(len(detector.batch_sizes), 4)
+
+    def test_shared_camera_id_does_not_supersede(self):
+        """Two submitters with the same camera_id each get their own results"""
+        import threading
+
+        detector = _FakeBatchDetector()
+        server = BatchInferenceServer(detector, max_batch_size=4, max_wait=0.05)
+        server.start()
+        results = {"a": [], "b": []}
+
+        def submit(token):
+            for i in range(20):
+                results[token].append(server.infer("cam_same", f"{token}{i}", client_id=token))
+
+        threads = [threading.Thread(target=submit, args=(token,)) for token in results]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        server.stop()
+
+        for token, outputs in results.items():
+            self.assertEqual(outputs, [(f"{token}{i}", [f"result-{token}{i}"]) for i in range(20)])
+        self.assertEqual(server.frames_superseded, 0)
+
+    def test_fallback_when_stopped(self):
+        """A stopped server calls the detector directly"""
+        detector = _FakeBatchDetector()
+        server = BatchInferenceServer(detector)
+        self.assertEqual(server.infer("cam", "frame"), ("frame", ["result-frame"]))
+
 if __name__ == '__main__':
     # Run tests
     unittest.main(verbosity=2)
\ No newline at end of file